@@ -217,11 +217,13 @@ class ATOMCoWIntegration:
     
     async def _check_arbitrage_opportunity(self, order: CoWOrder) -> Optional[ArbitrageWithCoW]:
         """Check if CoW order presents arbitrage opportunity"""
-        # Get external market quote for the same trade
+        # Get external market quote for the same trade. A sell order is only
+        # worth simulating if the external route can beat its buy amount.
         external_quote = await self.pathfinder.find_best_route(
             order.sell_token,
             order.buy_token,
-            order.sell_amount - order.fee_amount  # Subtract CoW fee
+            order.sell_amount - order.fee_amount,  # Subtract CoW fee
+            min_amount_out=order.buy_amount if order.kind == 'sell' else None
         )
         
         if not external_quote:
@@ -293,7 +295,8 @@ class ATOMCoWIntegration:
         settlement = {
             'orders': [opportunity.cow_order.uid],
             'prices': {
-                opportunity.cow_order.sell_token: 1,
+                # effective_rate is fixed-point, so the sell token is priced at the same scale
+                opportunity.cow_order.sell_token: 10**18,
                 opportunity.cow_order.buy_token: opportunity.external_quote.effective_rate
             },
             'trades': [{
@@ -413,7 +416,8 @@ class ATOMCoWIntegration:
             # Surplus is extra buy tokens
             surplus_tokens = quote.amount_out - order.buy_amount
             # Convert to sell token value for scoring
-            return Decimal(surplus_tokens) / Decimal(quote.effective_rate)
+            # effective_rate is scaled by 10**18
+            return Decimal(surplus_tokens * 10**18) / Decimal(quote.effective_rate)
         else:
             # Surplus is saved sell tokens
             return Decimal(order.sell_amount - quote.amount_in)
@@ -616,7 +620,10 @@ class ATOMComplete:
         
         tasks = [t for t in tasks if t is not None]
         
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await self.pathfinder.close()
     
     async def _run_dex_monitor(self):
         """Run DEX monitoring with arbitrage execution"""
@@ -5,10 +5,12 @@ Flashbots integration, RBF, and gas optimization
 """
 
 import asyncio
+import functools
 import json
 import time
 import uuid
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from decimal import Decimal
 import aiohttp
@@ -17,6 +19,38 @@ from eth_account import Account
 from eth_account.messages import encode_defunct
 from flashbots import flashbot
 from eth_account.signers.local import LocalAccount
+from eth_keys import keys
+
+# Tokens likely to have MEV competition (lowercase, see _addr_norm)
+_POPULAR_TOKENS = frozenset({
+    '0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2',  # WETH
+    '0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48',  # USDC
+    '0x6b175474e89094c44da98b954eedeac495271d0f',  # DAI
+    '0xdac17f958d2ee523a2206206994597c13d831ec7',  # USDT
+})
+
+@functools.lru_cache(maxsize=8192)
+def _addr_norm(address: str) -> str:
+    """Normalize an address for comparisons and cache keys"""
+    return address.lower()
+
+# Average block time per chain id, in seconds
+_BLOCK_TIMES = {1: 12, 10: 2, 8453: 2, 42161: 0.3, 137: 2}
+
+class BoundedDict(OrderedDict):
+    """OrderedDict that evicts its oldest entries beyond max_size"""
+    
+    def __init__(self, max_size: int = 10_000, on_evict: Optional[Callable[[str, Dict], None]] = None):
+        super().__init__()
+        self.max_size = max_size
+        self.on_evict = on_evict
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        while len(self) > self.max_size:
+            evicted_key, evicted = self.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(evicted_key, evicted)
 
 @dataclass
 class TransactionBundle:
@@ -35,20 +69,37 @@ class TransactionBundle:
 class ATOMMEVProtection:
     """MEV protection layer with Flashbots and private routing"""
     
-    def __init__(self, config: Dict, w3: Web3, account: LocalAccount):
+    def __init__(self, config: Dict, w3: Web3, account: LocalAccount, tx_logger: Optional['TransactionLogger'] = None):
         self.config = config
         self.w3 = w3
         self.account = account
+        self.tx_logger = tx_logger
         
         # Setup Flashbots
         self.flashbots_enabled = config.get('flashbots_enabled', True)
+        self.relay_url = config.get('flashbots_relay_url', 'https://relay.flashbots.net')
         if self.flashbots_enabled:
-            self.w3 = flashbot(w3, account, config.get('flashbots_relay_url', 'https://relay.flashbots.net'))
+            self.w3 = flashbot(w3, account, self.relay_url)
+        
+        # Relay signing key, derived once rather than per bundle
+        self._signer_priv = keys.PrivateKey(bytes(account.key))
+        
+        # Keep-alive session for relay requests, created on first use
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.relay_timeout = config.get('relay_timeout', 3)  # seconds
+        
+        # Transaction tracking, capped so long runs don't grow without bound
+        max_tracked = config.get('max_tracked_txs', 10_000)
+        self.pending_txs = BoundedDict(max_tracked, self._evict_callback('pending'))
+        self.confirmed_txs = BoundedDict(max_tracked, self._evict_callback('confirmed'))
+        self.dropped_txs = BoundedDict(max_tracked, self._evict_callback('dropped'))
+        self.tracking_ttl = config.get('tx_tracking_ttl_seconds', 3600)
+        self._prune_task: Optional[asyncio.Task] = None
         
-        # Transaction tracking
-        self.pending_txs: Dict[str, Dict] = {}
-        self.confirmed_txs: Dict[str, Dict] = {}
-        self.dropped_txs: Dict[str, Dict] = {}
+        # New-block notification used by confirmation waits
+        self.block_time = _BLOCK_TIMES.get(config.get('chain_id', 1), 12)
+        self._new_block_evt = asyncio.Event()
+        self._block_watcher: Optional[asyncio.Task] = None
         
         # Gas tracking
         self.gas_history = []
@@ -66,6 +117,9 @@ class ATOMMEVProtection:
     
     async def execute_arbitrage_protected(self, opportunity: 'ArbitrageOpportunity', executor_contract: str) -> Optional[Dict]:
         """Execute arbitrage with MEV protection"""
+        if self._prune_task is None or self._prune_task.done():
+            self._prune_task = asyncio.create_task(self._prune_loop())
+        
         try:
             # 1. Check profitability with current gas
             gas_price = await self.gas_predictor.get_optimal_gas_price()
@@ -87,6 +141,41 @@ class ATOMMEVProtection:
             print(f"❌ MEV protection error: {e}")
             return None
     
+    async def stop(self):
+        """Cancel background tasks and close the relay session"""
+        tasks = [task for task in (self._block_watcher, self._prune_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._block_watcher = self._prune_task = None
+        
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    def _evict_callback(self, store: str) -> Callable[[str, Dict], None]:
+        """Build an eviction hook that keeps an audit trail of dropped entries"""
+        def on_evict(key: str, entry: Dict):
+            if self.tx_logger:
+                self.tx_logger.log_eviction(store, key, entry)
+        return on_evict
+    
+    async def _prune_loop(self):
+        """Periodically drop tracking entries older than tracking_ttl"""
+        while True:
+            await asyncio.sleep(60)
+            
+            cutoff = time.time() - self.tracking_ttl
+            for store, entries in (('pending', self.pending_txs), ('confirmed', self.confirmed_txs), ('dropped', self.dropped_txs)):
+                expired = [
+                    key for key, entry in entries.items()
+                    if entry.get('recorded_at', entry.get('submitted_at', 0)) < cutoff
+                ]
+                for key in expired:
+                    entry = entries.pop(key)
+                    if self.tx_logger:
+                        self.tx_logger.log_eviction(store, key, entry)
+    
     def _is_profitable_with_gas(self, opportunity: 'ArbitrageOpportunity', gas_price: int) -> bool:
         """Check if arbitrage is still profitable with current gas price"""
         estimated_gas = opportunity.buy_quote.gas_estimate + opportunity.sell_quote.gas_estimate
@@ -172,14 +261,7 @@ class ATOMMEVProtection:
     
     def _is_popular_pair(self, token_a: str, token_b: str) -> bool:
         """Check if token pair is popular (likely to have MEV competition)"""
-        popular_tokens = {
-            '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2',  # WETH
-            '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48',  # USDC
-            '0x6B175474E89094C44Da98b954EedeAC495271d0F',  # DAI
-            '0xdAC17F958D2ee523a2206206994597C13D831ec7',  # USDT
-        }
-        
-        return token_a in popular_tokens and token_b in popular_tokens
+        return _addr_norm(token_a) in _POPULAR_TOKENS and _addr_norm(token_b) in _POPULAR_TOKENS
     
     async def _submit_via_flashbots(self, tx: Dict, opportunity: 'ArbitrageOpportunity') -> Optional[Dict]:
         """Submit transaction via Flashbots"""
@@ -204,30 +286,84 @@ class ATOMMEVProtection:
             'target_blocks': []
         }
         
-        # Submit to multiple blocks
+        # Submit to the next 3 blocks concurrently
+        start_block = self.w3.eth.block_number
+        target_blocks = [start_block + block_offset for block_offset in range(1, 4)]
+        
+        sends = await self._send_bundle_to_blocks(bundle, target_blocks)
+        
         results = []
-        for block_offset in range(1, 4):  # Target next 3 blocks
-            target_block = self.w3.eth.block_number + block_offset
+        for target_block, result in zip(target_blocks, sends):
+            if isinstance(result, Exception):
+                print(f"   Failed to send bundle: {result}")
+                continue
             
-            try:
-                # Send bundle
-                result = self.w3.flashbots.send_bundle(
-                    bundle.transactions,
-                    target_block_number=target_block
-                )
-                
-                results.append(result)
-                self.pending_txs[bundle.uuid]['target_blocks'].append(target_block)
-                self.metrics['bundles_sent'] += 1
-                
-                print(f"   Bundle sent for block {target_block}")
-                
-            except Exception as e:
-                print(f"   Failed to send bundle: {e}")
+            results.append(result)
+            self.pending_txs[bundle.uuid]['target_blocks'].append(target_block)
+            self.metrics['bundles_sent'] += 1
+            
+            print(f"   Bundle sent for block {target_block}")
         
         # Wait for inclusion
         return await self._wait_for_flashbots_inclusion(bundle.uuid, results)
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled keep-alive relay session, opening it if needed"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.relay_timeout)
+            )
+        return self._http
+    
+    async def _send_bundle_to_blocks(self, bundle: TransactionBundle, target_blocks: List[int]) -> List:
+        """Send a bundle to every target block concurrently; failed sends come back as exceptions"""
+        # The relay doesn't accept JSON-RPC batches, so it's one request per block
+        return await asyncio.gather(*[
+            self._send_bundle(bundle, target_block) for target_block in target_blocks
+        ], return_exceptions=True)
+    
+    async def _send_bundle(self, bundle: TransactionBundle, target_block: int) -> Dict:
+        """Send a bundle for one target block as a signed eth_sendBundle request"""
+        body = json.dumps({
+            'jsonrpc': '2.0',
+            'id': 1,
+            'method': 'eth_sendBundle',
+            'params': [{
+                'txs': bundle.transactions,
+                'blockNumber': hex(target_block),
+                'minTimestamp': bundle.min_timestamp or 0,
+                'maxTimestamp': bundle.max_timestamp or 0,
+                'revertingTxHashes': bundle.reverting_tx_hashes or []
+            }]
+        })
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Flashbots-Signature': self._sign_relay_body(body)
+        }
+        
+        async with self._get_session().post(self.relay_url, data=body, headers=headers) as response:
+            reply = await response.json()
+        
+        if 'result' not in reply:
+            raise RuntimeError(reply.get('error', 'no relay response'))
+        
+        return {
+            'bundleHash': reply['result']['bundleHash'],
+            'blockNumber': target_block
+        }
+    
+    def _sign_relay_body(self, body: str) -> str:
+        """Build the X-Flashbots-Signature header value for a relay request body"""
+        message = encode_defunct(text=Web3.keccak(text=body).hex())
+        # EIP-191 personal_sign digest
+        message_hash = Web3.keccak(b'\x19' + message.version + message.header + message.body)
+        signature = self._signer_priv.sign_msg_hash(message_hash)
+        
+        # personal_sign convention: v is 27/28 rather than 0/1
+        signature_bytes = signature.to_bytes()[:64] + bytes([signature.v + 27])
+        return f"{self.account.address}:0x{signature_bytes.hex()}"
+    
     async def _wait_for_flashbots_inclusion(self, bundle_uuid: str, results: List) -> Optional[Dict]:
         """Wait for Flashbots bundle inclusion"""
         max_wait_blocks = 5
@@ -247,7 +383,7 @@ class ATOMMEVProtection:
                         self.metrics['bundles_included'] += 1
                         
                         # Get transaction receipt
-                        bundle_data = self.pending_txs.get(bundle_uuid)
+                        bundle_data = self.pending_txs.pop(bundle_uuid, None)
                         if bundle_data:
                             tx_hash = Web3.keccak(hexstr=bundle_data['bundle'].transactions[0])
                             receipt = self.w3.eth.get_transaction_receipt(tx_hash)
@@ -256,7 +392,8 @@ class ATOMMEVProtection:
                             self.confirmed_txs[tx_hash.hex()] = {
                                 'receipt': receipt,
                                 'opportunity': bundle_data['opportunity'],
-                                'method': 'flashbots'
+                                'method': 'flashbots',
+                                'recorded_at': time.time()
                             }
                             
                             return receipt
@@ -264,7 +401,7 @@ class ATOMMEVProtection:
                 except Exception as e:
                     pass
             
-            await asyncio.sleep(1)
+            await self._wait_for_new_block()
         
         print("⏱️  Bundle not included within timeout")
         return None
@@ -273,26 +410,32 @@ class ATOMMEVProtection:
         """Submit transaction with Replace-By-Fee support"""
         print("📤 Submitting transaction with RBF...")
         
-        original_gas_price = tx.get('gasPrice') or tx.get('maxFeePerGas')
+        # Only the fee fields change between same-nonce replacements
+        fee_fields = ('gasPrice',) if 'gasPrice' in tx else ('maxFeePerGas', 'maxPriorityFeePerGas')
+        common_fields = {k: v for k, v in tx.items() if k not in fee_fields}
+        fees = {field: tx[field] for field in fee_fields}
+        gas_increase = self.config.get('rbf_gas_increase_percent', 15)
+        
         tx_hash = None
         attempts = 0
         max_attempts = self.config.get('max_rbf_attempts', 3)
         
         while attempts < max_attempts:
+            tx = {**common_fields, **fees}
+            
             try:
                 # Sign and send transaction
                 signed_tx = self.account.sign_transaction(tx)
                 tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
                 
                 print(f"   Tx sent: {tx_hash.hex()}")
-                print(f"   Gas price: {Web3.fromWei(original_gas_price, 'gwei')} gwei")
                 
                 # Track transaction
                 self.pending_txs[tx_hash.hex()] = {
                     'tx': tx,
                     'opportunity': opportunity,
                     'submitted_at': time.time(),
-                    'gas_price': original_gas_price,
+                    'gas_price': fees[fee_fields[0]],
                     'attempts': attempts + 1
                 }
                 
@@ -308,16 +451,9 @@ class ATOMMEVProtection:
             # Increase gas price for retry
             attempts += 1
             if attempts < max_attempts:
-                gas_increase = self.config.get('rbf_gas_increase_percent', 15)
-                new_gas_price = int(original_gas_price * (1 + gas_increase / 100))
-                
-                if 'gasPrice' in tx:
-                    tx['gasPrice'] = new_gas_price
-                else:
-                    tx['maxFeePerGas'] = new_gas_price
-                    tx['maxPriorityFeePerGas'] = int(tx['maxPriorityFeePerGas'] * (1 + gas_increase / 100))
+                fees = {field: value * (100 + gas_increase) // 100 for field, value in fees.items()}
                 
-                print(f"   🔄 Retrying with {Web3.fromWei(new_gas_price, 'gwei')} gwei (attempt {attempts + 1})")
+                print(f"   🔄 Retrying with {fees[fee_fields[0]] / 10**9:.2f} gwei (attempt {attempts + 1})")
                 self.metrics['rbf_attempts'] += 1
         
         return None
@@ -326,7 +462,6 @@ class ATOMMEVProtection:
         """Wait for transaction confirmation with RBF option"""
         timeout = self.config.get('tx_timeout_seconds', 60)
         start_time = time.time()
-        check_interval = 1
         
         while time.time() - start_time < timeout:
             try:
@@ -348,11 +483,13 @@ class ATOMMEVProtection:
                         })
                         
                         # Record success
+                        self.pending_txs.pop(tx_hash.hex(), None)
                         self.confirmed_txs[tx_hash.hex()] = {
                             'receipt': receipt,
                             'opportunity': opportunity,
                             'method': 'rbf',
-                            'gas_cost_wei': gas_used
+                            'gas_cost_wei': gas_used,
+                            'recorded_at': time.time()
                         }
                         
                         return receipt
@@ -371,10 +508,41 @@ class ATOMMEVProtection:
                 # Transaction not found yet
                 pass
             
-            await asyncio.sleep(check_interval)
+            await self._wait_for_new_block()
         
         print(f"⏱️  Transaction timeout after {timeout}s")
         return None
+    
+    async def _wait_for_new_block(self):
+        """Wait for the next block, or at most one block time"""
+        if self._block_watcher is None or self._block_watcher.done():
+            self._block_watcher = asyncio.create_task(self._watch_new_blocks())
+        
+        try:
+            await asyncio.wait_for(self._new_block_evt.wait(), timeout=self.block_time)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _watch_new_blocks(self):
+        """Wake confirmation waiters whenever a new block is observed"""
+        # Several polls per block so waiters wake soon after it lands, capped
+        # at 1s on slow chains and 100ms on fast ones
+        poll_interval = min(1.0, max(0.1, self.block_time / 4))
+        # The provider is synchronous, so every call runs off the event loop
+        last_block = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+        
+        while True:
+            await asyncio.sleep(poll_interval)
+            
+            try:
+                block_number = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+            except Exception:
+                continue
+            
+            if block_number > last_block:
+                last_block = block_number
+                self._new_block_evt.set()
+                self._new_block_evt.clear()
 
 class GasPredictor:
     """Predict optimal gas prices using historical data"""
@@ -382,36 +550,61 @@ class GasPredictor:
     def __init__(self, w3: Web3):
         self.w3 = w3
         self.gas_history = []
-        self.prediction_cache = {}
         self.cache_duration = 12  # seconds
+        
+        # Only the newest bucket is ever read, so keep a single (bucket, price) slot
+        self._cached: Optional[Tuple[int, int]] = None
+        self._inflight: Optional[asyncio.Task] = None
     
     async def get_optimal_gas_price(self) -> int:
         """Get optimal gas price for arbitrage transaction"""
         # Check cache
-        cache_key = int(time.time() / self.cache_duration)
-        if cache_key in self.prediction_cache:
-            return self.prediction_cache[cache_key]
+        bucket = int(time.time() / self.cache_duration)
+        if self._cached and self._cached[0] == bucket:
+            return self._cached[1]
+        
+        # Coalesce concurrent callers onto a single fetch
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh(bucket))
+            self._inflight.add_done_callback(self._refreshed)
+        
+        # Shielded so one caller being cancelled doesn't cancel the others' fetch
+        return await asyncio.shield(self._inflight)
+    
+    async def _refresh(self, bucket: int) -> int:
+        """Fetch the optimal gas price off the loop and cache it for this bucket"""
+        optimal_price = await asyncio.to_thread(self._fetch_optimal_gas_price)
+        self._cached = (bucket, optimal_price)
+        return optimal_price
+    
+    def _refreshed(self, task: asyncio.Task):
+        """Clear the in-flight fetch once it settles"""
+        self._inflight = None
+        # Mark retrieved so a failure nobody awaited doesn't log a warning
+        if not task.cancelled():
+            task.exception()
+    
+    def _fetch_optimal_gas_price(self) -> int:
+        """Compute optimal gas price from recent fee data"""
+        # EIP-1559 chains report priority fee percentiles directly, without
+        # downloading a full block. 75th percentile is competitive but not excessive.
+        try:
+            fee_history = self.w3.eth.fee_history(1, 'latest', [75])
+        except Exception:
+            fee_history = None
+        
+        if fee_history and fee_history.get('baseFeePerGas') and fee_history.get('reward'):
+            # Last base fee entry is the one for the upcoming block
+            base_fee = fee_history['baseFeePerGas'][-1]
+            priority_75 = fee_history['reward'][0][0]
+            return base_fee + priority_75
         
         # Get current gas prices
         latest_block = self.w3.eth.get_block('latest', full_transactions=True)
         
         if 'baseFeePerGas' in latest_block:
-            # EIP-1559 chain
-            base_fee = latest_block['baseFeePerGas']
-            
-            # Analyze recent blocks for priority fees
-            priority_fees = []
-            for tx in latest_block['transactions'][:20]:  # Sample recent transactions
-                if 'maxPriorityFeePerGas' in tx:
-                    priority_fees.append(tx['maxPriorityFeePerGas'])
-            
-            if priority_fees:
-                # Use 75th percentile for competitive but not excessive priority fee
-                percentile_75 = sorted(priority_fees)[int(len(priority_fees) * 0.75)]
-                optimal_price = base_fee + percentile_75
-            else:
-                # Default priority fee
-                optimal_price = base_fee + (2 * 10**9)  # 2 gwei
+            # EIP-1559 block but no fee history support - default priority fee
+            optimal_price = latest_block['baseFeePerGas'] + (2 * 10**9)  # 2 gwei
         else:
             # Legacy gas pricing
             gas_prices = []
@@ -426,9 +619,6 @@ class GasPredictor:
             else:
                 optimal_price = self.w3.eth.gas_price
         
-        # Cache result
-        self.prediction_cache[cache_key] = optimal_price
-        
         return optimal_price
     
     async def predict_gas_spike(self, lookahead_blocks: int = 5) -> bool:
@@ -469,6 +659,20 @@ class TransactionLogger:
         
         with open(self.log_file, 'a') as f:
             f.write(json.dumps(log_entry) + '\n')
+    
+    def log_eviction(self, store: str, key: str, entry: Dict):
+        """Log a tracking entry evicted from memory"""
+        log_entry = {
+            'timestamp': time.time(),
+            'event': 'evicted',
+            'store': store,
+            'key': key,
+            'method': entry.get('method'),
+            'submitted_at': entry.get('submitted_at')
+        }
+        
+        with open(self.log_file, 'a') as f:
+            f.write(json.dumps(log_entry) + '\n')
 
 # Integration with main ATOM system
 class ATOMExecutor:
@@ -482,8 +686,8 @@ class ATOMExecutor:
         # Initialize components
         from atom_core import ATOMDexMonitor
         self.monitor = ATOMDexMonitor(config)
-        self.mev_protection = ATOMMEVProtection(config, self.w3, self.account)
         self.logger = TransactionLogger()
+        self.mev_protection = ATOMMEVProtection(config, self.w3, self.account, self.logger)
         
         # Deploy or load arbitrage contract
         self.arbitrage_contract = self._setup_arbitrage_contract()
@@ -520,7 +724,10 @@ class ATOMExecutor:
         self.monitor._execute_arbitrage = self.execute_arbitrage
         
         # Run monitoring
-        await self.monitor.start_monitoring(self.config['tokens'])
+        try:
+            await self.monitor.start_monitoring(self.config['tokens'])
+        finally:
+            await self.mev_protection.stop()
     
     async def execute_arbitrage(self, opportunity: 'ArbitrageOpportunity'):
         """Execute arbitrage with MEV protection"""
@@ -6,16 +6,152 @@ Multi-hop routing with 0x, 1inch, and Paraswap integration
 
 import asyncio
 import aiohttp
+import functools
+import hashlib
 import json
+import math
 import time
 from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from decimal import Decimal
-from collections import defaultdict
-import networkx as nx
+from collections import OrderedDict, defaultdict
 from web3 import Web3
+from eth_abi import encode_abi
 import numpy as np
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the routing kernels run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Fixed-point scale for exchange rates (matches 18-decimal token math)
+RATE_PRECISION = 10**18
+
+# Fee and slippage ratios as integer numerators over _FEE_DEN, so wei math stays exact
+_FEE_DEN = 1000
+_UNI_V2_FEE_NUM = 997  # 0.3% fee
+_CURVE_FEE_NUM = 998
+_SLIPPAGE_NUM = 995  # 0.5% slippage
+# Log rate of a round trip paying the 0.3% fee on three hops each way, the
+# most a fairly priced cycle loses within internal_log_rates' default max_hops
+_ROUND_TRIP_FEE_FLOOR = 6 * math.log(_UNI_V2_FEE_NUM / _FEE_DEN)
+
+USDC_ADDRESS = '0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48'
+
+# Pool type ids for the edge arrays; unknown types price at a flat rate
+POOL_UNISWAP_V2 = 0
+POOL_CURVE = 1
+POOL_OTHER = 2
+POOL_TYPE_IDS = {'uniswap_v2': POOL_UNISWAP_V2, 'curve': POOL_CURVE}
+POOL_TYPE_NAMES = ('uniswap_v2', 'curve', 'other')
+_FLAT_POOL_RATES = np.array([0.0, _CURVE_FEE_NUM / _FEE_DEN, _UNI_V2_FEE_NUM / _FEE_DEN])
+
+@functools.lru_cache(maxsize=8192)
+def _addr_norm(address: str) -> str:
+    """Normalize an address for comparisons and cache keys"""
+    return address.lower()
+
+@functools.lru_cache(maxsize=8192)
+def _checksum(address: str) -> str:
+    """Checksum an address for Web3 calls that require it"""
+    return Web3.toChecksumAddress(address)
+
+@njit(cache=True)
+def _k_best_paths_by_hops(src, dst, max_hops, k, indptr, edge_src, edge_dst, edge_rate_log):
+    """Hop-bounded k-best Bellman-Ford maximising the summed log-rate from src to dst.
+    
+    Rows (h-1)*k to h*k-1 of the result hold the k best h-hop paths, best
+    first, as CSR edge ids padded with -1. Unused rows are all -1.
+    """
+    num_nodes = indptr.shape[0] - 1
+    best = np.full((max_hops + 1, num_nodes, k), -np.inf)
+    pred_edge = np.full((max_hops + 1, num_nodes, k), -1, dtype=np.int64)
+    pred_rank = np.full((max_hops + 1, num_nodes, k), -1, dtype=np.int64)
+    best[0, src, 0] = 0.0
+    
+    for hop in range(1, max_hops + 1):
+        for u in range(num_nodes):
+            for r in range(k):
+                base = best[hop - 1, u, r]
+                if base == -np.inf:
+                    break  # Lists are sorted, the rest are empty too
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = edge_dst[e]
+                    candidate = base + edge_rate_log[e]
+                    if candidate <= best[hop, v, k - 1]:
+                        continue
+                    
+                    # Insertion into v's descending top-k list
+                    i = k - 1
+                    while i > 0 and best[hop, v, i - 1] < candidate:
+                        best[hop, v, i] = best[hop, v, i - 1]
+                        pred_edge[hop, v, i] = pred_edge[hop, v, i - 1]
+                        pred_rank[hop, v, i] = pred_rank[hop, v, i - 1]
+                        i -= 1
+                    best[hop, v, i] = candidate
+                    pred_edge[hop, v, i] = e
+                    pred_rank[hop, v, i] = r
+    
+    paths = np.full((max_hops * k, max_hops), -1, dtype=np.int64)
+    for hop in range(1, max_hops + 1):
+        for r in range(k):
+            if best[hop, dst, r] == -np.inf:
+                break
+            row = (hop - 1) * k + r
+            node = dst
+            rank = r
+            for h in range(hop, 0, -1):
+                e = pred_edge[h, node, rank]
+                paths[row, h - 1] = e
+                rank = pred_rank[h, node, rank]
+                node = edge_src[e]
+    
+    return paths
+
+@njit(cache=True, nogil=True)
+def _all_pairs_best_log(max_hops, indptr, edge_dst, edge_rate_log):
+    """Best summed log-rate from every token to every other within max_hops"""
+    num_nodes = indptr.shape[0] - 1
+    result = np.full((num_nodes, num_nodes), -np.inf)
+    
+    for src in range(num_nodes):
+        layer = np.full(num_nodes, -np.inf)
+        layer[src] = 0.0
+        for hop in range(max_hops):
+            next_layer = np.full(num_nodes, -np.inf)
+            for u in range(num_nodes):
+                base = layer[u]
+                if base == -np.inf:
+                    continue
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = edge_dst[e]
+                    candidate = base + edge_rate_log[e]
+                    if candidate > next_layer[v]:
+                        next_layer[v] = candidate
+            for v in range(num_nodes):
+                if next_layer[v] > result[src, v]:
+                    result[src, v] = next_layer[v]
+            layer = next_layer
+    
+    return result
+
+@njit(cache=True)
+def _uni_v2_output_batch(reserve_in, reserve_out, amount_in, out):
+    """Constant-product output (0.3% fee) for many hops at once, in float64"""
+    for i in range(amount_in.shape[0]):
+        amount_in_with_fee = amount_in[i] * _UNI_V2_FEE_NUM
+        out[i] = amount_in_with_fee * reserve_out[i] / (reserve_in[i] * _FEE_DEN + amount_in_with_fee)
+
 @dataclass
 class RouteQuote:
     """Enhanced quote with full routing information"""
@@ -32,14 +168,13 @@ class RouteQuote:
     deadline: int
     
     @property
-    def effective_rate(self) -> Decimal:
-        """Calculate effective exchange rate"""
-        return Decimal(self.amount_out) / Decimal(self.amount_in)
+    def effective_rate(self) -> int:
+        """Calculate effective exchange rate, scaled by RATE_PRECISION"""
+        return self.amount_out * RATE_PRECISION // self.amount_in
     
-    @property
-    def slippage_adjusted_output(self, slippage: Decimal = Decimal('0.005')) -> int:
-        """Calculate minimum output with slippage"""
-        return int(self.amount_out * (1 - slippage))
+    def slippage_adjusted_output(self, slippage_bps: int = 50) -> int:
+        """Calculate minimum output with slippage (in basis points)"""
+        return self.amount_out * (10_000 - slippage_bps) // 10_000
 
 class ATOMPathfinder:
     """Smart routing engine with aggregator integration"""
@@ -75,103 +210,354 @@ class ATOMPathfinder:
             }
         }
         
-        # Internal routing graph
-        self.routing_graph = nx.DiGraph()
+        # Static request params and headers, built once; calls only overlay token/amount fields
+        slippage = config.get('slippage', 0.005)
+        affiliate_address = config.get('affiliate_address', '0x0000000000000000000000000000000000000000')
+        
+        self._0x_base_params = {
+            'slippagePercentage': str(slippage),
+            'skipValidation': 'false',
+            'enableSlippageProtection': 'true',
+            'excludedSources': 'Kyber',  # Exclude problematic sources
+            'affiliateAddress': affiliate_address,
+            'affiliateFee': '0.001'  # 0.1% affiliate fee
+        }
+        self._0x_headers = {
+            '0x-api-key': self.aggregators['0x']['api_key']
+        } if self.aggregators['0x']['api_key'] else {}
+        self._0x_quote_url = f"{self.aggregators['0x']['base_url']}{self.aggregators['0x']['endpoints']['quote']}"
+        
+        self._1inch_base_params = {
+            'fromAddress': config.get('executor_address'),
+            'slippage': str(int(slippage * 100)),
+            'protocols': ','.join(config.get('1inch_protocols', ['UNISWAP_V2', 'UNISWAP_V3', 'SUSHI', 'CURVE'])),
+            'disableEstimate': 'true',
+            'allowPartialFill': 'false',
+            'fee': '0.1'  # 0.1% fee
+        }
+        self._1inch_headers = {
+            'Authorization': f"Bearer {self.aggregators['1inch']['api_key']}"
+        } if self.aggregators['1inch']['api_key'] else {}
+        self._1inch_quote_url = f"{self.aggregators['1inch']['base_url']}{self.aggregators['1inch']['endpoints']['quote']}"
+        
+        self._paraswap_price_params = {
+            'side': 'SELL',
+            'network': str(config.get('chain_id', 1)),
+            'otherExchangePrices': 'true'
+        }
+        self._paraswap_tx_params = {
+            'userAddress': config.get('executor_address'),
+            'partner': 'atom',
+            'partnerAddress': affiliate_address,
+            'partnerFeeBps': '10'  # 0.1%
+        }
+        self._paraswap_prices_url = f"{self.aggregators['paraswap']['base_url']}{self.aggregators['paraswap']['endpoints']['prices']}"
+        self._paraswap_transactions_url = f"{self.aggregators['paraswap']['base_url']}{self.aggregators['paraswap']['endpoints']['transactions']}"
+        
+        # Multihop call encoding is fixed, so hash the selector once
+        self._swap_multihop_selector = Web3.keccak(text="swapMultihop(address[],address[],uint256,uint256)")[:4]
+        self._swap_multihop_abi = ['address[]', 'address[]', 'uint256', 'uint256']
+        
+        # Internal routing graph as parallel per-pool arrays (structure of arrays).
+        # Each pool is stored once as token0 -> token1; the CSR built for the
+        # compiled search adds the mirrored direction.
         self.liquidity_map = defaultdict(dict)
+        self._tokens: List[str] = []
+        self._token_ids: Dict[str, int] = {}
+        self._edge_ids: Dict[Tuple[int, int], int] = {}
+        self._num_edges = 0
+        self.edge_token0 = np.empty(64, dtype=np.int64)
+        self.edge_token1 = np.empty(64, dtype=np.int64)
+        self.edge_reserve0 = np.empty(64, dtype=np.float64)
+        self.edge_reserve1 = np.empty(64, dtype=np.float64)
+        # Log marginal rate per direction, kept current as pools update
+        self.edge_log_rate01 = np.empty(64, dtype=np.float64)
+        self.edge_log_rate10 = np.empty(64, dtype=np.float64)
+        self.edge_gas = np.empty(64, dtype=np.int32)
+        self.edge_pool_type = np.empty(64, dtype=np.int8)
+        self.edge_pool_addr: List[str] = []
+        # Exact integer reserves, since wei amounts overflow int64
+        self._edge_reserves_exact: List[Tuple[int, int]] = []
         
-        # Cache for recent quotes
-        self.quote_cache = {}
+        self.route_candidates = config.get('route_candidates', 4)  # per hop count
+        self._csr_dirty = False
+        self._csr_indptr = np.zeros(1, dtype=np.int64)
+        self._csr_edge_ids = np.empty(0, dtype=np.int64)
+        self._csr_forward = np.empty(0, dtype=bool)
+        self._csr_src = np.empty(0, dtype=np.int64)
+        self._csr_dst = np.empty(0, dtype=np.int64)
+        self._csr_rate_log = np.empty(0, dtype=np.float64)
+        self._csr_pool_type = np.empty(0, dtype=np.int8)
+        self._csr_reserve_in = np.empty(0, dtype=np.float64)
+        self._csr_reserve_out = np.empty(0, dtype=np.float64)
+        
+        # Cache for recent quotes, kept in insertion order so expiry pops from the front
+        self.quote_cache: OrderedDict = OrderedDict()
+        self.quote_cache_size = config.get('quote_cache_size', 4096)
         self.cache_duration = 2  # seconds
         
+        # Resolved best routes, LRU keyed by (token_in, token_out, amount_in, max_hops)
+        self.route_cache: OrderedDict = OrderedDict()
+        self.route_cache_size = config.get('route_cache_size', 4096)
+        self.route_cache_ttl = config.get('route_cache_ttl', 12)  # seconds
+        self.route_cache_reserve_epsilon = config.get('route_cache_reserve_epsilon', 0.001)
+        self.route_cache_hits = 0
+        self.route_cache_misses = 0
+        # Routes handed out with simulate=False, by id(quote) -> (quote, route key),
+        # cached once simulate_many() verifies them
+        self._unverified_routes: OrderedDict = OrderedDict()
+        
+        # Per-aggregator rate history for early exit from slow sources
+        self._aggregator_ema: Dict[Tuple[str, str, str], float] = {}
+        self.ema_alpha = 0.2
+        self.early_exit_margin = config.get('early_exit_margin', 0.03)
+        
         # Simulation contract for testing
         self.simulation_contract = self._deploy_simulation_contract()
+        
+        # JSON-RPC endpoint for batched simulations (falls back to per-call w3.eth.call)
+        self.rpc_url = config.get('rpc_url')
+        
+        # Gas price shared by all routes in flight, refreshed every gas_price_ttl seconds
+        self.gas_price_ttl = config.get('gas_price_ttl', 3)  # seconds
+        self._cached_gas_price: Optional[int] = None
+        self._gas_price_ts = 0.0
+        self._gas_price_inflight: Optional[asyncio.Task] = None
+        
+        # Shared HTTP session for aggregators and RPC, created on first use
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.http_timeout = config.get('http_timeout', 2)  # seconds
+        
+        # Access lists from eth_createAccessList, LRU keyed by (to, calldata digest)
+        self._access_list_cache: OrderedDict = OrderedDict()
+        self.access_list_cache_size = config.get('access_list_cache_size', 1024)
+        self.access_list_ttl = config.get('access_list_ttl', 12)  # seconds
     
     async def find_best_route(
         self,
         token_in: str,
         token_out: str,
         amount_in: int,
-        max_hops: int = 3
+        max_hops: int = 3,
+        simulate: bool = True,
+        min_amount_out: Optional[int] = None
     ) -> Optional[RouteQuote]:
-        """Find the best route across all sources"""
+        """Find the best route across all sources
+        
+        With simulate=False the route is returned unverified so callers can
+        batch simulations through simulate_many(). With min_amount_out set,
+        routes whose output net of gas can't reach it are dropped unsimulated.
+        """
+        token_in = _addr_norm(token_in)
+        token_out = _addr_norm(token_out)
+        
+        # Keyed on the exact size: call_data encodes amount_in, so a cached route
+        # can't be reused for a different amount
+        route_key = (token_in, token_out, amount_in, max_hops)
+        cached_route = self._get_cached_route(route_key)
+        if cached_route:
+            # Same net-of-gas test as a fresh quote gets below
+            if min_amount_out is not None:
+                gas_cost_per_unit = self._gas_price_in_tokens(await self.get_gas_price(), token_in)
+                if cached_route.amount_out - cached_route.gas_estimate * gas_cost_per_unit < min_amount_out:
+                    return None
+            return cached_route
+        
         quotes = []
         
         # Get quotes from all aggregators in parallel
-        tasks = [
-            self._get_0x_quote(token_in, token_out, amount_in),
-            self._get_1inch_quote(token_in, token_out, amount_in),
-            self._get_paraswap_quote(token_in, token_out, amount_in),
-            self._find_internal_route(token_in, token_out, amount_in, max_hops)
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = {
+            asyncio.create_task(self._get_0x_quote(token_in, token_out, amount_in)): '0x',
+            asyncio.create_task(self._get_1inch_quote(token_in, token_out, amount_in)): '1inch',
+            asyncio.create_task(self._get_paraswap_quote(token_in, token_out, amount_in)): 'paraswap',
+            asyncio.create_task(self._find_internal_route(token_in, token_out, amount_in, max_hops)): 'internal'
+        }
         
-        for result in results:
-            if isinstance(result, RouteQuote):
-                quotes.append(result)
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    if task.exception() is None and isinstance(task.result(), RouteQuote):
+                        quote = task.result()
+                        quotes.append(quote)
+                        self._update_aggregator_ema(quote, token_in, token_out)
+                
+                # Stop waiting once no slower source is expected to beat the best quote
+                if quotes and self._dominates(quotes, [tasks[t] for t in pending], token_in, token_out):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
         
         if not quotes:
             return None
         
         # Find best quote considering gas costs
-        best_quote = max(quotes, key=lambda q: self._calculate_net_output(q))
+        gas_cost_per_unit = self._gas_price_in_tokens(await self.get_gas_price(), token_in)
+        best_quote, net_output = self._select_best_quote(quotes, gas_cost_per_unit)
+        
+        if min_amount_out is not None and net_output < min_amount_out:
+            return None
+        
+        if not simulate:
+            self._unverified_routes[id(best_quote)] = (best_quote, route_key)
+            while len(self._unverified_routes) > self.route_cache_size:
+                self._unverified_routes.popitem(last=False)
+            return best_quote
         
         # Simulate the trade before returning
         if await self._simulate_trade(best_quote):
+            self._cache_route(route_key, best_quote)
             return best_quote
         
         return None
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled keep-alive HTTP session, opening it if needed"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.http_timeout)
+            )
+        return self._http
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    async def get_gas_price(self) -> int:
+        """Get the current gas price, cached briefly and fetched once for concurrent callers"""
+        if self._cached_gas_price is not None and time.time() - self._gas_price_ts < self.gas_price_ttl:
+            return self._cached_gas_price
+        
+        if self._gas_price_inflight is None:
+            self._gas_price_inflight = asyncio.ensure_future(self._fetch_gas_price())
+            self._gas_price_inflight.add_done_callback(self._gas_price_fetched)
+        
+        # Shielded so one caller being cancelled doesn't cancel the others' fetch
+        return await asyncio.shield(self._gas_price_inflight)
+    
+    async def _fetch_gas_price(self) -> int:
+        """Fetch the gas price from the node and cache it"""
+        gas_price = await asyncio.to_thread(lambda: self.w3.eth.gas_price)
+        self._cached_gas_price = gas_price
+        self._gas_price_ts = time.time()
+        return gas_price
+    
+    def _gas_price_fetched(self, task: asyncio.Task):
+        """Clear the in-flight fetch once it settles"""
+        self._gas_price_inflight = None
+        # Mark retrieved so a failure nobody awaited doesn't log a warning
+        if not task.cancelled():
+            task.exception()
+    
+    def _get_cached_route(self, key: Tuple) -> Optional[RouteQuote]:
+        """Get a resolved route from cache if still valid"""
+        entry = self.route_cache.get(key)
+        if entry is None or time.time() - entry[1] >= self.route_cache_ttl:
+            self.route_cache_misses += 1
+            return None
+        
+        self.route_cache_hits += 1
+        self.route_cache.move_to_end(key)
+        return entry[0]
+    
+    def _cache_route(self, key: Tuple, quote: RouteQuote):
+        """Cache a resolved route, evicting the least recently used"""
+        # Aggregators return checksummed paths; keep a normalized copy for invalidation
+        path_tokens = frozenset(_addr_norm(token) for token in quote.path)
+        self.route_cache[key] = (quote, time.time(), path_tokens)
+        self.route_cache.move_to_end(key)
+        
+        while len(self.route_cache) > self.route_cache_size:
+            self.route_cache.popitem(last=False)
+    
+    def _invalidate_routes(self, tokens: Set[str]):
+        """Drop cached routes passing through any of the given (normalized) tokens"""
+        stale = [key for key, (_, _, path_tokens) in self.route_cache.items() if not path_tokens.isdisjoint(tokens)]
+        for key in stale:
+            del self.route_cache[key]
+    
+    def get_performance_metrics(self) -> Dict:
+        """Get route cache statistics"""
+        lookups = self.route_cache_hits + self.route_cache_misses
+        return {
+            'route_cache_hits': self.route_cache_hits,
+            'route_cache_misses': self.route_cache_misses,
+            'route_cache_hit_rate': self.route_cache_hits / lookups if lookups else 0.0,
+            'route_cache_size': len(self.route_cache)
+        }
+    
+    def _update_aggregator_ema(self, quote: RouteQuote, token_in: str, token_out: str):
+        """Track each aggregator's typical rate for a pair"""
+        key = (quote.aggregator, token_in, token_out)
+        rate = quote.effective_rate
+        previous = self._aggregator_ema.get(key)
+        
+        if previous is None:
+            self._aggregator_ema[key] = rate
+        else:
+            self._aggregator_ema[key] = previous + self.ema_alpha * (rate - previous)
+    
+    def _dominates(self, quotes: List[RouteQuote], remaining: List[str], token_in: str, token_out: str) -> bool:
+        """Check if the best quote so far clearly beats what remaining sources usually return"""
+        best_rate = max(q.effective_rate for q in quotes)
+        
+        for aggregator in remaining:
+            expected = self._aggregator_ema.get((aggregator, token_in, token_out))
+            # Without history we cannot rule a source out
+            if expected is None or best_rate < expected * (1 + self.early_exit_margin):
+                return False
+        
+        return True
+    
     async def _get_0x_quote(self, token_in: str, token_out: str, amount_in: int) -> Optional[RouteQuote]:
         """Get quote from 0x Protocol"""
+        token_in = _addr_norm(token_in)
+        token_out = _addr_norm(token_out)
         cache_key = f"0x-{token_in}-{token_out}-{amount_in}"
         cached = self._get_cached_quote(cache_key)
         if cached:
             return cached
         
         params = {
+            **self._0x_base_params,
             'sellToken': token_in,
             'buyToken': token_out,
-            'sellAmount': str(amount_in),
-            'slippagePercentage': str(self.config.get('slippage', 0.005)),
-            'skipValidation': 'false',
-            'enableSlippageProtection': 'true',
-            'excludedSources': 'Kyber',  # Exclude problematic sources
-            'affiliateAddress': self.config.get('affiliate_address', '0x0000000000000000000000000000000000000000'),
-            'affiliateFee': '0.001'  # 0.1% affiliate fee
+            'sellAmount': str(amount_in)
         }
         
-        headers = {
-            '0x-api-key': self.aggregators['0x']['api_key']
-        } if self.aggregators['0x']['api_key'] else {}
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.aggregators['0x']['base_url']}{self.aggregators['0x']['endpoints']['quote']}",
-                    params=params,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        quote = RouteQuote(
-                            aggregator='0x',
-                            path=self._extract_0x_path(data),
-                            pools=data.get('sources', []),
-                            amount_in=int(data['sellAmount']),
-                            amount_out=int(data['buyAmount']),
-                            gas_estimate=int(data.get('estimatedGas', 250000)),
-                            price_impact=Decimal(data.get('priceImpact', '0')),
-                            call_data=bytes.fromhex(data['data'][2:]),
-                            to_address=data['to'],
-                            value=int(data['value']),
-                            deadline=int(time.time()) + 300  # 5 minutes
-                        )
-                        
-                        self._cache_quote(cache_key, quote)
-                        return quote
-                        
+            session = self._get_session()
+            async with session.get(
+                self._0x_quote_url,
+                params=params,
+                headers=self._0x_headers
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(loads=_json_loads)
+                    
+                    quote = RouteQuote(
+                        aggregator='0x',
+                        path=self._extract_0x_path(data),
+                        pools=data.get('sources', []),
+                        amount_in=int(data['sellAmount']),
+                        amount_out=int(data['buyAmount']),
+                        gas_estimate=int(data.get('estimatedGas', 250000)),
+                        price_impact=Decimal(data.get('priceImpact', '0')),
+                        call_data=bytes.fromhex(data['data'][2:]),
+                        to_address=data['to'],
+                        value=int(data['value']),
+                        deadline=int(time.time()) + 300  # 5 minutes
+                    )
+                    
+                    self._cache_quote(cache_key, quote)
+                    return quote
+                    
         except Exception as e:
             print(f"0x API error: {e}")
         
@@ -179,54 +565,47 @@ class ATOMPathfinder:
     
     async def _get_1inch_quote(self, token_in: str, token_out: str, amount_in: int) -> Optional[RouteQuote]:
         """Get quote from 1inch"""
+        token_in = _addr_norm(token_in)
+        token_out = _addr_norm(token_out)
         cache_key = f"1inch-{token_in}-{token_out}-{amount_in}"
         cached = self._get_cached_quote(cache_key)
         if cached:
             return cached
         
         params = {
+            **self._1inch_base_params,
             'fromTokenAddress': token_in,
             'toTokenAddress': token_out,
-            'amount': str(amount_in),
-            'fromAddress': self.config.get('executor_address'),
-            'slippage': str(int(self.config.get('slippage', 0.005) * 100)),
-            'protocols': ','.join(self.config.get('1inch_protocols', ['UNISWAP_V2', 'UNISWAP_V3', 'SUSHI', 'CURVE'])),
-            'disableEstimate': 'true',
-            'allowPartialFill': 'false',
-            'fee': '0.1'  # 0.1% fee
+            'amount': str(amount_in)
         }
         
-        headers = {
-            'Authorization': f"Bearer {self.aggregators['1inch']['api_key']}"
-        } if self.aggregators['1inch']['api_key'] else {}
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.aggregators['1inch']['base_url']}{self.aggregators['1inch']['endpoints']['quote']}",
-                    params=params,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        quote = RouteQuote(
-                            aggregator='1inch',
-                            path=self._extract_1inch_path(data),
-                            pools=data.get('protocols', []),
-                            amount_in=int(data['fromTokenAmount']),
-                            amount_out=int(data['toTokenAmount']),
-                            gas_estimate=int(data.get('estimatedGas', 300000)),
-                            price_impact=Decimal('0'),  # 1inch doesn't provide this
-                            call_data=bytes.fromhex(data['tx']['data'][2:]),
-                            to_address=data['tx']['to'],
-                            value=int(data['tx']['value']),
-                            deadline=int(time.time()) + 300
-                        )
-                        
-                        self._cache_quote(cache_key, quote)
-                        return quote
-                        
+            session = self._get_session()
+            async with session.get(
+                self._1inch_quote_url,
+                params=params,
+                headers=self._1inch_headers
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(loads=_json_loads)
+                    
+                    quote = RouteQuote(
+                        aggregator='1inch',
+                        path=self._extract_1inch_path(data),
+                        pools=data.get('protocols', []),
+                        amount_in=int(data['fromTokenAmount']),
+                        amount_out=int(data['toTokenAmount']),
+                        gas_estimate=int(data.get('estimatedGas', 300000)),
+                        price_impact=Decimal('0'),  # 1inch doesn't provide this
+                        call_data=bytes.fromhex(data['tx']['data'][2:]),
+                        to_address=data['tx']['to'],
+                        value=int(data['tx']['value']),
+                        deadline=int(time.time()) + 300
+                    )
+                    
+                    self._cache_quote(cache_key, quote)
+                    return quote
+                    
         except Exception as e:
             print(f"1inch API error: {e}")
         
@@ -234,6 +613,8 @@ class ATOMPathfinder:
     
     async def _get_paraswap_quote(self, token_in: str, token_out: str, amount_in: int) -> Optional[RouteQuote]:
         """Get quote from Paraswap"""
+        token_in = _addr_norm(token_in)
+        token_out = _addr_norm(token_out)
         cache_key = f"paraswap-{token_in}-{token_out}-{amount_in}"
         cached = self._get_cached_quote(cache_key)
         if cached:
@@ -241,66 +622,61 @@ class ATOMPathfinder:
         
         # First get price quote
         price_params = {
+            **self._paraswap_price_params,
             'srcToken': token_in,
             'destToken': token_out,
-            'amount': str(amount_in),
-            'side': 'SELL',
-            'network': str(self.config.get('chain_id', 1)),
-            'otherExchangePrices': 'true'
+            'amount': str(amount_in)
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get price quote
-                async with session.get(
-                    f"{self.aggregators['paraswap']['base_url']}{self.aggregators['paraswap']['endpoints']['prices']}",
-                    params=price_params
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    price_data = await response.json()
-                    
-                    if not price_data.get('priceRoute'):
-                        return None
-                    
-                    # Build transaction
-                    tx_params = {
-                        'srcToken': token_in,
-                        'destToken': token_out,
-                        'srcAmount': str(amount_in),
-                        'destAmount': price_data['priceRoute']['destAmount'],
-                        'priceRoute': price_data['priceRoute'],
-                        'userAddress': self.config.get('executor_address'),
-                        'partner': 'atom',
-                        'partnerAddress': self.config.get('affiliate_address', '0x0000000000000000000000000000000000000000'),
-                        'partnerFeeBps': '10'  # 0.1%
-                    }
-                    
-                    async with session.post(
-                        f"{self.aggregators['paraswap']['base_url']}{self.aggregators['paraswap']['endpoints']['transactions']}",
-                        json=tx_params
-                    ) as tx_response:
-                        if tx_response.status == 200:
-                            tx_data = await tx_response.json()
-                            
-                            quote = RouteQuote(
-                                aggregator='paraswap',
-                                path=self._extract_paraswap_path(price_data),
-                                pools=price_data['priceRoute']['bestRoute'],
-                                amount_in=int(price_data['priceRoute']['srcAmount']),
-                                amount_out=int(price_data['priceRoute']['destAmount']),
-                                gas_estimate=int(price_data['priceRoute'].get('gasCost', 350000)),
-                                price_impact=Decimal(price_data['priceRoute'].get('priceImpact', '0')),
-                                call_data=bytes.fromhex(tx_data['data'][2:]),
-                                to_address=tx_data['to'],
-                                value=int(tx_data.get('value', '0')),
-                                deadline=int(time.time()) + 300
-                            )
-                            
-                            self._cache_quote(cache_key, quote)
-                            return quote
-                            
+            session = self._get_session()
+            # Get price quote
+            async with session.get(
+                self._paraswap_prices_url,
+                params=price_params
+            ) as response:
+                if response.status != 200:
+                    return None
+                
+                price_data = await response.json(loads=_json_loads)
+                
+                if not price_data.get('priceRoute'):
+                    return None
+                
+                # Build transaction
+                tx_params = {
+                    **self._paraswap_tx_params,
+                    'srcToken': token_in,
+                    'destToken': token_out,
+                    'srcAmount': str(amount_in),
+                    'destAmount': price_data['priceRoute']['destAmount'],
+                    'priceRoute': price_data['priceRoute']
+                }
+                
+                async with session.post(
+                    self._paraswap_transactions_url,
+                    json=tx_params
+                ) as tx_response:
+                    if tx_response.status == 200:
+                        tx_data = await tx_response.json(loads=_json_loads)
+                        
+                        quote = RouteQuote(
+                            aggregator='paraswap',
+                            path=self._extract_paraswap_path(price_data),
+                            pools=price_data['priceRoute']['bestRoute'],
+                            amount_in=int(price_data['priceRoute']['srcAmount']),
+                            amount_out=int(price_data['priceRoute']['destAmount']),
+                            gas_estimate=int(price_data['priceRoute'].get('gasCost', 350000)),
+                            price_impact=Decimal(price_data['priceRoute'].get('priceImpact', '0')),
+                            call_data=bytes.fromhex(tx_data['data'][2:]),
+                            to_address=tx_data['to'],
+                            value=int(tx_data.get('value', '0')),
+                            deadline=int(time.time()) + 300
+                        )
+                        
+                        self._cache_quote(cache_key, quote)
+                        return quote
+                        
         except Exception as e:
             print(f"Paraswap API error: {e}")
         
@@ -313,207 +689,379 @@ class ATOMPathfinder:
         amount_in: int,
         max_hops: int
     ) -> Optional[RouteQuote]:
-        """Find route using internal graph (Dijkstra/A*)"""
-        if not self.routing_graph.has_node(token_in) or not self.routing_graph.has_node(token_out):
+        """Find route using internal graph (compiled hop-bounded search)"""
+        if self._csr_dirty:
+            self._rebuild_csr()
+        
+        src = self._token_ids.get(token_in)
+        dst = self._token_ids.get(token_out)
+        if src is None or dst is None:
             return None
         
-        try:
-            # Find shortest path weighted by liquidity
-            path = nx.shortest_path(
-                self.routing_graph,
-                token_in,
-                token_out,
-                weight='weight',
-                method='dijkstra'
-            )
-            
-            if len(path) > max_hops + 1:
-                return None
-            
-            # Calculate output through path
-            current_amount = amount_in
-            pools = []
-            gas_estimate = 0
-            
-            for i in range(len(path) - 1):
-                from_token = path[i]
-                to_token = path[i + 1]
-                
-                # Get best pool for this hop
-                pool_data = self.routing_graph[from_token][to_token]
-                pool = pool_data['pool']
-                
-                # Calculate output for this hop
-                output = self._calculate_pool_output(
-                    pool['type'],
-                    pool['reserves'],
-                    current_amount,
-                    from_token,
-                    to_token
-                )
-                
-                pools.append({
-                    'pool': pool['address'],
-                    'type': pool['type'],
-                    'input': current_amount,
-                    'output': output
-                })
-                
-                current_amount = output
-                gas_estimate += pool.get('gas', 150000)
+        # Search by marginal rate for the k best paths at each hop count
+        candidates = _k_best_paths_by_hops(
+            src, dst, max_hops, self.route_candidates,
+            self._csr_indptr, self._csr_src, self._csr_dst, self._csr_rate_log
+        )
+        candidates = candidates[candidates[:, 0] >= 0]
+        
+        # Walks that revisit a token would price a pool twice at stale reserves
+        candidates = candidates[[self._is_simple_path(src, row) for row in candidates]]
+        if len(candidates) == 0:
+            return None
+        
+        # Marginal rates ignore price impact, so walk all candidates at the
+        # real size hop by hop, then price the winner exactly
+        amounts = np.full(len(candidates), float(amount_in))
+        for hop in range(candidates.shape[1]):
+            active = candidates[:, hop] >= 0
+            amounts[active] = self._calculate_pool_output_batch(candidates[active, hop], amounts[active])
+        best = candidates[int(np.argmax(amounts))]
+        edges = best[best >= 0]
+        
+        path = [token_in]
+        current_amount = amount_in
+        pools = []
+        gas_estimate = 0
+        
+        for e in edges:
+            edge_id = self._csr_edge_ids[e]
+            to_token = self._tokens[self._csr_dst[e]]
+            pool_type = int(self._csr_pool_type[e])
+            reserve0, reserve1 = self._edge_reserves_exact[edge_id]
+            reserve_in, reserve_out = (reserve0, reserve1) if self._csr_forward[e] else (reserve1, reserve0)
             
-            # Build call data for multi-hop swap
-            call_data = self._encode_multihop_swap(path, pools, amount_in)
+            # Calculate output for this hop
+            output = self._calculate_pool_output(pool_type, reserve_in, reserve_out, current_amount)
             
-            return RouteQuote(
-                aggregator='internal',
-                path=path,
-                pools=pools,
-                amount_in=amount_in,
-                amount_out=current_amount,
-                gas_estimate=gas_estimate,
-                price_impact=Decimal('0'),  # TODO: Calculate actual impact
-                call_data=call_data,
-                to_address=self.config.get('executor_address'),
-                value=0,
-                deadline=int(time.time()) + 300
-            )
+            pools.append({
+                'pool': self.edge_pool_addr[edge_id],
+                'type': POOL_TYPE_NAMES[pool_type],
+                'input': current_amount,
+                'output': output
+            })
             
-        except nx.NetworkXNoPath:
-            return None
+            path.append(to_token)
+            current_amount = output
+            gas_estimate += int(self.edge_gas[edge_id])
+        
+        # Build call data for multi-hop swap
+        call_data = self._encode_multihop_swap(path, pools, amount_in)
+        
+        return RouteQuote(
+            aggregator='internal',
+            path=path,
+            pools=pools,
+            amount_in=amount_in,
+            amount_out=current_amount,
+            gas_estimate=gas_estimate,
+            price_impact=Decimal('0'),  # TODO: Calculate actual impact
+            call_data=call_data,
+            to_address=self.config.get('executor_address'),
+            value=0,
+            deadline=int(time.time()) + 300
+        )
+    
+    def _is_simple_path(self, src: int, edges: np.ndarray) -> bool:
+        """Check that a candidate path never returns to a token it has visited"""
+        nodes = self._csr_dst[edges[edges >= 0]]
+        return src not in nodes and len(np.unique(nodes)) == len(nodes)
     
     def _calculate_pool_output(
         self,
-        pool_type: str,
-        reserves: Dict,
-        amount_in: int,
-        token_in: str,
-        token_out: str
+        pool_type: int,
+        reserve_in: int,
+        reserve_out: int,
+        amount_in: int
     ) -> int:
         """Calculate output amount for different pool types"""
-        if pool_type == 'uniswap_v2':
+        if pool_type == POOL_UNISWAP_V2:
             # Constant product formula
-            reserve_in = reserves[token_in]
-            reserve_out = reserves[token_out]
-            
-            amount_in_with_fee = amount_in * 997  # 0.3% fee
+            amount_in_with_fee = amount_in * _UNI_V2_FEE_NUM
             numerator = amount_in_with_fee * reserve_out
-            denominator = (reserve_in * 1000) + amount_in_with_fee
+            denominator = (reserve_in * _FEE_DEN) + amount_in_with_fee
             
             return numerator // denominator
             
-        elif pool_type == 'curve':
+        elif pool_type == POOL_CURVE:
             # Simplified Curve calculation (actual is more complex)
             # This is a placeholder - real Curve math requires the pool's A parameter
-            return int(amount_in * 0.998)  # Approximate
+            return amount_in * _CURVE_FEE_NUM // _FEE_DEN  # Approximate
             
         else:
             # Default to simple ratio
-            return int(amount_in * 0.997)
+            return amount_in * _UNI_V2_FEE_NUM // _FEE_DEN
+    
+    async def internal_log_rates(self, tokens: List[str], max_hops: int = 3) -> np.ndarray:
+        """Best internal log marginal rate between each pair of tokens (-inf if unroutable)"""
+        if self._csr_dirty:
+            self._rebuild_csr()
+        
+        ids = np.array([self._token_ids.get(_addr_norm(token), -1) for token in tokens], dtype=np.int64)
+        
+        # The kernel only reads the current CSR arrays, so it runs off the event loop
+        best = await asyncio.to_thread(
+            _all_pairs_best_log, max_hops, self._csr_indptr, self._csr_dst, self._csr_rate_log
+        )
+        
+        rates = np.full((len(tokens), len(tokens)), -np.inf)
+        known = np.flatnonzero(ids >= 0)
+        rates[np.ix_(known, known)] = best[np.ix_(ids[known], ids[known])]
+        return rates
+    
+    def _calculate_pool_output_batch(self, edges: np.ndarray, amounts_in: np.ndarray) -> np.ndarray:
+        """Estimate outputs across many CSR edges at once (float64, for ranking only)"""
+        out = np.empty_like(amounts_in)
+        pool_types = self._csr_pool_type[edges]
+        
+        v2 = pool_types == POOL_UNISWAP_V2
+        if v2.any():
+            v2_edges = edges[v2]
+            v2_out = np.empty(len(v2_edges))
+            _uni_v2_output_batch(
+                self._csr_reserve_in[v2_edges], self._csr_reserve_out[v2_edges], amounts_in[v2], v2_out
+            )
+            out[v2] = v2_out
+        
+        out[~v2] = amounts_in[~v2] * _FLAT_POOL_RATES[pool_types[~v2]]
+        return out
     
     def update_routing_graph(self, pool_updates: List[Dict]):
         """Update internal routing graph with new pool data"""
+        shifted_tokens = set()
+        
         for update in pool_updates:
-            token0 = update['token0']
-            token1 = update['token1']
-            
-            # Add nodes if they don't exist
-            if not self.routing_graph.has_node(token0):
-                self.routing_graph.add_node(token0)
-            if not self.routing_graph.has_node(token1):
-                self.routing_graph.add_node(token1)
-            
-            # Calculate edge weight based on liquidity
-            liquidity = update.get('liquidity', 0)
-            weight = 1 / (liquidity + 1)  # Inverse of liquidity for shortest path
+            # Normalize addresses at ingest so lookups are case-insensitive
+            token0 = _addr_norm(update['token0'])
+            token1 = _addr_norm(update['token1'])
+            update = {
+                **update,
+                'token0': token0,
+                'token1': token1,
+                'reserves': {_addr_norm(token): reserve for token, reserve in update.get('reserves', {}).items()}
+            }
             
-            # Add edges in both directions
-            self.routing_graph.add_edge(
-                token0,
-                token1,
-                weight=weight,
-                pool=update
-            )
-            self.routing_graph.add_edge(
-                token1,
-                token0,
-                weight=weight,
-                pool=update
-            )
+            # One edge per pair serves both directions; a newer pool for a pair replaces the old one
+            id0 = self._token_id(token0)
+            id1 = self._token_id(token1)
+            if self._reserves_shifted(id0, id1, update):
+                shifted_tokens.update((token0, token1))
+            self._set_edge(id0, id1, update)
             
             # Update liquidity map
+            liquidity = update.get('liquidity', 0)
             self.liquidity_map[token0][token1] = liquidity
             self.liquidity_map[token1][token0] = liquidity
+        
+        if pool_updates:
+            self._csr_dirty = True
+        if shifted_tokens:
+            self._invalidate_routes(shifted_tokens)
+    
+    def _reserves_shifted(self, id0: int, id1: int, update: Dict) -> bool:
+        """Check if a pool update moves reserves by more than the cache epsilon"""
+        edge_id = self._edge_ids.get((min(id0, id1), max(id0, id1)))
+        if edge_id is None:
+            return True  # New edge may open better routes
+        
+        previous = self._edge_reserves_exact[edge_id]
+        current = (
+            update['reserves'].get(self._tokens[self.edge_token0[edge_id]], 0),
+            update['reserves'].get(self._tokens[self.edge_token1[edge_id]], 0)
+        )
+        for reserve, old_reserve in zip(current, previous):
+            if abs(reserve - old_reserve) > self.route_cache_reserve_epsilon * max(old_reserve, 1):
+                return True
+        return False
+    
+    def _token_id(self, token: str) -> int:
+        """Get the node id for a token, registering it if new"""
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = len(self._tokens)
+            self._token_ids[token] = token_id
+            self._tokens.append(token)
+        return token_id
+    
+    def _set_edge(self, id0: int, id1: int, pool: Dict):
+        """Insert or replace the pool edge between two tokens"""
+        key = (min(id0, id1), max(id0, id1))
+        edge_id = self._edge_ids.get(key)
+        if edge_id is None:
+            edge_id = self._num_edges
+            if edge_id == len(self.edge_token0):
+                self._grow_edges()
+            self._edge_ids[key] = edge_id
+            self._num_edges += 1
+            self.edge_token0[edge_id], self.edge_token1[edge_id] = key
+            self.edge_pool_addr.append(pool['address'])
+            self._edge_reserves_exact.append((0, 0))
+        
+        reserve0 = pool['reserves'].get(self._tokens[key[0]], 0)
+        reserve1 = pool['reserves'].get(self._tokens[key[1]], 0)
+        pool_type = POOL_TYPE_IDS.get(pool['type'], POOL_OTHER)
+        self.edge_reserve0[edge_id] = reserve0
+        self.edge_reserve1[edge_id] = reserve1
+        self.edge_log_rate01[edge_id] = self._edge_rate_log(pool_type, reserve0, reserve1)
+        self.edge_log_rate10[edge_id] = self._edge_rate_log(pool_type, reserve1, reserve0)
+        self.edge_gas[edge_id] = pool.get('gas', 150000)
+        self.edge_pool_type[edge_id] = pool_type
+        self.edge_pool_addr[edge_id] = pool['address']
+        self._edge_reserves_exact[edge_id] = (reserve0, reserve1)
+    
+    def _grow_edges(self):
+        """Double the capacity of the per-edge arrays"""
+        capacity = 2 * len(self.edge_token0)
+        self.edge_token0 = np.resize(self.edge_token0, capacity)
+        self.edge_token1 = np.resize(self.edge_token1, capacity)
+        self.edge_reserve0 = np.resize(self.edge_reserve0, capacity)
+        self.edge_reserve1 = np.resize(self.edge_reserve1, capacity)
+        self.edge_log_rate01 = np.resize(self.edge_log_rate01, capacity)
+        self.edge_log_rate10 = np.resize(self.edge_log_rate10, capacity)
+        self.edge_gas = np.resize(self.edge_gas, capacity)
+        self.edge_pool_type = np.resize(self.edge_pool_type, capacity)
+    
+    def _rebuild_csr(self):
+        """Sort forward and mirrored edges by source into CSR arrays for the compiled search"""
+        n = self._num_edges
+        token0 = self.edge_token0[:n]
+        token1 = self.edge_token1[:n]
+        reserve0 = self.edge_reserve0[:n]
+        reserve1 = self.edge_reserve1[:n]
+        
+        # Directed view: the first n entries run token0 -> token1, the rest are mirrored
+        edge_src = np.concatenate((token0, token1))
+        order = np.argsort(edge_src, kind='stable')
+        
+        indptr = np.zeros(len(self._tokens) + 1, dtype=np.int64)
+        indptr[1:] = np.bincount(edge_src, minlength=len(self._tokens)).cumsum()
+        
+        self._csr_indptr = indptr
+        self._csr_edge_ids = order % max(n, 1)
+        self._csr_forward = order < n
+        self._csr_src = edge_src[order]
+        self._csr_dst = np.concatenate((token1, token0))[order]
+        self._csr_pool_type = np.tile(self.edge_pool_type[:n], 2)[order]
+        self._csr_reserve_in = np.concatenate((reserve0, reserve1))[order]
+        self._csr_reserve_out = np.concatenate((reserve1, reserve0))[order]
+        self._csr_rate_log = np.concatenate((self.edge_log_rate01[:n], self.edge_log_rate10[:n]))[order]
+        self._csr_dirty = False
+    
+    def _edge_rate_log(self, pool_type: int, reserve_in: int, reserve_out: int) -> float:
+        """Log of the marginal exchange rate across a pool, net of fees"""
+        if pool_type == POOL_UNISWAP_V2:
+            if reserve_in <= 0 or reserve_out <= 0:
+                return -math.inf  # Empty pool, never routable
+            return math.log(_UNI_V2_FEE_NUM * reserve_out / (_FEE_DEN * reserve_in))
+        return math.log(_FLAT_POOL_RATES[pool_type])
     
     async def _simulate_trade(self, quote: RouteQuote) -> bool:
         """Simulate trade execution using eth_call"""
+        return (await self.simulate_many([quote]))[0]
+    
+    async def simulate_many(self, quotes: List[RouteQuote]) -> List[bool]:
+        """Simulate several trades, batched into one JSON-RPC request when possible"""
+        if not quotes:
+            return []
+        
+        sim_txs = await asyncio.gather(*[self._build_simulation_tx(quote) for quote in quotes])
+        
         try:
-            # Build simulation transaction
-            sim_tx = {
-                'from': self.config.get('executor_address'),
-                'to': quote.to_address,
-                'data': '0x' + quote.call_data.hex(),
-                'value': quote.value
-            }
-            
-            # Add access list for gas optimization
-            if self.config.get('use_access_list', True):
-                access_list = await self._build_access_list(quote)
-                sim_tx['accessList'] = access_list
-            
-            # Simulate with eth_call
-            result = self.w3.eth.call(sim_tx)
-            
+            if self.rpc_url:
+                results = await self._batch_eth_call(sim_txs)
+            else:
+                results = [self.w3.eth.call(sim_tx) for sim_tx in sim_txs]
+        except Exception as e:
+            print(f"Simulation error: {e}")
+            return [False] * len(quotes)
+        
+        outcomes = []
+        for quote, result in zip(quotes, results):
             # Decode result based on aggregator
-            success = self._decode_simulation_result(quote.aggregator, result)
-            
+            success = result is not None and self._decode_simulation_result(quote.aggregator, result)
             if not success:
                 print(f"⚠️  Simulation failed for {quote.aggregator} route")
-                return False
-            
-            # Additional profitability check
-            gas_cost = quote.gas_estimate * self.w3.eth.gas_price
-            min_profit = self.config.get('min_profit_wei', Web3.toWei(0.01, 'ether'))
-            
-            # For arbitrage, we need to check full cycle profitability
-            # This is handled by the caller
-            
-            return True
+            outcomes.append(success)
             
-        except Exception as e:
-            print(f"Simulation error: {e}")
-            return False
+            # Routes from find_best_route(simulate=False) are cached once verified
+            unverified = self._unverified_routes.pop(id(quote), None)
+            if success and unverified is not None:
+                self._cache_route(unverified[1], quote)
+        
+        # For arbitrage, full cycle profitability is checked by the caller
+        return outcomes
     
-    async def _build_access_list(self, quote: RouteQuote) -> List[Dict]:
-        """Build EIP-2930 access list for gas optimization"""
-        access_list = []
-        
-        # Add aggregator contract
-        access_list.append({
-            'address': quote.to_address,
-            'storageKeys': []
-        })
-        
-        # Add token contracts
-        for token in quote.path:
-            access_list.append({
-                'address': token,
-                'storageKeys': [
-                    # Common storage slots for ERC20 tokens
-                    '0x0',  # totalSupply
-                    '0x1',  # balances mapping
-                    '0x2',  # allowances mapping
-                ]
-            })
+    async def _build_simulation_tx(self, quote: RouteQuote) -> Dict:
+        """Build the eth_call transaction for simulating a quote"""
+        sim_tx = {
+            'to': quote.to_address,
+            'data': '0x' + quote.call_data.hex(),
+            'value': hex(quote.value)
+        }
+        if self.config.get('executor_address'):
+            sim_tx['from'] = self.config['executor_address']
         
-        # Add pool contracts
-        for pool_data in quote.pools:
-            if isinstance(pool_data, dict) and 'pool' in pool_data:
-                access_list.append({
-                    'address': pool_data['pool'],
-                    'storageKeys': []
-                })
+        # Add access list for gas optimization
+        if self.config.get('use_access_list', True):
+            access_list = await self._fetch_access_list(sim_tx)
+            if access_list:
+                sim_tx['accessList'] = access_list
         
+        return sim_tx
+    
+    async def _batch_eth_call(self, calls: List[Dict]) -> List[Optional[bytes]]:
+        """Run several eth_calls in a single JSON-RPC batch round-trip"""
+        payload = [
+            {'jsonrpc': '2.0', 'id': call_id, 'method': 'eth_call', 'params': [call, 'latest']}
+            for call_id, call in enumerate(calls)
+        ]
+        
+        session = self._get_session()
+        async with session.post(self.rpc_url, json=payload) as response:
+            replies = await response.json(loads=_json_loads)
+        
+        if isinstance(replies, dict):
+            # Node rejected the batch as a whole
+            raise RuntimeError(replies.get('error', replies))
+        
+        replies_by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for call_id in range(len(calls)):
+            reply = replies_by_id.get(call_id, {})
+            # Reverted or failed calls carry an 'error' instead of a 'result'
+            results.append(bytes.fromhex(reply['result'][2:]) if 'result' in reply else None)
+        
+        return results
+    
+    async def _fetch_access_list(self, tx: Dict) -> List[Dict]:
+        """Get the EIP-2930 access list the node reports for a call"""
+        # Touched slots depend on the arguments (path, pools, amounts), not just
+        # the selector, so only an identical call can reuse an access list
+        cache_key = (tx['to'], hashlib.blake2b(tx['data'].encode(), digest_size=16).digest())
+        cached = self._access_list_cache.get(cache_key)
+        if cached and time.time() - cached[1] < self.access_list_ttl:
+            self._access_list_cache.move_to_end(cache_key)
+            return cached[0]
+        
+        try:
+            response = await asyncio.to_thread(
+                self.w3.provider.make_request, 'eth_createAccessList', [tx, 'latest']
+            )
+            access_list = response['result']['accessList']
+        except Exception as e:
+            print(f"Access list error: {e}")
+            return []
+        
+        # Warm the node's state caches for every slot the call will touch
+        await asyncio.gather(*[
+            asyncio.to_thread(self.w3.eth.get_proof, entry['address'], entry['storageKeys'], 'latest')
+            for entry in access_list
+        ], return_exceptions=True)
+        
+        self._access_list_cache[cache_key] = (access_list, time.time())
+        self._access_list_cache.move_to_end(cache_key)
+        while len(self._access_list_cache) > self.access_list_cache_size:
+            self._access_list_cache.popitem(last=False)
         return access_list
     
     def _extract_0x_path(self, data: Dict) -> List[str]:
@@ -552,17 +1100,15 @@ class ATOMPathfinder:
         """Encode call data for multi-hop swap"""
         # This should match your arbitrage contract's interface
         # Example encoding for a generic multihop swap
-        function_signature = Web3.keccak(text="swapMultihop(address[],address[],uint256,uint256)")[:4]
-        
         pool_addresses = [p['pool'] for p in pools]
-        min_amount_out = int(pools[-1]['output'] * 0.995)  # 0.5% slippage
+        min_amount_out = int(pools[-1]['output']) * _SLIPPAGE_NUM // _FEE_DEN
         
-        encoded_params = Web3.encode_abi(
-            ['address[]', 'address[]', 'uint256', 'uint256'],
-            [path, pool_addresses, amount_in, min_amount_out]
+        encoded_params = encode_abi(
+            self._swap_multihop_abi,
+            [[_checksum(token) for token in path], [_checksum(pool) for pool in pool_addresses], amount_in, min_amount_out]
         )
         
-        return function_signature + encoded_params
+        return self._swap_multihop_selector + encoded_params
     
     def _decode_simulation_result(self, aggregator: str, result: bytes) -> bool:
         """Decode simulation result based on aggregator"""
@@ -576,48 +1122,52 @@ class ATOMPathfinder:
             # For internal routes, check success boolean
             return len(result) >= 32 and result[31] == 1
     
-    def _calculate_net_output(self, quote: RouteQuote) -> int:
-        """Calculate net output after gas costs"""
-        gas_cost_in_token = self._estimate_gas_cost_in_tokens(
-            quote.gas_estimate,
-            quote.path[0],  # Assuming we measure in input token
-            quote.path[-1]
-        )
+    def _select_best_quote(self, quotes: List[RouteQuote], gas_cost_per_unit: float) -> Tuple[RouteQuote, float]:
+        """Select the quote with the highest output net of gas costs"""
+        # float64 rather than int64: wei-denominated amounts overflow int64
+        amounts_out = np.fromiter((q.amount_out for q in quotes), dtype=np.float64, count=len(quotes))
+        gas_estimates = np.fromiter((q.gas_estimate for q in quotes), dtype=np.float64, count=len(quotes))
+        net_outputs = amounts_out - gas_estimates * gas_cost_per_unit
         
-        return quote.amount_out - gas_cost_in_token
+        best = int(net_outputs.argmax())
+        return quotes[best], float(net_outputs[best])
     
-    def _estimate_gas_cost_in_tokens(self, gas_units: int, token: str, reference_token: str) -> int:
-        """Estimate gas cost denominated in tokens"""
+    def _gas_price_in_tokens(self, gas_price: int, token: str) -> float:
+        """Estimate the cost of one gas unit denominated in tokens"""
         # Simplified - in production, fetch actual ETH/token price
-        gas_cost_eth = gas_units * self.w3.eth.gas_price
-        
         # Assume 1 ETH = 2000 USDC for example
         eth_price = 2000 * 10**6  # 6 decimals for USDC
         
-        if token == '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48':  # USDC
-            return (gas_cost_eth * eth_price) // 10**18
+        if token == USDC_ADDRESS:
+            return gas_price * eth_price / 10**18
         else:
             # For other tokens, would need price feed
-            return 0
+            return 0.0
     
     def _get_cached_quote(self, key: str) -> Optional[RouteQuote]:
         """Get quote from cache if still valid"""
-        if key in self.quote_cache:
-            quote, timestamp = self.quote_cache[key]
-            if time.time() - timestamp < self.cache_duration:
-                return quote
-        return None
+        entry = self.quote_cache.get(key)
+        if entry is None:
+            return None
+        
+        quote, timestamp = entry
+        if time.time() - timestamp >= self.cache_duration:
+            del self.quote_cache[key]
+            return None
+        return quote
     
     def _cache_quote(self, key: str, quote: RouteQuote):
         """Cache quote with timestamp"""
-        self.quote_cache[key] = (quote, time.time())
-        
-        # Clean old entries
         current_time = time.time()
-        self.quote_cache = {
-            k: v for k, v in self.quote_cache.items()
-            if current_time - v[1] < self.cache_duration * 2
-        }
+        self.quote_cache[key] = (quote, current_time)
+        self.quote_cache.move_to_end(key)
+        
+        # Oldest entries sit at the front: pop only while expired or over capacity
+        while self.quote_cache:
+            _, (_, timestamp) = next(iter(self.quote_cache.items()))
+            if current_time - timestamp < self.cache_duration and len(self.quote_cache) <= self.quote_cache_size:
+                break
+            self.quote_cache.popitem(last=False)
     
     def _deploy_simulation_contract(self) -> str:
         """Deploy contract for complex simulations"""
@@ -633,6 +1183,13 @@ class SmartArbitrageFinder:
         self.pathfinder = pathfinder
         self.config = config
         self.w3 = pathfinder.w3
+        # Pairs are pruned only when their internal round trip loses more than
+        # fees alone would, i.e. the graph's prices lean against the trade.
+        # Aggregators can still profit on cycles the graph prices at a small
+        # loss, so 0.0 (internally profitable only) is far too strict a default.
+        self.min_cycle_log_rate = config.get('min_cycle_log_rate', _ROUND_TRIP_FEE_FLOOR)
+        self.default_amount = config.get('default_trade_amount', Web3.toWei(10, 'ether'))
+        self.min_profit_wei = config.get('min_profit_wei', Web3.toWei(0.01, 'ether'))
     
     async def find_arbitrage_with_routing(
         self,
@@ -640,48 +1197,102 @@ class SmartArbitrageFinder:
         amount: Optional[int] = None
     ) -> List[Dict]:
         """Find arbitrage opportunities using pathfinding"""
-        opportunities = []
-        
         if amount is None:
-            amount = self.config.get('default_trade_amount', Web3.toWei(10, 'ether'))
+            amount = self.default_amount
         
-        # Check all token pairs
-        for i, token_a in enumerate(tokens):
-            for token_b in tokens[i+1:]:
-                # Find best routes A->B and B->A
-                route_ab = await self.pathfinder.find_best_route(token_a, token_b, amount)
-                
-                if route_ab:
-                    # Use output from first route as input for reverse
-                    route_ba = await self.pathfinder.find_best_route(
-                        token_b,
-                        token_a,
-                        route_ab.amount_out
-                    )
-                    
-                    if route_ba:
-                        # Check profitability
-                        profit = route_ba.amount_out - amount
-                        
-                        # Calculate total gas
-                        total_gas = route_ab.gas_estimate + route_ba.gas_estimate
-                        gas_cost = total_gas * self.w3.eth.gas_price
-                        
-                        net_profit = profit - gas_cost
-                        
-                        if net_profit > self.config.get('min_profit_wei', Web3.toWei(0.01, 'ether')):
-                            opportunities.append({
-                                'token_a': token_a,
-                                'token_b': token_b,
-                                'route_ab': route_ab,
-                                'route_ba': route_ba,
-                                'profit': profit,
-                                'gas_cost': gas_cost,
-                                'net_profit': net_profit,
-                                'roi': (net_profit / amount) * 100
-                            })
+        candidates, routes_ba = await self._gather_routes(tokens, amount)
+        gas_price = await self.pathfinder.get_gas_price()
+        
+        # Ranking is pure CPU work, keep it off the event loop
+        profitable = await asyncio.to_thread(self._rank_opportunities, amount, candidates, routes_ba, gas_price)
+        
+        # Simulate both legs of every profitable cycle in one batch
+        sim_quotes = [leg for opp in profitable for leg in (opp['route_ab'], opp['route_ba'])]
+        sim_results = await self.pathfinder.simulate_many(sim_quotes)
+        
+        opportunities = [
+            opportunity for i, opportunity in enumerate(profitable)
+            if sim_results[2 * i] and sim_results[2 * i + 1]
+        ]
         
         # Sort by net profit
         opportunities.sort(key=lambda x: x['net_profit'], reverse=True)
         
-        return opportunities
\ No newline at end of file
+        return opportunities
+    
+    async def _gather_routes(self, tokens: List[str], amount: int) -> Tuple[List, List]:
+        """Resolve unsimulated A->B and B->A routes for every worthwhile token pair"""
+        idx_a, idx_b = np.triu_indices(len(tokens), k=1)
+        
+        # One all-pairs pass over the internal graph prices every round trip's
+        # marginal rate; pairs below min_cycle_log_rate are dropped before
+        # quoting. Pairs the graph can't route both ways still go to the
+        # aggregators.
+        log_rates = await self.pathfinder.internal_log_rates(tokens)
+        forward = log_rates[idx_a, idx_b]
+        backward = log_rates[idx_b, idx_a]
+        routable = np.isfinite(forward) & np.isfinite(backward)
+        keep = ~routable | (forward + backward > self.min_cycle_log_rate)
+        idx_a, idx_b = idx_a[keep], idx_b[keep]
+        
+        pairs = [(tokens[i], tokens[j]) for i, j in zip(idx_a, idx_b)]
+        
+        # Find best routes A->B for every pair concurrently, simulation deferred
+        routes_ab = await asyncio.gather(*[
+            self.pathfinder.find_best_route(token_a, token_b, amount, simulate=False)
+            for token_a, token_b in pairs
+        ])
+        
+        # Use output from first route as input for reverse
+        candidates = [
+            (pair, route_ab) for pair, route_ab in zip(pairs, routes_ab) if route_ab
+        ]
+        routes_ba = await asyncio.gather(*[
+            self.pathfinder.find_best_route(token_b, token_a, route_ab.amount_out, simulate=False)
+            for (token_a, token_b), route_ab in candidates
+        ])
+        
+        return candidates, routes_ba
+    
+    def _rank_opportunities(self, amount: int, candidates: List, routes_ba: List, gas_price: int) -> List[Dict]:
+        """Screen round trips for profit net of gas and build opportunity dicts"""
+        min_profit = self.min_profit_wei
+        
+        # Screen every cycle at once; float64 since wei amounts overflow int64
+        num_candidates = len(candidates)
+        has_return = np.fromiter((route_ba is not None for route_ba in routes_ba), dtype=bool, count=num_candidates)
+        returns = np.fromiter(
+            (route_ba.amount_out if route_ba else 0 for route_ba in routes_ba),
+            dtype=np.float64, count=num_candidates
+        )
+        total_gas = np.fromiter(
+            (route_ab.gas_estimate + (route_ba.gas_estimate if route_ba else 0)
+             for (_, route_ab), route_ba in zip(candidates, routes_ba)),
+            dtype=np.float64, count=num_candidates
+        )
+        net_profits = returns - amount - total_gas * gas_price
+        
+        # Only allocate opportunity dicts for cycles that clear the threshold,
+        # recomputing their figures with exact integer math
+        profitable = []
+        for k in np.flatnonzero(has_return & (net_profits > min_profit)):
+            (token_a, token_b), route_ab = candidates[k]
+            route_ba = routes_ba[k]
+            
+            profit = route_ba.amount_out - amount
+            gas_cost = (route_ab.gas_estimate + route_ba.gas_estimate) * gas_price
+            net_profit = profit - gas_cost
+            
+            if net_profit > min_profit:
+                profitable.append({
+                    'token_a': token_a,
+                    'token_b': token_b,
+                    'route_ab': route_ab,
+                    'route_ba': route_ba,
+                    'profit': profit,
+                    'gas_cost': gas_cost,
+                    'net_profit': net_profit,
+                    'roi': (net_profit / amount) * 100
+                })
+        
+        return profitable
@@ -19,6 +19,7 @@ from typing import Dict, List, Optional
 from decimal import Decimal
 import sys
 import os
+import numpy as np
 
 # Add agents directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../agents'))
@@ -53,6 +54,12 @@ class THEATOMMEVIntegration:
             'avg_execution_time': 0.0
         }
         
+        # Pre-drawn PCG64 samples for simulated execution outcomes
+        self._rng = np.random.default_rng()
+        self._rand_pool_size = 4096
+        self._rand_pool = self._rng.random(self._rand_pool_size)
+        self._rand_idx = 0
+        
         self.logger.info("🚀 THEATOM MEV Integration initialized")
     
     def _setup_logger(self) -> logging.Logger:
@@ -173,6 +180,15 @@ class THEATOMMEVIntegration:
         
         return theatom_bundle
 
+    def _next_random(self) -> float:
+        """Consume one sample from the pre-drawn pool, refilling on wrap"""
+        r = self._rand_pool[self._rand_idx]
+        self._rand_idx += 1
+        if self._rand_idx == self._rand_pool_size:
+            self._rand_pool = self._rng.random(self._rand_pool_size)
+            self._rand_idx = 0
+        return r
+    
     async def execute_opportunity(self, opportunity: ArbitrageOpportunity) -> Dict:
         """
         ⚡ Execute MEV opportunity through THEATOM system
@@ -200,8 +216,7 @@ class THEATOMMEVIntegration:
             
             # Simulate success/failure based on confidence score
             success_probability = opportunity.confidence_score
-            import random
-            execution_success = random.random() < success_probability
+            execution_success = self._next_random() < success_probability
             
             execution_time = time.time() - execution_start
             
@@ -215,7 +230,7 @@ class THEATOMMEVIntegration:
                     "profit": str(opportunity.net_profit),
                     "execution_time": execution_time,
                     "gas_used": bundle['gas_estimate'],
-                    "tx_hash": f"0x{''.join([hex(random.randint(0, 15))[2:] for _ in range(64)])}"
+                    "tx_hash": "0x" + self._rng.bytes(32).hex()
                 }
                 
                 self.logger.info(f"✅ MEV execution successful: {result['profit']} ETH profit")
@@ -5,19 +5,41 @@ import os
 import json
 import time
 import requests
+from collections import deque
 from datetime import datetime
 from dotenv import load_dotenv
+from signal_ring import SignalRing
+from strategy import snapshot_active_signals
 
 load_dotenv()
 
 ATOM_ENDPOINT = os.getenv("ATOM_ENDPOINT")
 
+_ring = None
+_ring_signals = deque()
+
+def drain_ring():
+    """Queue every signal the orchestrator pushed since the last poll"""
+    global _ring
+    if _ring is None:
+        try:
+            _ring = SignalRing.attach()
+        except FileNotFoundError:
+            return
+    while (payload := _ring.pop()) is not None:
+        _ring_signals.append(json.loads(payload))
+    # The producer removed this segment; attach to its replacement next poll
+    if _ring.closed:
+        _ring.close()
+        _ring = None
+
 def load_signal():
-    if not os.path.exists("signals.json"):
-        return None
-    with open("signals.json", "r") as f:
-        signals = json.load(f)
-        return signals[0] if signals else None
+    drain_ring()
+    # Ring signals are handed out once each, oldest first, then we fall back to the signal log
+    if _ring_signals:
+        return _ring_signals.popleft()
+    signals = snapshot_active_signals()
+    return signals[-1] if signals else None
 
 def is_valid(signal):
     if signal["status"] != "pending":
@@ -0,0 +1,109 @@
+"""
+Single-producer / single-consumer ring buffer in shared memory.
+
+The orchestrator pushes length-prefixed signal frames, ADOM pops them. The
+header holds two monotonically increasing byte counters: head (written only
+by the producer) and tail (written only by the consumer), so neither side
+needs a lock. The producer copies the frame in before publishing head, and
+sets a closed flag before unlinking so consumers know to re-attach.
+"""
+
+import struct
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+RING_NAME = "atom_signals"
+RING_SIZE = 1 << 20
+
+_HEADER = struct.Struct("<QQ")  # head, tail
+_CLOSED_OFFSET = _HEADER.size   # one byte, set by the producer on close
+_HEADER_SIZE = 64               # keep the data region cache-line aligned
+_LENGTH = struct.Struct("<I")
+
+class SignalRing:
+    """Lock-free SPSC byte ring over a named shared memory segment"""
+
+    def __init__(self, shm: SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = shm.size - _HEADER_SIZE
+
+    @classmethod
+    def create(cls, name: str = RING_NAME, size: int = RING_SIZE) -> "SignalRing":
+        """Create the segment (producer side), reusing a stale one if present.
+
+        A stale segment keeps its counters: frames are only published after
+        they are copied in, so it is consistent, and a consumer may still be
+        attached to it. There must only ever be one producer.
+        """
+        try:
+            shm = SharedMemory(name=name, create=True, size=size)
+            _HEADER.pack_into(shm.buf, 0, 0, 0)
+        except FileExistsError:
+            shm = SharedMemory(name=name)
+        shm.buf[_CLOSED_OFFSET] = 0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = RING_NAME) -> "SignalRing":
+        """Attach to an existing segment (consumer side)"""
+        try:
+            shm = SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before 3.13 the tracker would unlink the segment when we exit
+            shm = SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def _copy_in(self, pos: int, data: bytes):
+        offset = _HEADER_SIZE + pos % self.capacity
+        first = min(len(data), _HEADER_SIZE + self.capacity - offset)
+        self.buf[offset:offset + first] = data[:first]
+        if first < len(data):
+            self.buf[_HEADER_SIZE:_HEADER_SIZE + len(data) - first] = data[first:]
+
+    def _copy_out(self, pos: int, n: int) -> bytes:
+        offset = _HEADER_SIZE + pos % self.capacity
+        first = min(n, _HEADER_SIZE + self.capacity - offset)
+        data = bytes(self.buf[offset:offset + first])
+        if first < n:
+            data += bytes(self.buf[_HEADER_SIZE:_HEADER_SIZE + n - first])
+        return data
+
+    def push(self, payload: bytes) -> bool:
+        """Append one frame; False if the consumer has fallen too far behind"""
+        head, tail = _HEADER.unpack_from(self.buf, 0)
+        frame = _LENGTH.pack(len(payload)) + payload
+        if len(frame) > self.capacity - (head - tail):
+            return False
+
+        self._copy_in(head, frame)
+        struct.pack_into("<Q", self.buf, 0, head + len(frame))
+        return True
+
+    def pop(self) -> Optional[bytes]:
+        """Take the oldest committed frame, or None if the ring is empty"""
+        head, tail = _HEADER.unpack_from(self.buf, 0)
+        if tail == head:
+            return None
+
+        (length,) = _LENGTH.unpack(self._copy_out(tail, _LENGTH.size))
+        payload = self._copy_out(tail + _LENGTH.size, length)
+        struct.pack_into("<Q", self.buf, 8, tail + _LENGTH.size + length)
+        return payload
+
+    @property
+    def closed(self) -> bool:
+        """True once the producer has removed the segment"""
+        return self.buf[_CLOSED_OFFSET] != 0
+
+    def close(self):
+        """Detach, and remove the segment if we created it"""
+        if self.owner:
+            self.buf[_CLOSED_OFFSET] = 1
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,48 +1,162 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import atexit
+import collections
 import json
 import os
-from datetime import datetime, timedelta
-from uuid import uuid4
-from decimal import Decimal
+import queue
+import threading
+import time
+from datetime import datetime
+from uuid import UUID
+
+# Fixed-point scale for USD amounts and rates (8 decimals)
+SCALE = 10**8
+
+# Read once at import instead of re-parsing env vars per signal
+AMOUNT_IN = 1000 * SCALE
+FLASH_LOAN_FEE = round(float(os.getenv("FLASH_LOAN_FEE", "0.0009")) * SCALE)
+GAS_COST_USD = round(float(os.getenv("GAS_COST_USD", "1.0")) * SCALE)
+SLIPPAGE_BUFFER = 0.005  # 0.5%
+SIGNAL_TTL = 15  # seconds
+
+# Signal ids are drawn from a pool filled by one os.urandom call per 1024 ids
+UUID_BATCH = 1024
+_uuid_pool = collections.deque()
+
+def _next_uuid():
+    if not _uuid_pool:
+        entropy = os.urandom(16 * UUID_BATCH)
+        _uuid_pool.extend(
+            str(UUID(bytes=entropy[i:i + 16], version=4))
+            for i in range(0, len(entropy), 16)
+        )
+    return _uuid_pool.popleft()
+
+# Signals are appended as NDJSON by a background writer, flushed in batches
+SIGNALS_FILE = "signals.ndjson"
+FLUSH_EVERY = 100  # signals
+FLUSH_INTERVAL = 0.5  # seconds
+
+_signal_queue = queue.SimpleQueue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+def _signal_writer():
+    with open(SIGNALS_FILE, "a", buffering=1 << 16) as f:
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                line = _signal_queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                line = None
+
+            if line is _STOP:
+                f.flush()
+                os.fsync(f.fileno())
+                return
+            if line is not None:
+                f.write(line + "\n")
+                pending += 1
+
+            if pending and (pending >= FLUSH_EVERY or time.monotonic() - last_flush >= FLUSH_INTERVAL):
+                f.flush()
+                os.fsync(f.fileno())
+                pending = 0
+                last_flush = time.monotonic()
+
+def _stop_writer():
+    if _writer_thread is not None:
+        _signal_queue.put(_STOP)
+        _writer_thread.join()
+
+def _ensure_writer():
+    global _writer_thread
+    if _writer_thread is None:
+        with _writer_lock:
+            if _writer_thread is None:
+                _writer_thread = threading.Thread(target=_signal_writer, name="adom-signal-writer", daemon=True)
+                _writer_thread.start()
+                atexit.register(_stop_writer)
+
+# Per-log tail state: (inode, bytes consumed, pending signals not yet expired)
+_signal_tails = {}
+
+def snapshot_active_signals(path=SIGNALS_FILE):
+    """Return pending, unexpired signals from the NDJSON log as a list
+
+    Each call only parses lines appended since the last one, from a saved
+    offset; a rotated or truncated log is read again from the start.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _signal_tails.pop(path, None)
+        return []
+
+    inode, offset, active = _signal_tails.get(path, (None, 0, []))
+    if inode != st.st_ino or st.st_size < offset:
+        offset, active = 0, []
+
+    if st.st_size > offset:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # A line still being written is left for the next poll
+        end = data.rfind(b"\n") + 1
+        offset += end
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            signal = json.loads(line)
+            if signal["status"] == "pending":
+                active.append(signal)
+
+    now = datetime.utcnow()
+    active = [signal for signal in active if datetime.fromisoformat(signal["expires_at"]) > now]
+    _signal_tails[path] = (st.st_ino, offset, active)
+    return list(active)
 
 def generate_signal(buy_price, sell_price, buy_dex, sell_dex, token_in, token_out):
-    amount_in = Decimal("1000")
-    flash_loan_fee_pct = Decimal(os.getenv("FLASH_LOAN_FEE", "0.0009"))
-    gas_cost_usd = Decimal(os.getenv("GAS_COST_USD", "1.0"))
-    slippage_buffer = Decimal("0.005")  # 0.5%
+    buy_price = round(float(buy_price) * SCALE)
+    sell_price = round(float(sell_price) * SCALE)
+
+    gross_profit = (sell_price - buy_price) * AMOUNT_IN // SCALE
+    flash_fee = AMOUNT_IN * FLASH_LOAN_FEE // SCALE
+    net_profit = gross_profit - flash_fee - GAS_COST_USD
+    roi = net_profit / AMOUNT_IN
 
-    gross_profit = (sell_price - buy_price) * amount_in
-    flash_fee = amount_in * flash_loan_fee_pct
-    net_profit = gross_profit - flash_fee - gas_cost_usd
-    roi = net_profit / amount_in
+    # One clock read for both timestamps; naive UTC to match the agent's checks
+    now = time.time()
 
     signal = {
-        "id": f"adom-{uuid4()}",
-        "timestamp": datetime.utcnow().isoformat(),
-        "expires_at": (datetime.utcnow() + timedelta(seconds=15)).isoformat(),
+        "id": f"adom-{_next_uuid()}",
+        "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+        "expires_at": datetime.utcfromtimestamp(now + SIGNAL_TTL).isoformat(),
         "action": "execute",
         "token_in": token_in,
         "token_out": token_out,
-        "amount_in": float(amount_in),
+        "amount_in": AMOUNT_IN / SCALE,
         "amount_in_unit": "USDC",
-        "amount_out_est": float(sell_price * amount_in),
-        "buy_price": float(buy_price),
-        "sell_price": float(sell_price),
+        "amount_out_est": sell_price * AMOUNT_IN // SCALE / SCALE,
+        "buy_price": buy_price / SCALE,
+        "sell_price": sell_price / SCALE,
         "buy_dex": buy_dex,
         "sell_dex": sell_dex,
-        "flash_loan_fee_usd": float(flash_fee),
-        "gas_cost_usd": float(gas_cost_usd),
-        "net_profit_usd": float(net_profit),
-        "roi": float(roi),
-        "slippage_tolerance": float(slippage_buffer),
+        "flash_loan_fee_usd": flash_fee / SCALE,
+        "gas_cost_usd": GAS_COST_USD / SCALE,
+        "net_profit_usd": net_profit / SCALE,
+        "roi": roi,
+        "slippage_tolerance": SLIPPAGE_BUFFER,
         "confidence_score": 0.99,
         "status": "pending"
     }
 
-    with open("signals.json", "w") as f:
-        json.dump([signal], f, indent=2)
+    _ensure_writer()
+    _signal_queue.put(json.dumps(signal))
 
     print("[ADOM] ✅ Signal generated with UUID + expiry")
     return signal
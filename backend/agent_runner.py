@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+THEATOM - Agent pool worker functions
+
+These run inside the orchestrator's process pool. Each worker imports an agent
+module once and keeps it, so repeat calls skip interpreter startup, imports
+and JSON pipes.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+_agents: Dict[str, object] = {}
+
+def load_agent(agent_file: str):
+    """Import an agent script as a module, once per worker"""
+    agent = _agents.get(agent_file)
+    if agent is None:
+        spec = importlib.util.spec_from_file_location(Path(agent_file).stem, agent_file)
+        agent = importlib.util.module_from_spec(spec)
+        # Registered so numba can re-import the module when loading cached kernels
+        sys.modules[spec.name] = agent
+        spec.loader.exec_module(agent)
+        _agents[agent_file] = agent
+    return agent
+
+def preload_agents(agent_files: List[str]):
+    """Pool initializer: import every known agent up front"""
+    for agent_file in agent_files:
+        try:
+            load_agent(agent_file)
+        except Exception:
+            # Broken agents fail on their own calls, not at pool startup
+            pass
+
+def run_agent(agent_file: str, input_json: str) -> str:
+    """Call an agent's run() with a JSON string and return its JSON output"""
+    return load_agent(agent_file).run(input_json)
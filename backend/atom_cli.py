@@ -10,17 +10,20 @@ import os
 import sys
 from pathlib import Path
 
+try:
+    import uvloop
+    run = uvloop.run
+except ImportError:
+    run = asyncio.run
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Only the lightweight core is imported up front; the engine and module
+# stack (web3, httpx, ...) load in start() so --help, stop and status stay fast
 try:
     from core.config_manager import ConfigManager
-    from core.arbitrage_engine import ArbitrageEngine
     from core.logger import setup_logger
-    from modules.dex_monitor import DEXMonitor
-    from modules.pathfinding import PathfindingEngine
-    from modules.mev_protection import MEVProtection
-    from modules.cow_integration import CoWIntegration
 except ImportError as e:
     print(f"Import error: {e}")
     print("Please ensure all dependencies are installed and the project structure is correct.")
@@ -38,6 +41,12 @@ class AtomCLI:
         logger.info("🚀 Starting ATOM v2 Arbitrage System...")
         
         try:
+            from core.arbitrage_engine import ArbitrageEngine
+            from modules.dex_monitor import DEXMonitor
+            from modules.pathfinding import PathfindingEngine
+            from modules.mev_protection import MEVProtection
+            from modules.cow_integration import CoWIntegration
+            
             # Initialize components
             dex_monitor = DEXMonitor(self.config)
             pathfinding = PathfindingEngine(self.config)
@@ -75,7 +84,7 @@ class AtomCLI:
         logger.info("📊 ATOM v2 System Status")
         
         if self.engine:
-            status = await self.engine.get_status()
+            status = self.engine.get_status()
             print(json.dumps(status, indent=2))
         else:
             print("System is not running")
@@ -133,15 +142,15 @@ def main():
     
     try:
         if args.command == "start":
-            asyncio.run(cli.start(dry_run=args.dry_run))
+            run(cli.start(dry_run=args.dry_run))
         elif args.command == "stop":
-            asyncio.run(cli.stop())
+            run(cli.stop())
         elif args.command == "status":
-            asyncio.run(cli.status())
+            run(cli.status())
         elif args.command == "deploy":
-            asyncio.run(cli.deploy(network=args.network))
+            run(cli.deploy(network=args.network))
         elif args.command == "emergency-withdraw":
-            asyncio.run(cli.emergency_withdraw())
+            run(cli.emergency_withdraw())
     except KeyboardInterrupt:
         logger.info("👋 ATOM CLI interrupted by user")
     except Exception as e:
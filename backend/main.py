@@ -12,39 +12,141 @@ This is the main entry point that coordinates:
 import os
 import sys
 import json
+import queue
+import atexit
 import asyncio
-import subprocess
 import logging
+import time
+import itertools
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import aiofiles
+import httpx
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-import uvicorn
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/theatom.log'),
-        logging.StreamHandler()
-    ]
-)
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from adom.signal_ring import SignalRing
+from agent_runner import preload_agents, run_agent
+
+try:
+    import orjson
+    
+    dumps_compact = orjson.dumps
+    loads = orjson.loads
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    def dumps_compact(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+    
+    loads = json.loads
+    DefaultResponse = JSONResponse
+
+try:
+    import xxhash
+    
+    def content_hash(data: bytes) -> str:
+        return xxhash.xxh64_hexdigest(data)
+except ImportError:
+    import hashlib
+    
+    def content_hash(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def json_response(payload: Dict[str, Any]) -> Response:
+    """Serialize plain JSON payloads directly, skipping FastAPI's jsonable_encoder pass"""
+    return Response(content=dumps_compact(payload), media_type="application/json")
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison against our ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "max-age=1"})
+
+def cached_json_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "max-age=1"})
+
+# Logging: request coroutines only enqueue records, a listener thread formats
+# them and writes to a buffered, rotating file and stderr
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class ConsoleFormatter(logging.Formatter):
+    """Prefix console lines with a level icon; the log file stays plain ASCII"""
+    ICONS = {
+        logging.DEBUG: "🔧",
+        logging.INFO: "🧬",
+        logging.WARNING: "⚠️",
+        logging.ERROR: "❌",
+        logging.CRITICAL: "🔥"
+    }
+    
+    def format(self, record: logging.LogRecord) -> str:
+        return f"{self.ICONS.get(record.levelno, '')} {super().format(record)}"
+
+def setup_logging():
+    """Start the log listener and route the root logger to it, once per process.
+    
+    Not done at import: `python main.py` imports this file twice (as __main__
+    and as main for uvicorn), and spawned agent workers re-import it too.
+    """
+    root = logging.getLogger()
+    if any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+    
+    os.makedirs("logs", exist_ok=True)
+    file_handler = RotatingFileHandler('logs/theatom.log', maxBytes=10 * 1024 * 1024, backupCount=5)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ConsoleFormatter(LOG_FORMAT))
+    
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
 logger = logging.getLogger("THEATOM")
 
+# Timestamps are reused within the same millisecond
+_now_cached = (0.0, "")
+
+def now_iso() -> str:
+    """Current local time as ISO 8601, cached for 1 ms"""
+    global _now_cached
+    t = time.time()
+    if t - _now_cached[0] < 0.001:
+        return _now_cached[1]
+    
+    stamp = datetime.fromtimestamp(t).isoformat()
+    _now_cached = (t, stamp)
+    return stamp
+
 # Initialize FastAPI app
 app = FastAPI(
     title="THEATOM - Advanced Efficient Optimized Network",
     description="Unified arbitrage orchestration platform",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=DefaultResponse
 )
 
 # Add CORS middleware
@@ -57,31 +159,270 @@ app.add_middleware(
 )
 
 # Global state
-system_state = {
-    "status": "initializing",
-    "adom_status": "stopped",
-    "atom_status": "stopped",
-    "agents_status": {},
-    "last_update": datetime.now().isoformat(),
-    "total_trades": 0,
-    "total_profit": 0.0,
-    "active_opportunities": []
-}
+@dataclass(slots=True)
+class SystemState:
+    """Process-wide orchestrator state"""
+    status: str = "initializing"
+    adom_status: str = "stopped"
+    atom_status: str = "stopped"
+    agents_status: Dict[str, str] = field(default_factory=dict)
+    last_update: str = field(default_factory=now_iso)
+    total_trades: int = 0
+    total_profit: float = 0.0
+    active_opportunities: List[Dict[str, Any]] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict view for JSON responses"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+system_state = SystemState()
+
+# Local trade ids come from a counter, so there's no read-modify-write on the state
+_trade_counter = itertools.count(1)
+
+# Environment summary for /api/status, frozen at startup once .env is loaded
+ENV: Dict[str, str] = {}
+
+def load_status_env() -> Dict[str, str]:
+    """Read the environment values reported by /api/status"""
+    return {
+        "network": os.getenv("NETWORK", "base_sepolia"),
+        "rpc_url": os.getenv("BASE_SEPOLIA_RPC_URL", "")[:50] + "...",
+        "contract_address": os.getenv("BASE_SEPOLIA_CONTRACT_ADDRESS", ""),
+        "max_gas_cost": os.getenv("MAX_GAS_COST_USD", "20")
+    }
+
+# With several uvicorn workers each process has its own system_state, so the
+# trade counter, opportunities, run state and agent statuses are shared through
+# Redis when REDIS_URL is reachable. A single worker without Redis keeps them local.
+redis_client = None
+SHARED_KEY_PREFIX = "theatom:"
+RUN_STATE_FIELDS = ("status", "adom_status", "atom_status", "last_update")
+SYSTEM_LOCK_TTL_MS = 30_000
+SHARED_STATE_REFRESH = 0.5  # seconds
+_shared_state_task: Optional[asyncio.Task] = None
+
+# Deletes the lock only if this worker still holds it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Shared outbound HTTP client, opened at startup and closed at shutdown
+http_client: Optional[httpx.AsyncClient] = None
+
+# Trade signals go to ADOM through a shared memory ring; the NDJSON log is the
+# fallback when the ring can't be created or ADOM isn't draining it. The ring is
+# single-producer, so it is only used when one uvicorn worker owns it.
+signal_ring: Optional[SignalRing] = None
+ADOM_SIGNALS_FILE = (Path(__file__).parent / "adom" / "signals.ndjson").resolve()
+
+async def connect_shared_state():
+    """Connect to Redis for cross-worker state, if configured"""
+    global redis_client
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return
+    
+    try:
+        import redis.asyncio as redis
+        client = redis.from_url(redis_url, decode_responses=True)
+        await client.ping()
+        redis_client = client
+        logger.info("Shared state backed by Redis")
+    except Exception as e:
+        logger.warning("Redis unavailable, state is per-worker: %s", e)
+
+async def sync_shared_state():
+    """Refresh the shared fields of system_state from Redis"""
+    if redis_client is None:
+        return
+    
+    # One round trip for every shared key
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.mget(
+        SHARED_KEY_PREFIX + "total_trades",
+        SHARED_KEY_PREFIX + "active_opportunities",
+        *(SHARED_KEY_PREFIX + name for name in RUN_STATE_FIELDS)
+    )
+    pipe.hgetall(SHARED_KEY_PREFIX + "agents_status")
+    (total_trades, opportunities, *run_state), agents_status = await pipe.execute()
+    
+    system_state.total_trades = int(total_trades or 0)
+    system_state.active_opportunities = json.loads(opportunities) if opportunities else []
+    system_state.agents_status = agents_status
+    for name, value in zip(RUN_STATE_FIELDS, run_state):
+        if value is not None:
+            setattr(system_state, name, value)
+
+async def refresh_shared_state_periodically(interval: float):
+    """Pull other workers' updates in the background so requests never wait on Redis"""
+    while True:
+        try:
+            await sync_shared_state()
+        except Exception as e:
+            logger.warning("Shared state refresh failed, serving last known state: %s", e)
+        await asyncio.sleep(interval)
+
+async def publish_run_state():
+    """Publish system and component status to all workers"""
+    system_state.last_update = now_iso()
+    if redis_client is not None:
+        await redis_client.mset({
+            SHARED_KEY_PREFIX + name: getattr(system_state, name)
+            for name in RUN_STATE_FIELDS
+        })
+
+# Start and stop run one at a time, so concurrent starts can't double-spawn;
+# with Redis the lock is also held across workers
+_system_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def system_lock():
+    """Serialise start and stop across workers; 409 while another holds it"""
+    async with _system_lock:
+        if redis_client is None:
+            yield
+            return
+        
+        key, token = SHARED_KEY_PREFIX + "system_lock", uuid.uuid4().hex
+        if not await redis_client.set(key, token, nx=True, px=SYSTEM_LOCK_TTL_MS):
+            raise HTTPException(status_code=409, detail="System start/stop already in progress")
+        try:
+            await sync_shared_state()
+            yield
+        finally:
+            await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+async def record_trade() -> int:
+    """Count a trade across all workers and return the new total"""
+    if redis_client is None:
+        system_state.total_trades = next(_trade_counter)
+    else:
+        system_state.total_trades = await redis_client.incr(SHARED_KEY_PREFIX + "total_trades")
+    return system_state.total_trades
+
+async def set_active_opportunities(opportunities: List[Dict[str, Any]]):
+    """Publish the latest scan results to all workers"""
+    system_state.active_opportunities = opportunities
+    if redis_client is not None:
+        await redis_client.set(SHARED_KEY_PREFIX + "active_opportunities", json.dumps(opportunities))
+
+# Agent scripts, indexed at startup and re-scanned in the background
+AGENTS_DIR = (Path(__file__).parent.parent / "services" / "agents").resolve()
+AGENT_INDEX_REFRESH = 60  # seconds
+_AGENT_INDEX: Dict[str, Path] = {}
+_agent_index_task: Optional[asyncio.Task] = None
+_agent_index_version = 0
+_agents_status_cache: tuple = (None, b"", "")
+
+def scan_agent_index() -> Dict[str, Path]:
+    """Map agent name to script path for every agent_*.py file"""
+    return {
+        agent_file.stem.replace("agent_", ""): agent_file
+        for agent_file in AGENTS_DIR.glob("agent_*.py")
+    }
+
+async def refresh_agent_index_periodically(interval: float):
+    """Re-scan the agents directory so new agents appear without blocking requests"""
+    global _AGENT_INDEX, _agent_index_version
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            index = await asyncio.to_thread(scan_agent_index)
+            if index != _AGENT_INDEX:
+                _AGENT_INDEX = index
+                _agent_index_version += 1
+        except Exception as e:
+            logger.warning("Agent index refresh failed, keeping previous index: %s", e)
+
+# Agents run in a persistent process pool; each worker imports an agent once.
+# The semaphore sheds load with 503 rather than queueing without bound.
+# Every uvicorn worker has its own pool, so the cores are split between them.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "0")) or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+_agent_pool: Optional[ProcessPoolExecutor] = None
+_agent_slots = asyncio.Semaphore(AGENT_POOL_SIZE)
+
+def start_agent_pool():
+    """Start the agent pool, preloading every indexed agent in each worker"""
+    global _agent_pool
+    _agent_pool = ProcessPoolExecutor(
+        max_workers=AGENT_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=preload_agents,
+        initargs=([str(agent_file) for agent_file in _AGENT_INDEX.values()],)
+    )
+
+def stop_agent_pool():
+    """Shut the agent pool down without waiting on running agents"""
+    if _agent_pool is not None:
+        _agent_pool.shutdown(wait=False, cancel_futures=True)
+
+def restart_agent_pool(broken: ProcessPoolExecutor):
+    """Replace a pool that lost a worker; later callers of the same pool are no-ops"""
+    if _agent_pool is broken:
+        stop_agent_pool()
+        start_agent_pool()
+
+async def set_agent_status(agent_name: str, status: str):
+    """Publish an agent's status to all workers"""
+    system_state.agents_status[agent_name] = status
+    if redis_client is not None:
+        await redis_client.hset(SHARED_KEY_PREFIX + "agents_status", agent_name, status)
+
+# Trade requests are the hottest POST; msgspec decodes and validates them in
+# one pass, with the Pydantic model as the fallback
+try:
+    import msgspec
+    
+    class TradeRequest(msgspec.Struct, frozen=True):
+        pair: str
+        amount: float
+        dex_a: str
+        dex_b: str
+        max_slippage: float = 0.02
+        gas_limit: Optional[int] = None
+    
+    _trade_decoder = msgspec.json.Decoder(TradeRequest)
+    
+    def decode_trade_request(body: bytes) -> TradeRequest:
+        try:
+            return _trade_decoder.decode(body)
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+except ImportError:
+    class TradeRequest(BaseModel):
+        model_config = ConfigDict(frozen=True)
+        
+        pair: str
+        amount: float
+        dex_a: str
+        dex_b: str
+        max_slippage: float = 0.02
+        gas_limit: Optional[int] = None
+    
+    def decode_trade_request(body: bytes) -> TradeRequest:
+        try:
+            return TradeRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
 
 # Pydantic models
-class TradeRequest(BaseModel):
-    pair: str
-    amount: float
-    dex_a: str
-    dex_b: str
-    max_slippage: float = 0.02
-    gas_limit: Optional[int] = None
 
 class OpportunityRequest(BaseModel):
+    # Frozen so the shared default below can't be mutated by a handler
+    model_config = ConfigDict(frozen=True)
+    
     pairs: List[str] = ["ETH/USDC", "WBTC/ETH", "USDC/USDT"]
     min_profit: float = 10.0
     max_gas_price: int = 50
 
+# Scans without a body all use the same parameters, so validate them once
+DEFAULT_OPPORTUNITY_REQUEST = OpportunityRequest()
+
 class AgentRequest(BaseModel):
     agent_name: str
     input_data: Dict[str, Any]
@@ -93,52 +434,56 @@ class AgentRequest(BaseModel):
 @app.get("/")
 async def root():
     """Root endpoint - system status"""
-    return {
+    return json_response({
         "message": "🧬 THEATOM - Advanced Efficient Optimized Network",
-        "status": system_state["status"],
+        "status": system_state.status,
         "version": "2.0.0",
-        "timestamp": datetime.now().isoformat()
-    }
+        "timestamp": now_iso()
+    })
 
 @app.get("/api/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
-    return {
+    # Weak ETag over the state fields; the timestamp alone doesn't make it stale
+    health = {
         "status": "healthy",
-        "adom_status": system_state["adom_status"],
-        "atom_status": system_state["atom_status"],
-        "agents_count": len(system_state["agents_status"]),
-        "uptime": datetime.now().isoformat(),
+        "adom_status": system_state.adom_status,
+        "atom_status": system_state.atom_status,
+        "agents_count": len(system_state.agents_status),
         "system_health": "operational"
     }
+    etag = f'W/"{content_hash(dumps_compact(health))}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    health["uptime"] = now_iso()
+    return cached_json_response(dumps_compact(health), etag)
 
 @app.get("/api/status")
 async def get_system_status():
     """Get comprehensive system status"""
-    return {
-        "system": system_state,
-        "environment": {
-            "network": os.getenv("NETWORK", "base_sepolia"),
-            "rpc_url": os.getenv("BASE_SEPOLIA_RPC_URL", "")[:50] + "...",
-            "contract_address": os.getenv("BASE_SEPOLIA_CONTRACT_ADDRESS", ""),
-            "max_gas_cost": os.getenv("MAX_GAS_COST_USD", "20")
-        },
+    return json_response({
+        "system": system_state.to_dict(),
+        "environment": ENV,
         "performance": {
-            "total_trades": system_state["total_trades"],
-            "total_profit": system_state["total_profit"],
-            "active_opportunities": len(system_state["active_opportunities"])
+            "total_trades": system_state.total_trades,
+            "total_profit": system_state.total_profit,
+            "active_opportunities": len(system_state.active_opportunities)
         }
-    }
+    })
 
 # ============================================================================
 # TRADE EXECUTION ENDPOINTS
 # ============================================================================
 
 @app.post("/api/execute-trade")
-async def execute_trade(trade_request: TradeRequest, background_tasks: BackgroundTasks):
+async def execute_trade(request: Request, background_tasks: BackgroundTasks):
     """Execute arbitrage trade through ADOM"""
+    trade_request = decode_trade_request(await request.body())
+    
     try:
-        logger.info(f"🚀 Executing trade: {trade_request.pair} on {trade_request.dex_a} -> {trade_request.dex_b}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Executing trade: %s on %s -> %s", trade_request.pair, trade_request.dex_a, trade_request.dex_b)
         
         # Prepare trade data for ADOM
         trade_data = {
@@ -148,43 +493,48 @@ async def execute_trade(trade_request: TradeRequest, background_tasks: Backgroun
             "dex_b": trade_request.dex_b,
             "max_slippage": trade_request.max_slippage,
             "gas_limit": trade_request.gas_limit,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
         
         # Execute trade in background
         background_tasks.add_task(execute_adom_trade, trade_data)
         
         # Update system state
-        system_state["total_trades"] += 1
-        system_state["last_update"] = datetime.now().isoformat()
+        total_trades = await record_trade()
+        system_state.last_update = now_iso()
         
-        return {
+        return json_response({
             "status": "trade_initiated",
-            "trade_id": f"trade_{system_state['total_trades']}",
+            "trade_id": f"trade_{total_trades}",
             "message": "Trade execution started",
             "trade_data": trade_data
-        }
+        })
         
     except Exception as e:
-        logger.error(f"❌ Trade execution failed: {e}")
+        logger.error("Trade execution failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/scan-opportunities")
-async def scan_opportunities(request: OpportunityRequest = None):
+async def scan_opportunities(request: OpportunityRequest = None, stream: bool = False):
     """Scan for arbitrage opportunities using ATOM"""
     try:
-        logger.info("🔍 Scanning for arbitrage opportunities...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Scanning for arbitrage opportunities...")
         
         # Default request if none provided
         if not request:
-            request = OpportunityRequest()
+            request = DEFAULT_OPPORTUNITY_REQUEST
+        
+        # Stream one NDJSON line per opportunity as ATOM finds them
+        if stream:
+            return StreamingResponse(stream_scan(request), media_type="application/x-ndjson")
         
         # Call ATOM scanner
         opportunities = await scan_with_atom(request)
         
         # Update system state
-        system_state["active_opportunities"] = opportunities
-        system_state["last_update"] = datetime.now().isoformat()
+        await set_active_opportunities(opportunities)
+        system_state.last_update = now_iso()
         
         return {
             "status": "scan_complete",
@@ -198,7 +548,7 @@ async def scan_opportunities(request: OpportunityRequest = None):
         }
         
     except Exception as e:
-        logger.error(f"❌ Opportunity scan failed: {e}")
+        logger.error("Opportunity scan failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # ============================================================================
@@ -206,59 +556,73 @@ async def scan_opportunities(request: OpportunityRequest = None):
 # ============================================================================
 
 @app.get("/api/agents/status")
-async def get_agents_status():
+async def get_agents_status(request: Request):
     """Get status of all Claude-style agents"""
     try:
-        agents_dir = Path(__file__).parent.parent / "services" / "agents"
-        available_agents = []
-        
-        for agent_file in agents_dir.glob("agent_*.py"):
-            agent_name = agent_file.stem.replace("agent_", "")
-            available_agents.append({
-                "name": agent_name,
-                "file": str(agent_file),
-                "status": system_state["agents_status"].get(agent_name, "available")
+        # Reserialize only when the agent index or any agent status changed
+        global _agents_status_cache
+        cache_key = (_agent_index_version, tuple(system_state.agents_status.items()))
+        if _agents_status_cache[0] != cache_key:
+            available_agents = []
+            
+            for agent_name, agent_file in _AGENT_INDEX.items():
+                available_agents.append({
+                    "name": agent_name,
+                    "file": str(agent_file),
+                    "status": system_state.agents_status.get(agent_name, "available")
+                })
+            
+            body = dumps_compact({
+                "total_agents": len(available_agents),
+                "available_agents": available_agents,
+                "active_agents": [name for name, status in system_state.agents_status.items() if status == "active"]
             })
+            _agents_status_cache = (cache_key, body, f'"{content_hash(body)}"')
         
-        return {
-            "total_agents": len(available_agents),
-            "available_agents": available_agents,
-            "active_agents": [name for name, status in system_state["agents_status"].items() if status == "active"]
-        }
+        _, body, etag = _agents_status_cache
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return cached_json_response(body, etag)
         
     except Exception as e:
-        logger.error(f"❌ Agent status check failed: {e}")
+        logger.error("Agent status check failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/agents/execute")
 async def execute_agent(agent_request: AgentRequest):
     """Execute a Claude-style agent"""
+    if _agent_slots.locked():
+        raise HTTPException(status_code=503, detail="All agent workers are busy")
+    
     try:
-        logger.info(f"🤖 Executing agent: {agent_request.agent_name}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Executing agent: %s", agent_request.agent_name)
         
         # Find agent file
-        agents_dir = Path(__file__).parent.parent / "services" / "agents"
-        agent_file = agents_dir / f"agent_{agent_request.agent_name}.py"
+        agent_file = _AGENT_INDEX.get(agent_request.agent_name)
         
-        if not agent_file.exists():
+        if agent_file is None:
             raise HTTPException(status_code=404, detail=f"Agent {agent_request.agent_name} not found")
         
         # Execute agent
-        result = await execute_claude_agent(str(agent_file), agent_request.input_data)
+        async with _agent_slots:
+            result = await execute_claude_agent(agent_request.agent_name, agent_file, agent_request.input_data)
         
         # Update agent status
-        system_state["agents_status"][agent_request.agent_name] = "completed"
-        system_state["last_update"] = datetime.now().isoformat()
+        await set_agent_status(agent_request.agent_name, "completed")
+        system_state.last_update = now_iso()
         
         return {
             "status": "agent_executed",
             "agent_name": agent_request.agent_name,
             "result": result,
-            "execution_time": datetime.now().isoformat()
+            "execution_time": now_iso()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Agent execution failed: {e}")
+        logger.error("Agent execution failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # ============================================================================
@@ -268,58 +632,68 @@ async def execute_agent(agent_request: AgentRequest):
 @app.post("/api/system/start")
 async def start_system():
     """Start the entire THEATOM system"""
-    try:
-        logger.info("🚀 Starting THEATOM system...")
-        
-        # Start ADOM
-        await start_adom()
-        
-        # Start ATOM
-        await start_atom()
-        
-        # Update system state
-        system_state["status"] = "running"
-        system_state["last_update"] = datetime.now().isoformat()
-        
-        return {
-            "status": "system_started",
-            "message": "THEATOM system is now running",
-            "components": {
-                "adom": system_state["adom_status"],
-                "atom": system_state["atom_status"]
+    async with system_lock():
+        if system_state.status == "running":
+            return {
+                "status": "already_running",
+                "message": "THEATOM system is already running",
+                "components": {
+                    "adom": system_state.adom_status,
+                    "atom": system_state.atom_status
+                }
             }
-        }
         
-    except Exception as e:
-        logger.error(f"❌ System start failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            logger.info("Starting THEATOM system...")
+            
+            # Start ADOM and ATOM concurrently; they don't depend on each other
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(start_adom())
+                tg.create_task(start_atom())
+            
+            # Update system state
+            system_state.status = "running"
+            await publish_run_state()
+            
+            return {
+                "status": "system_started",
+                "message": "THEATOM system is now running",
+                "components": {
+                    "adom": system_state.adom_status,
+                    "atom": system_state.atom_status
+                }
+            }
+            
+        except Exception as e:
+            logger.error("System start failed: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/system/stop")
 async def stop_system():
     """Stop the entire THEATOM system"""
-    try:
-        logger.info("🛑 Stopping THEATOM system...")
-        
-        # Stop ADOM
-        await stop_adom()
-        
-        # Stop ATOM
-        await stop_atom()
-        
-        # Update system state
-        system_state["status"] = "stopped"
-        system_state["adom_status"] = "stopped"
-        system_state["atom_status"] = "stopped"
-        system_state["last_update"] = datetime.now().isoformat()
-        
-        return {
-            "status": "system_stopped",
-            "message": "THEATOM system has been stopped"
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ System stop failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    async with system_lock():
+        try:
+            logger.info("Stopping THEATOM system...")
+            
+            # Stop ADOM and ATOM concurrently
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(stop_adom())
+                tg.create_task(stop_atom())
+            
+            # Update system state
+            system_state.status = "stopped"
+            system_state.adom_status = "stopped"
+            system_state.atom_status = "stopped"
+            await publish_run_state()
+            
+            return {
+                "status": "system_stopped",
+                "message": "THEATOM system has been stopped"
+            }
+            
+        except Exception as e:
+            logger.error("System stop failed: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
 
 # ============================================================================
 # BACKGROUND TASKS AND UTILITIES
@@ -328,124 +702,175 @@ async def stop_system():
 async def execute_adom_trade(trade_data: Dict[str, Any]):
     """Execute trade using ADOM (Python arbitrage engine)"""
     try:
-        adom_dir = Path(__file__).parent / "adom"
-        
         # Create signal file for ADOM
+        created_at = now_iso()
         signal_data = {
-            "id": f"signal_{datetime.now().timestamp()}",
+            "id": f"signal_{time.time()}",
             "status": "pending",
             "pair": trade_data["pair"],
             "amount": trade_data["amount"],
             "dex_a": trade_data["dex_a"],
             "dex_b": trade_data["dex_b"],
             "max_slippage": trade_data["max_slippage"],
-            "expires_at": datetime.now().isoformat(),
-            "created_at": datetime.now().isoformat()
+            "expires_at": created_at,
+            "created_at": created_at
         }
         
-        # Write signal to ADOM
-        signals_file = adom_dir / "signals.json"
-        with open(signals_file, 'w') as f:
-            json.dump([signal_data], f, indent=2)
+        # Hand the signal to ADOM; append rather than overwrite so pending signals survive
+        payload = dumps_compact(signal_data)
+        if signal_ring is None or not signal_ring.push(payload):
+            async with aiofiles.open(ADOM_SIGNALS_FILE, 'ab') as f:
+                await f.write(payload + b"\n")
         
-        logger.info(f"✅ Trade signal sent to ADOM: {signal_data['id']}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Trade signal sent to ADOM: %s", signal_data['id'])
         
     except Exception as e:
-        logger.error(f"❌ ADOM trade execution failed: {e}")
+        logger.error("ADOM trade execution failed: %s", e)
+
+# Identical scans already running, keyed by their serialized parameters
+_scans_inflight: Dict[bytes, asyncio.Future] = {}
+
+async def iter_atom_opportunities(request: OpportunityRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Yield opportunities from ATOM (Node.js bot) as they arrive"""
+    params = request.model_dump()
+    atom_socket = os.getenv("ATOM_SOCKET")
+    atom_scan_url = os.getenv("ATOM_SCAN_URL")
+    
+    # Local bridge: one JSON request line in, NDJSON opportunities out until EOF
+    if atom_socket:
+        reader, writer = await asyncio.open_unix_connection(atom_socket)
+        try:
+            writer.write(dumps_compact(params) + b"\n")
+            await writer.drain()
+            async for line in reader:
+                if line.strip():
+                    yield loads(line)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return
+    
+    # HTTP scanner, streamed line by line over the shared client
+    if atom_scan_url:
+        async with http_client.stream("POST", atom_scan_url, json=params) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield loads(line)
+        return
+    
+    # Mock opportunities when no ATOM endpoint is configured
+    yield {
+        "pair": "ETH/USDC",
+        "dex_a": "uniswap_v3",
+        "dex_b": "sushiswap",
+        "price_a": 2000.5,
+        "price_b": 2005.2,
+        "profit_potential": 47.0,
+        "gas_cost": 15.0,
+        "net_profit": 32.0,
+        "confidence": 0.85
+    }
 
 async def scan_with_atom(request: OpportunityRequest) -> List[Dict[str, Any]]:
+    """Scan for opportunities, sharing one in-flight scan between identical requests"""
+    key = dumps_compact(request.model_dump())
+    task = _scans_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run_atom_scan(request))
+        _scans_inflight[key] = task
+        task.add_done_callback(lambda _: _scans_inflight.pop(key, None))
+    
+    # Shielded so one caller disconnecting doesn't cancel the others' scan
+    return await asyncio.shield(task)
+
+async def run_atom_scan(request: OpportunityRequest) -> List[Dict[str, Any]]:
     """Scan for opportunities using ATOM (Node.js bot)"""
     try:
-        # Mock opportunities for now - in real implementation, call ATOM
-        opportunities = [
-            {
-                "pair": "ETH/USDC",
-                "dex_a": "uniswap_v3",
-                "dex_b": "sushiswap",
-                "price_a": 2000.5,
-                "price_b": 2005.2,
-                "profit_potential": 47.0,
-                "gas_cost": 15.0,
-                "net_profit": 32.0,
-                "confidence": 0.85
-            }
-        ]
-        
-        return opportunities
+        return [opportunity async for opportunity in iter_atom_opportunities(request)]
         
     except Exception as e:
-        logger.error(f"❌ ATOM scan failed: {e}")
+        logger.error("ATOM scan failed: %s", e)
         return []
 
-async def execute_claude_agent(agent_file: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+async def stream_scan(request: OpportunityRequest) -> AsyncIterator[bytes]:
+    """NDJSON body for streamed scans; records the full result once ATOM finishes"""
+    opportunities = []
+    try:
+        async for opportunity in iter_atom_opportunities(request):
+            opportunities.append(opportunity)
+            yield dumps_compact(opportunity) + b"\n"
+    except Exception as e:
+        logger.error("ATOM scan failed: %s", e)
+        yield dumps_compact({"error": str(e)}) + b"\n"
+    
+    await set_active_opportunities(opportunities)
+    system_state.last_update = now_iso()
+
+async def execute_claude_agent(agent_name: str, agent_file: Path, input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Execute a Claude-style agent"""
+    pool = _agent_pool
     try:
-        # Prepare input JSON
-        input_json = json.dumps(input_data)
-        
-        # Execute Python agent
-        process = await asyncio.create_subprocess_exec(
-            sys.executable, agent_file,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+        output = await asyncio.get_running_loop().run_in_executor(
+            pool, run_agent, str(agent_file), json.dumps(input_data)
         )
         
-        stdout, stderr = await process.communicate(input_json.encode())
-        
-        if process.returncode == 0:
-            result = json.loads(stdout.decode())
-            return result
-        else:
-            raise Exception(f"Agent execution failed: {stderr.decode()}")
+        return loads(output)
+    
+    except BrokenProcessPool as e:
+        # A crashed or exiting agent breaks the whole pool; rebuild it for later calls
+        logger.error("Agent pool broke running %s, restarting it: %s", agent_name, e)
+        restart_agent_pool(pool)
+        return {"error": f"Agent worker crashed: {e}"}
             
     except Exception as e:
-        logger.error(f"❌ Claude agent execution failed: {e}")
+        logger.error("Claude agent execution failed: %s", e)
         return {"error": str(e)}
 
 async def start_adom():
     """Start ADOM (Python arbitrage engine)"""
     try:
-        system_state["adom_status"] = "starting"
+        system_state.adom_status = "starting"
         # In real implementation, start ADOM process
         await asyncio.sleep(1)  # Simulate startup time
-        system_state["adom_status"] = "running"
-        logger.info("✅ ADOM started successfully")
+        system_state.adom_status = "running"
+        logger.info("ADOM started successfully")
     except Exception as e:
-        system_state["adom_status"] = "error"
-        logger.error(f"❌ ADOM start failed: {e}")
+        system_state.adom_status = "error"
+        logger.error("ADOM start failed: %s", e)
 
 async def start_atom():
     """Start ATOM (Node.js bot)"""
     try:
-        system_state["atom_status"] = "starting"
+        system_state.atom_status = "starting"
         # In real implementation, start ATOM process
         await asyncio.sleep(1)  # Simulate startup time
-        system_state["atom_status"] = "running"
-        logger.info("✅ ATOM started successfully")
+        system_state.atom_status = "running"
+        logger.info("ATOM started successfully")
     except Exception as e:
-        system_state["atom_status"] = "error"
-        logger.error(f"❌ ATOM start failed: {e}")
+        system_state.atom_status = "error"
+        logger.error("ATOM start failed: %s", e)
 
 async def stop_adom():
     """Stop ADOM"""
     try:
-        system_state["adom_status"] = "stopping"
+        system_state.adom_status = "stopping"
         await asyncio.sleep(0.5)
-        system_state["adom_status"] = "stopped"
-        logger.info("✅ ADOM stopped successfully")
+        system_state.adom_status = "stopped"
+        logger.info("ADOM stopped successfully")
     except Exception as e:
-        logger.error(f"❌ ADOM stop failed: {e}")
+        logger.error("ADOM stop failed: %s", e)
 
 async def stop_atom():
     """Stop ATOM"""
     try:
-        system_state["atom_status"] = "stopping"
+        system_state.atom_status = "stopping"
         await asyncio.sleep(0.5)
-        system_state["atom_status"] = "stopped"
-        logger.info("✅ ATOM stopped successfully")
+        system_state.atom_status = "stopped"
+        logger.info("ATOM stopped successfully")
     except Exception as e:
-        logger.error(f"❌ ATOM stop failed: {e}")
+        logger.error("ATOM stop failed: %s", e)
 
 # ============================================================================
 # STARTUP
@@ -454,24 +879,86 @@ async def stop_atom():
 @app.on_event("startup")
 async def startup_event():
     """Initialize THEATOM on startup"""
-    logger.info("🧬 THEATOM - Advanced Efficient Optimized Network Starting...")
+    # Load environment variables here rather than at import, so tooling that
+    # imports this module without serving doesn't parse .env
+    from dotenv import load_dotenv
+    load_dotenv()
+    ENV.update(load_status_env())
+    setup_logging()
+    
+    logger.info("THEATOM - Advanced Efficient Optimized Network Starting...")
     logger.info("=" * 60)
     
-    # Create logs directory
-    os.makedirs("logs", exist_ok=True)
+    # Run new tasks eagerly until their first real await (Python 3.12+)
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+    
+    await connect_shared_state()
     
-    # Initialize system state
-    system_state["status"] = "ready"
-    system_state["last_update"] = datetime.now().isoformat()
+    # Shared state is refreshed on a timer rather than per request
+    global _shared_state_task
+    if redis_client is not None:
+        _shared_state_task = asyncio.create_task(refresh_shared_state_periodically(SHARED_STATE_REFRESH))
     
-    logger.info("✅ THEATOM FastAPI orchestration layer ready")
+    # One pooled client for all outbound HTTP; never block the loop with requests
+    global http_client
+    http_client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=3.0))
+    
+    global signal_ring
+    if WEB_CONCURRENCY > 1:
+        logger.info("Several workers, handing signals to ADOM through signals.ndjson")
+    else:
+        try:
+            signal_ring = SignalRing.create()
+        except OSError as e:
+            logger.warning("Signal ring unavailable, using signals.ndjson: %s", e)
+    
+    # Index agent scripts once; a background task keeps the index fresh
+    global _AGENT_INDEX, _agent_index_task
+    _AGENT_INDEX = scan_agent_index()
+    _agent_index_task = asyncio.create_task(refresh_agent_index_periodically(AGENT_INDEX_REFRESH))
+    
+    # Workers import every agent on start, so first requests skip that cost
+    start_agent_pool()
+    
+    # Initialize system state; a worker joining a running system keeps its state
+    system_state.status = "ready"
+    system_state.last_update = now_iso()
+    if redis_client is not None:
+        await redis_client.set(SHARED_KEY_PREFIX + "status", system_state.status, nx=True)
+    
+    logger.info("THEATOM FastAPI orchestration layer ready")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the agent pool and close the HTTP client"""
+    if _shared_state_task is not None:
+        _shared_state_task.cancel()
+    stop_agent_pool()
+    if http_client is not None:
+        await http_client.aclose()
+    if signal_ring is not None:
+        signal_ring.close()
 
 if __name__ == "__main__":
+    import uvicorn
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    
     # Run the FastAPI server
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
         reload=False,
-        log_level="info"
+        # Rule of thumb is 2 * cores + 1; more than one needs REDIS_URL for shared state
+        workers=WEB_CONCURRENCY,
+        # httptools and uvloop come with uvicorn[standard] (uvloop not on Windows);
+        # no websocket routes, and per-request access logs belong to the proxy
+        http="httptools",
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        ws="none",
+        access_log=False,
+        log_level=os.getenv("LOG_LEVEL", "info").lower()
     )
@@ -3,8 +3,11 @@ ATOM v2 Arbitrage Engine - Core orchestration logic
 """
 
 import asyncio
+import itertools
+import logging
+import random
 import time
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass
 from decimal import Decimal
 
@@ -13,7 +16,12 @@ from .config_manager import ConfigManager
 
 logger = setup_logger(__name__)
 
-@dataclass
+ERROR_BACKOFF_MIN = 0.1  # seconds
+ERROR_BACKOFF_MAX = 5.0
+METRICS_INTERVAL = 60.0  # seconds
+MAX_SCAN_AGE = 12.0  # seconds, used when network.block_time isn't configured
+
+@dataclass(slots=True, frozen=True)
 class ArbitrageOpportunity:
     token_in: str
     token_out: str
@@ -41,19 +49,37 @@ class ArbitrageEngine:
         self.trades_executed = 0
         self.total_profit_wei = 0
         self.total_gas_spent_wei = 0
-        self.start_time = None
+        self.start_time = None  # monotonic; wall-clock start is in started_at
+        self.started_at = None
+        self._metrics_task_handle: Optional[asyncio.Task] = None
+        self._last_price_version = None
         
         # Trading configuration
         self.min_profit_wei = int(config.get('trading.min_profit_wei'))
         self.trade_amount_wei = int(config.get('trading.trade_amount_wei'))
         self.max_concurrent_trades = config.get('trading.max_concurrent_trades', 3)
         self.slippage_tolerance = config.get('trading.slippage_tolerance', 0.005)
+        # Aggregator quotes move even when the local DEX cache doesn't, so rescan at least this often
+        self.max_scan_age = config.get('trading.max_scan_age', config.get('network.block_time', MAX_SCAN_AGE))
+        self._flashbots_enabled = config.is_enabled('mev_protection.flashbots_enabled')
+        self._cow_enabled = config.is_enabled('cow_protocol')
+        
+        # One bound on outbound RPC/relay calls, shared by price polling and execution
+        self._rpc_sem = asyncio.Semaphore(config.get('network.max_concurrent_rpc', 100))
+        dex_monitor.rpc_semaphore = self._rpc_sem
+        mev_protection.rpc_semaphore = self._rpc_sem
         
-        # Active trades tracking
-        self.active_trades = set()
-        self.trade_semaphore = asyncio.Semaphore(self.max_concurrent_trades)
+        # Active trades tracking (observability only; the workers bound concurrency)
+        self.active_trades: Set[int] = set()
+        self._trade_seq = itertools.count(1)
+        self._all_idle = asyncio.Event()
+        self._all_idle.set()
         
-        logger.info(f"ArbitrageEngine initialized (dry_run={dry_run})")
+        # Detection produces into a bounded queue; persistent workers execute
+        self._opp_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrent_trades * 4)
+        self._workers: List[asyncio.Task] = []
+        
+        logger.info("ArbitrageEngine initialized (dry_run=%s)", dry_run)
     
     async def start(self):
         """Start the arbitrage engine"""
@@ -62,7 +88,8 @@ class ArbitrageEngine:
             return
         
         self.is_running = True
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        self.started_at = time.time()
         
         logger.info("🚀 Starting ATOM v2 Arbitrage Engine...")
         
@@ -72,14 +99,23 @@ class ArbitrageEngine:
             await self.pathfinding.start()
             await self.mev_protection.start()
             
-            if self.config.is_enabled('cow_protocol'):
+            if self._cow_enabled:
                 await self.cow_integration.start()
             
+            # Performance metrics run on their own cadence, off the detection loop
+            self._metrics_task_handle = asyncio.create_task(self._metrics_task())
+            
+            # Start trade workers, then the detection loop that feeds them
+            self._workers = [
+                asyncio.create_task(self._worker())
+                for _ in range(self.max_concurrent_trades)
+            ]
+            
             # Start main arbitrage loop
             await self._run_arbitrage_loop()
             
         except Exception as e:
-            logger.error(f"Engine startup failed: {e}")
+            logger.error("Engine startup failed: %s", e)
             await self.stop()
             raise
     
@@ -92,18 +128,26 @@ class ArbitrageEngine:
         
         self.is_running = False
         
+        if self._metrics_task_handle:
+            self._metrics_task_handle.cancel()
+            self._metrics_task_handle = None
+        
         # Stop all components
         await self.dex_monitor.stop()
         await self.pathfinding.stop()
         await self.mev_protection.stop()
         
-        if self.config.is_enabled('cow_protocol'):
+        if self._cow_enabled:
             await self.cow_integration.stop()
         
-        # Wait for active trades to complete
-        while self.active_trades:
-            logger.info(f"Waiting for {len(self.active_trades)} active trades to complete...")
-            await asyncio.sleep(1)
+        # Wait for queued and active trades to complete, then retire the workers
+        if self._workers:
+            logger.info("Waiting for %d trades to complete...", self._opp_queue.qsize() + len(self.active_trades))
+            await self._opp_queue.join()
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
         
         logger.info("✅ Engine stopped successfully")
     
@@ -111,106 +155,152 @@ class ArbitrageEngine:
         """Main arbitrage detection and execution loop"""
         logger.info("🔍 Starting arbitrage detection loop...")
         
+        # Bind per-iteration lookups to locals once
+        dex_monitor = self.dex_monitor
+        get_latest_prices = dex_monitor.get_latest_prices
+        find_opportunities = self.pathfinding.find_opportunities
+        trade_amount_wei = self.trade_amount_wei
+        min_profit_wei = self.min_profit_wei
+        put = self._opp_queue.put
+        sleep = asyncio.sleep
+        monotonic = time.monotonic
+        max_scan_age = self.max_scan_age
+        next_scan_at = 0.0
+        
+        # Error backoff grows 0.1s -> 5s and resets after a clean iteration
+        backoff = ERROR_BACKOFF_MIN
+        
         while self.is_running:
             try:
+                # Skip until a price, liquidity or block changes, or the last scan is too old
+                price_version = dex_monitor.price_version
+                if price_version == self._last_price_version and monotonic() < next_scan_at:
+                    await sleep(0.05)
+                    continue
+                
                 # Get latest price data
-                price_data = await self.dex_monitor.get_latest_prices()
+                price_data = await get_latest_prices()
                 
                 if not price_data:
-                    await asyncio.sleep(1)
+                    await sleep(1)
                     continue
                 
+                self._last_price_version = price_version
+                next_scan_at = monotonic() + max_scan_age
+                
                 # Find arbitrage opportunities
-                opportunities = await self.pathfinding.find_opportunities(
+                opportunities = await find_opportunities(
                     price_data, 
-                    self.trade_amount_wei,
-                    self.min_profit_wei
+                    trade_amount_wei,
+                    min_profit_wei
                 )
                 
                 if opportunities:
                     self.opportunities_found += len(opportunities)
-                    logger.info(f"Found {len(opportunities)} arbitrage opportunities")
+                    logger.info("Found %d arbitrage opportunities", len(opportunities))
                     
-                    # Process opportunities concurrently
-                    tasks = []
-                    for opportunity in opportunities:
-                        if len(self.active_trades) < self.max_concurrent_trades:
-                            task = asyncio.create_task(self._execute_arbitrage(opportunity))
-                            tasks.append(task)
+                    # Only the most profitable per route, and no more than we can run at once
+                    opportunities = self._select_opportunities(opportunities)
                     
-                    if tasks:
-                        await asyncio.gather(*tasks, return_exceptions=True)
+                    # Hand opportunities to the workers; detection carries on while they trade
+                    # and a full queue holds detection back until they catch up
+                    for opportunity in opportunities:
+                        await put(opportunity)
                 
-                # Log performance metrics every 60 seconds
-                if int(time.time()) % 60 == 0:
-                    await self._log_performance_metrics()
+                backoff = ERROR_BACKOFF_MIN
                 
                 # Small delay to prevent overwhelming the system
-                await asyncio.sleep(0.1)
+                await sleep(0.1)
                 
-            except Exception as e:
-                logger.error(f"Error in arbitrage loop: {e}")
-                await asyncio.sleep(5)
+            except Exception:
+                # CancelledError is a BaseException, so stop() cancellation still propagates
+                logger.exception("Error in arbitrage loop")
+                await sleep(backoff + random.random() * 0.1)
+                backoff = min(backoff * 2, ERROR_BACKOFF_MAX)
+    
+    def _select_opportunities(self, opportunities: List[ArbitrageOpportunity]) -> List[ArbitrageOpportunity]:
+        """Keep the best opportunity per (token_in, token_out, dex_path), most profitable first"""
+        best: Dict[tuple, ArbitrageOpportunity] = {}
+        for opportunity in opportunities:
+            key = (opportunity.token_in, opportunity.token_out, tuple(opportunity.dex_path))
+            current = best.get(key)
+            if current is None or opportunity.net_profit_wei > current.net_profit_wei:
+                best[key] = opportunity
+        
+        ranked = sorted(best.values(), key=lambda o: o.net_profit_wei, reverse=True)
+        return ranked[:self.max_concurrent_trades]
+    
+    async def _worker(self):
+        """Execute queued opportunities one at a time until cancelled"""
+        while True:
+            opportunity = await self._opp_queue.get()
+            try:
+                await self._execute_arbitrage(opportunity)
+            finally:
+                self._opp_queue.task_done()
     
     async def _execute_arbitrage(self, opportunity: ArbitrageOpportunity):
         """Execute a single arbitrage opportunity"""
-        trade_id = f"trade_{int(time.time() * 1000)}"
+        trade_id = next(self._trade_seq)
         
-        async with self.trade_semaphore:
-            self.active_trades.add(trade_id)
+        self.active_trades.add(trade_id)
+        self._all_idle.clear()
+        
+        try:
+            logger.info("Executing arbitrage trade_%d: %s -> %s", trade_id, opportunity.token_in, opportunity.token_out)
+            log_opportunity(opportunity)
             
-            try:
-                logger.info(f"Executing arbitrage {trade_id}: {opportunity.token_in} -> {opportunity.token_out}")
-                log_opportunity(opportunity.__dict__)
-                
-                if self.dry_run:
-                    # Simulate execution
-                    await asyncio.sleep(0.5)
-                    success = True
-                    tx_hash = f"0x{'0' * 64}"  # Fake hash for dry run
-                else:
-                    # Real execution
-                    success, tx_hash = await self._execute_real_trade(opportunity)
+            if self.dry_run:
+                # Simulate execution
+                await asyncio.sleep(0.5)
+                success = True
+                tx_hash = f"0x{'0' * 64}"  # Fake hash for dry run
+            else:
+                # Real execution
+                success, tx_hash = await self._execute_real_trade(opportunity)
+            
+            if success:
+                self.trades_executed += 1
+                self.total_profit_wei += opportunity.net_profit_wei
                 
-                if success:
-                    self.trades_executed += 1
-                    self.total_profit_wei += opportunity.net_profit_wei
-                    
-                    trade_data = {
-                        'trade_id': trade_id,
-                        'tx_hash': tx_hash,
-                        'token_in': opportunity.token_in,
-                        'token_out': opportunity.token_out,
-                        'amount_in': opportunity.amount_in,
-                        'amount_out': opportunity.amount_out,
-                        'profit_wei': opportunity.net_profit_wei,
-                        'gas_cost_wei': opportunity.gas_cost_wei,
-                        'dex_path': opportunity.dex_path,
-                        'timestamp': time.time()
-                    }
-                    
-                    log_trade_execution(trade_data)
-                    logger.info(f"✅ Trade {trade_id} executed successfully. Profit: {opportunity.net_profit_wei / 1e18:.6f} ETH")
-                else:
-                    logger.warning(f"❌ Trade {trade_id} failed")
+                trade_data = {
+                    'trade_id': f"trade_{trade_id}",
+                    'tx_hash': tx_hash,
+                    'token_in': opportunity.token_in,
+                    'token_out': opportunity.token_out,
+                    'amount_in': opportunity.amount_in,
+                    'amount_out': opportunity.amount_out,
+                    'profit_wei': opportunity.net_profit_wei,
+                    'gas_cost_wei': opportunity.gas_cost_wei,
+                    'dex_path': opportunity.dex_path,
+                    'timestamp': time.time()
+                }
                 
-            except Exception as e:
-                logger.error(f"Error executing trade {trade_id}: {e}")
-            finally:
-                self.active_trades.discard(trade_id)
+                log_trade_execution(trade_data)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("✅ Trade trade_%d executed successfully. Profit: %.6f ETH", trade_id, opportunity.net_profit_wei / 1e18)
+            else:
+                logger.warning("❌ Trade trade_%d failed", trade_id)
+            
+        except Exception as e:
+            logger.error("Error executing trade trade_%d: %s", trade_id, e)
+        finally:
+            self.active_trades.discard(trade_id)
+            if not self.active_trades:
+                self._all_idle.set()
     
     async def _execute_real_trade(self, opportunity: ArbitrageOpportunity) -> tuple[bool, str]:
         """Execute real arbitrage trade with MEV protection"""
         try:
             # Use MEV protection if enabled
-            if self.config.is_enabled('mev_protection.flashbots_enabled'):
+            if self._flashbots_enabled:
                 return await self.mev_protection.execute_protected_trade(opportunity)
             else:
                 # Direct execution without MEV protection
                 return await self._execute_direct_trade(opportunity)
                 
         except Exception as e:
-            logger.error(f"Trade execution failed: {e}")
+            logger.error("Trade execution failed: %s", e)
             return False, ""
     
     async def _execute_direct_trade(self, opportunity: ArbitrageOpportunity) -> tuple[bool, str]:
@@ -220,12 +310,13 @@ class ArbitrageEngine:
         await asyncio.sleep(1)  # Simulate network delay
         return True, f"0x{'a' * 64}"
     
-    async def get_status(self) -> Dict[str, Any]:
+    def get_status(self) -> Dict[str, Any]:
         """Get current engine status"""
-        uptime = time.time() - self.start_time if self.start_time else 0
+        uptime = time.monotonic() - self.start_time if self.start_time else 0
         
         return {
             'is_running': self.is_running,
+            'started_at': self.started_at,
             'uptime_seconds': uptime,
             'opportunities_found': self.opportunities_found,
             'trades_executed': self.trades_executed,
@@ -238,9 +329,15 @@ class ArbitrageEngine:
             'trades_per_hour': self.trades_executed / max(uptime / 3600, 1/3600)
         }
     
-    async def _log_performance_metrics(self):
+    async def _metrics_task(self):
+        """Log performance metrics every 60 seconds while running"""
+        while self.is_running:
+            await asyncio.sleep(METRICS_INTERVAL)
+            self._log_performance_metrics()
+    
+    def _log_performance_metrics(self):
         """Log performance metrics"""
-        status = await self.get_status()
+        status = self.get_status()
         log_performance_metrics(status)
     
     async def emergency_withdraw(self):
@@ -250,9 +347,11 @@ class ArbitrageEngine:
         # Stop all trading
         self.is_running = False
         
-        # Wait for active trades
-        while self.active_trades:
-            await asyncio.sleep(1)
+        # Drop queued opportunities and wait only for trades already in flight
+        while not self._opp_queue.empty():
+            self._opp_queue.get_nowait()
+            self._opp_queue.task_done()
+        await self._all_idle.wait()
         
         # Implement emergency withdrawal logic here
         logger.info("Emergency withdrawal completed")
@@ -9,10 +9,31 @@ from pathlib import Path
 from typing import Dict, Any
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    
+    def _loads(data: bytes) -> Any:
+        return orjson.loads(data)
+    
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    
+    _DecodeError = orjson.JSONDecodeError
+except ImportError:
+    def _loads(data: bytes) -> Any:
+        return json.loads(data)
+    
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+    
+    _DecodeError = json.JSONDecodeError
+
 class ConfigManager:
+    CONFIG_DIR = Path(__file__).resolve().parent.parent.parent / "config"
+    
     def __init__(self, config_path: str = None):
-        self.config_path = config_path or Path(__file__).parent.parent.parent / "config" / "config.json"
-        self.env_path = Path(__file__).parent.parent.parent / "config" / ".env"
+        self.config_path = Path(config_path) if config_path else self.CONFIG_DIR / "config.json"
+        self.env_path = self.CONFIG_DIR / ".env"
         
         # Load environment variables
         if self.env_path.exists():
@@ -21,16 +42,16 @@ class ConfigManager:
         # Load configuration
         self.config = self._load_config()
         self._apply_env_overrides()
+        self._flatten()
         self._validate_config()
     
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file"""
         try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
+            return _loads(self.config_path.read_bytes())
         except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
-        except json.JSONDecodeError as e:
+        except _DecodeError as e:
             raise ValueError(f"Invalid JSON in configuration file: {e}")
     
     def _apply_env_overrides(self):
@@ -42,6 +63,8 @@ class ConfigManager:
             self.config['network']['chain_id'] = int(os.getenv('CHAIN_ID'))
         if os.getenv('NETWORK_NAME'):
             self.config['network']['name'] = os.getenv('NETWORK_NAME')
+        if os.getenv('WSS_URL'):
+            self.config['network']['wss_url'] = os.getenv('WSS_URL')
         
         # API Keys
         if os.getenv('ZEROX_API_KEY'):
@@ -81,18 +104,23 @@ class ConfigManager:
         if int(self.config['trading']['trade_amount_wei']) <= 0:
             raise ValueError("trade_amount_wei must be positive")
     
-    def _get_nested_value(self, key_path: str) -> Any:
-        """Get nested configuration value using dot notation"""
-        keys = key_path.split('.')
-        value = self.config
+    def _flatten(self):
+        """Index every value (leaf or section) by its dotted path"""
+        flat = {}
         
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return None
+        def walk(prefix, node):
+            for key, value in node.items():
+                path = f"{prefix}.{key}" if prefix else key
+                flat[path] = value
+                if isinstance(value, dict):
+                    walk(path, value)
         
-        return value
+        walk("", self.config)
+        self._flat: Dict[str, Any] = flat
+    
+    def _get_nested_value(self, key_path: str) -> Any:
+        """Get nested configuration value using dot notation"""
+        return self._flat.get(key_path)
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """Get configuration value with optional default"""
@@ -151,19 +179,27 @@ class ConfigManager:
         return os.getenv('FLASHBOTS_PRIVATE_KEY', self.get_private_key())
     
     def save_config(self, config_path: str = None):
-        """Save current configuration to file"""
-        path = config_path or self.config_path
-        with open(path, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        """Save current configuration to file, atomically"""
+        path = Path(config_path or self.config_path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(_dumps(self.config))
+        os.replace(tmp_path, path)
     
     def update_config(self, updates: Dict[str, Any]):
         """Update configuration with new values"""
-        def deep_update(base_dict, update_dict):
+        def deep_update(base_dict, update_dict) -> bool:
+            changed = False
             for key, value in update_dict.items():
                 if isinstance(value, dict) and key in base_dict and isinstance(base_dict[key], dict):
-                    deep_update(base_dict[key], value)
-                else:
+                    changed |= deep_update(base_dict[key], value)
+                elif key not in base_dict or base_dict[key] != value:
                     base_dict[key] = value
+                    changed = True
+            return changed
+        
+        # Nothing to re-index or re-validate if the values are already there
+        if not deep_update(self.config, updates):
+            return
         
-        deep_update(self.config, updates)
+        self._flatten()
         self._validate_config()
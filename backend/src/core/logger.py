@@ -2,12 +2,78 @@
 Logging configuration for ATOM v2
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
+from typing import Any
+
+# Loggers call into a queue; one listener thread does all the file I/O so
+# the event loop never blocks on write() or rollover()
+LOG_DIR = Path(__file__).parent.parent.parent / "logs"
+LOG_DIR.mkdir(exist_ok=True)
+
+# Dedicated loggers with their own files; everything else goes to atom.log
+TRADE_LOGGER = 'trade_execution'
+OPPORTUNITY_LOGGER = 'opportunities'
+PERFORMANCE_LOGGER = 'performance'
+_DEDICATED = (TRADE_LOGGER, OPPORTUNITY_LOGGER, PERFORMANCE_LOGGER)
+
+def _rotating_handler(filename: str, max_bytes: int, backup_count: int, level: int,
+                      formatter: logging.Formatter, record_filter) -> RotatingFileHandler:
+    """Rotating file handler, opened on first write"""
+    handler = RotatingFileHandler(LOG_DIR / filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    handler.addFilter(record_filter)
+    return handler
+
+def _general(record: logging.LogRecord) -> bool:
+    return record.name not in _DEDICATED
+
+# Create formatters
+detailed_formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+simple_formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Console handler
+console_handler = logging.StreamHandler(sys.stdout)
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(simple_formatter)
+console_handler.addFilter(_general)
+
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(
+    _log_queue,
+    console_handler,
+    # All logs, and errors only
+    _rotating_handler("atom.log", 10*1024*1024, 5, logging.DEBUG, detailed_formatter, _general),
+    _rotating_handler("error.log", 10*1024*1024, 5, logging.ERROR, detailed_formatter, _general),
+    _rotating_handler("trades.log", 50*1024*1024, 10, logging.INFO,
+                      logging.Formatter('%(asctime)s - TRADE - %(message)s'), logging.Filter(TRADE_LOGGER)),
+    _rotating_handler("opportunities.log", 50*1024*1024, 10, logging.INFO,
+                      logging.Formatter('%(asctime)s - OPPORTUNITY - %(message)s'), logging.Filter(OPPORTUNITY_LOGGER)),
+    _rotating_handler("performance.log", 50*1024*1024, 10, logging.INFO,
+                      logging.Formatter('%(asctime)s - PERFORMANCE - %(message)s'), logging.Filter(PERFORMANCE_LOGGER)),
+    respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = QueueHandler(_log_queue)
+
+def _attach(logger: logging.Logger):
+    """Route a logger through the shared queue (idempotent)"""
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
 
 def setup_logger(name: str, level: str = None) -> logging.Logger:
     """Setup logger with file and console handlers"""
@@ -18,117 +84,29 @@ def setup_logger(name: str, level: str = None) -> logging.Logger:
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, log_level))
-    
-    # Avoid duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Create logs directory
-    log_dir = Path(__file__).parent.parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    simple_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s'
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler for all logs
-    file_handler = RotatingFileHandler(
-        log_dir / "atom.log",
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
-    
-    # Error file handler
-    error_handler = RotatingFileHandler(
-        log_dir / "error.log",
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(detailed_formatter)
-    logger.addHandler(error_handler)
+    _attach(logger)
     
     return logger
 
+def _make_file_logger(name: str) -> logging.Logger:
+    """Logger feeding one of the dedicated files above"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    _attach(logger)
+    return logger
+
+_TRADE_LOG = _make_file_logger(TRADE_LOGGER)
+_OPPORTUNITY_LOG = _make_file_logger(OPPORTUNITY_LOGGER)
+_PERFORMANCE_LOG = _make_file_logger(PERFORMANCE_LOGGER)
+
 def log_trade_execution(trade_data: dict):
     """Log trade execution details"""
-    trade_logger = logging.getLogger('trade_execution')
-    
-    if not trade_logger.handlers:
-        log_dir = Path(__file__).parent.parent.parent / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        handler = RotatingFileHandler(
-            log_dir / "trades.log",
-            maxBytes=50*1024*1024,  # 50MB
-            backupCount=10
-        )
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - TRADE - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        trade_logger.addHandler(handler)
-        trade_logger.setLevel(logging.INFO)
-    
-    trade_logger.info(f"Trade executed: {trade_data}")
+    _TRADE_LOG.info("Trade executed: %s", trade_data)
 
-def log_opportunity(opportunity_data: dict):
-    """Log arbitrage opportunity details"""
-    opp_logger = logging.getLogger('opportunities')
-    
-    if not opp_logger.handlers:
-        log_dir = Path(__file__).parent.parent.parent / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        handler = RotatingFileHandler(
-            log_dir / "opportunities.log",
-            maxBytes=50*1024*1024,  # 50MB
-            backupCount=10
-        )
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - OPPORTUNITY - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        opp_logger.addHandler(handler)
-        opp_logger.setLevel(logging.INFO)
-    
-    opp_logger.info(f"Opportunity found: {opportunity_data}")
+def log_opportunity(opportunity_data: Any):
+    """Log arbitrage opportunity details (a dict or an ArbitrageOpportunity)"""
+    _OPPORTUNITY_LOG.info("Opportunity found: %s", opportunity_data)
 
 def log_performance_metrics(metrics: dict):
     """Log performance metrics"""
-    perf_logger = logging.getLogger('performance')
-    
-    if not perf_logger.handlers:
-        log_dir = Path(__file__).parent.parent.parent / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        handler = RotatingFileHandler(
-            log_dir / "performance.log",
-            maxBytes=50*1024*1024,  # 50MB
-            backupCount=10
-        )
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - PERFORMANCE - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        perf_logger.addHandler(handler)
-        perf_logger.setLevel(logging.INFO)
-    
-    perf_logger.info(f"Performance metrics: {metrics}")
+    _PERFORMANCE_LOG.info("Performance metrics: %s", metrics)
@@ -12,6 +12,13 @@ from core.config_manager import ConfigManager
 
 logger = setup_logger(__name__)
 
+# Config key and display name, in deploy order
+CONTRACTS = [
+    ('arbitrage', 'Arbitrage'),
+    ('cow_integration', 'CoW integration'),
+    ('mev_protection', 'MEV protection')
+]
+
 async def deploy_all_contracts(network: str, config: ConfigManager) -> Dict[str, str]:
     """Deploy all ATOM v2 smart contracts"""
     logger.info(f"🚀 Deploying ATOM v2 contracts to {network}...")
@@ -19,26 +26,29 @@ async def deploy_all_contracts(network: str, config: ConfigManager) -> Dict[str,
     deployed_contracts = {}
     
     try:
-        # Deploy flash loan arbitrage contract
-        arbitrage_address = await deploy_arbitrage_contract(network, config)
-        if arbitrage_address:
-            deployed_contracts['arbitrage'] = arbitrage_address
-            logger.info(f"✅ Arbitrage contract deployed: {arbitrage_address}")
+        # The three contracts are independent, so deploy them concurrently
+        results = await asyncio.gather(
+            deploy_arbitrage_contract(network, config),
+            deploy_cow_integration_contract(network, config),
+            deploy_mev_protection_contract(network, config),
+            return_exceptions=True
+        )
         
-        # Deploy CoW integration contract
-        cow_address = await deploy_cow_integration_contract(network, config)
-        if cow_address:
-            deployed_contracts['cow_integration'] = cow_address
-            logger.info(f"✅ CoW integration contract deployed: {cow_address}")
+        failures = []
+        for (key, label), result in zip(CONTRACTS, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ {label} contract deployment failed: {result}")
+                failures.append(label)
+            elif result:
+                deployed_contracts[key] = result
+                logger.info(f"✅ {label} contract deployed: {result}")
         
-        # Deploy MEV protection contract
-        mev_address = await deploy_mev_protection_contract(network, config)
-        if mev_address:
-            deployed_contracts['mev_protection'] = mev_address
-            logger.info(f"✅ MEV protection contract deployed: {mev_address}")
+        if failures:
+            raise RuntimeError(f"Failed to deploy: {', '.join(failures)}")
         
-        # Update configuration with deployed addresses
+        # Update configuration with deployed addresses, then write it once
         await update_config_with_addresses(config, deployed_contracts)
+        config.save_config()
         
         logger.info(f"🎉 All contracts deployed successfully!")
         return deployed_contracts
@@ -95,9 +105,6 @@ async def update_config_with_addresses(config: ConfigManager, addresses: Dict[st
         }
     })
     
-    # Save updated configuration
-    config.save_config()
-    
     logger.info("Configuration updated with contract addresses")
 
 def get_contract_abi(contract_name: str) -> Dict[str, Any]:
@@ -4,37 +4,124 @@ CoW Protocol Integration - Batch auction arbitrage
 
 import asyncio
 import aiohttp
+import collections
 import json
 import time
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from yarl import URL
 
 from core.logger import setup_logger
 from core.config_manager import ConfigManager
 
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 logger = setup_logger(__name__)
 
-@dataclass
-class CoWOrder:
-    order_id: str
-    token_in: str
-    token_out: str
-    amount_in: int
-    amount_out: int
-    valid_until: int
-    fee_amount: int
-    order_data: Dict[str, Any]
-    status: str  # 'pending', 'filled', 'cancelled', 'expired'
+# One monitor loop ticks at the auction interval; order status polling rides on
+# those ticks, backing off from the minimum while no order changes
+AUCTION_POLL_INTERVAL = 5  # seconds
+ORDER_POLL_MIN = 10
+ORDER_POLL_MAX = 60
 
-@dataclass
-class BatchAuction:
-    auction_id: str
-    orders: List[CoWOrder]
-    settlement_block: int
-    total_surplus: int
-    status: str
+TERMINAL_STATUSES = frozenset(('filled', 'cancelled', 'expired'))
+
+READ_CHUNK = 64 * 1024
+
+# Orders and auctions are msgspec Structs when available (slotted, C-level construction),
+# and the auction payload is decoded straight into typed structs, skipping fields we
+# don't read; plain dataclasses and dict parsing are the fallback
+try:
+    import msgspec
+    
+    class CoWOrder(msgspec.Struct):
+        order_id: str
+        token_in: str
+        token_out: str
+        amount_in: int
+        amount_out: int
+        valid_until: int
+        fee_amount: int
+        order_data: Dict[str, Any]
+        status: str  # 'pending', 'filled', 'cancelled', 'expired'
+    
+    class BatchAuction(msgspec.Struct):
+        auction_id: str
+        orders: List[CoWOrder]
+        settlement_block: int
+        total_surplus: int
+        status: str
+    
+    class AuctionOrder(msgspec.Struct, frozen=True, gc=False):
+        orderUid: Optional[str] = None
+    
+    class AuctionMsg(msgspec.Struct, frozen=True):
+        auctionId: Optional[Any] = None
+        block: int = 0
+        orders: List[AuctionOrder] = []
+    
+    _auction_decoder = msgspec.json.Decoder(AuctionMsg)
+    
+    def _decode_auction(body: bytearray) -> AuctionMsg:
+        return _auction_decoder.decode(body)
+except ImportError:
+    @dataclass
+    class CoWOrder:
+        order_id: str
+        token_in: str
+        token_out: str
+        amount_in: int
+        amount_out: int
+        valid_until: int
+        fee_amount: int
+        order_data: Dict[str, Any]
+        status: str  # 'pending', 'filled', 'cancelled', 'expired'
+    
+    @dataclass
+    class BatchAuction:
+        auction_id: str
+        orders: List[CoWOrder]
+        settlement_block: int
+        total_surplus: int
+        status: str
+    
+    @dataclass(frozen=True)
+    class AuctionOrder:
+        orderUid: Optional[str] = None
+    
+    @dataclass(frozen=True)
+    class AuctionMsg:
+        auctionId: Optional[Any] = None
+        block: int = 0
+        orders: List[AuctionOrder] = field(default_factory=list)
+    
+    def _decode_auction(body: bytearray) -> AuctionMsg:
+        data = _json_loads(body)
+        return AuctionMsg(
+            auctionId=data.get('auctionId'),
+            block=data.get('block', 0),
+            orders=[AuctionOrder(order.get('orderUid')) for order in data.get('orders', [])]
+        )
 
 class CoWIntegration:
+    # Order fields that are the same for every arbitrage order
+    _ORDER_TEMPLATE = {
+        'appData': '0x0000000000000000000000000000000000000000000000000000000000000000',
+        'kind': 'sell',
+        'partiallyFillable': False,
+        'sellTokenBalance': 'erc20',
+        'buyTokenBalance': 'erc20'
+    }
+    
     def __init__(self, config: ConfigManager):
         self.config = config
         self.is_running = False
@@ -43,13 +130,29 @@ class CoWIntegration:
         # CoW Protocol configuration
         self.cow_config = config.get_cow_config()
         self.api_url = self.cow_config.get('api_url')
+        
+        # Endpoint URLs built once; aiohttp uses URL objects without re-parsing them
+        base_url = URL(self.api_url or '')
+        self._orders_url = base_url / 'orders'
+        self._auction_url = base_url / 'auction'
         self.settlement_contract = self.cow_config.get('settlement_contract')
         self.order_validity_seconds = self.cow_config.get('order_validity_seconds', 3600)
         
         # Order tracking
         self.active_orders = {}
-        self.order_history = []
-        self.batch_history = []
+        self.order_history = collections.deque(maxlen=1000)
+        self.batch_history = collections.deque(maxlen=5000)
+        
+        # Lifetime counters, updated at status transitions so stats are O(1)
+        self._total_orders = 0
+        self._filled_count = 0
+        
+        # Quiet status sweeps stretch the poll interval; a new order forces a sweep next tick
+        self._quiet_ticks = 0
+        self._order_added = False
+        
+        # Status checks already running, keyed by order id
+        self._status_inflight: Dict[str, asyncio.Future] = {}
         
         logger.info("CoWIntegration initialized")
     
@@ -59,13 +162,25 @@ class CoWIntegration:
             return
         
         self.is_running = True
-        self.session = aiohttp.ClientSession()
+        
+        # One pooled session for every API call; bounded so a slow API can't stall the monitors
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=5, connect=2),
+            json_serialize=_json_dumps
+        )
         
         logger.info("🐄 Starting CoW Protocol integration...")
         
         # Start monitoring tasks
-        asyncio.create_task(self._monitor_auctions())
-        asyncio.create_task(self._monitor_orders())
+        asyncio.create_task(self._monitor_loop())
     
     async def stop(self):
         """Stop CoW Protocol integration"""
@@ -77,6 +192,14 @@ class CoWIntegration:
         
         if self.session:
             await self.session.close()
+            self.session = None
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
     
     async def create_arbitrage_order(self, opportunity) -> Optional[CoWOrder]:
         """Create CoW order for arbitrage opportunity"""
@@ -93,7 +216,7 @@ class CoWIntegration:
                 amount_out=opportunity.amount_out,
                 valid_until=valid_until,
                 fee_amount=opportunity.gas_cost_wei,
-                order_data=await self._build_order_data(opportunity),
+                order_data=self._build_order_data(opportunity, valid_until),
                 status='pending'
             )
             
@@ -102,6 +225,8 @@ class CoWIntegration:
             
             if success:
                 self.active_orders[order.order_id] = order
+                self._total_orders += 1
+                self._order_added = True
                 logger.info(f"Created CoW order {order.order_id}")
                 return order
             else:
@@ -112,33 +237,29 @@ class CoWIntegration:
             logger.error(f"CoW order creation error: {e}")
             return None
     
-    async def _build_order_data(self, opportunity) -> Dict[str, Any]:
+    def _build_order_data(self, opportunity, valid_until: int) -> Dict[str, Any]:
         """Build CoW order data"""
         return {
+            **self._ORDER_TEMPLATE,
             'sellToken': opportunity.token_in,
             'buyToken': opportunity.token_out,
             'sellAmount': str(opportunity.amount_in),
             'buyAmount': str(opportunity.amount_out),
-            'validTo': int(time.time()) + self.order_validity_seconds,
-            'appData': '0x0000000000000000000000000000000000000000000000000000000000000000',
-            'feeAmount': str(opportunity.gas_cost_wei),
-            'kind': 'sell',
-            'partiallyFillable': False,
-            'sellTokenBalance': 'erc20',
-            'buyTokenBalance': 'erc20'
+            'validTo': valid_until,
+            'feeAmount': str(opportunity.gas_cost_wei)
         }
     
     async def _submit_cow_order(self, order: CoWOrder) -> bool:
         """Submit order to CoW Protocol API"""
         try:
-            url = f"{self.api_url}/orders"
+            url = self._orders_url
             
             # Sign order (this would use actual wallet signing)
             signed_order = await self._sign_order(order)
             
             async with self.session.post(url, json=signed_order) as response:
                 if response.status == 201:
-                    result = await response.json()
+                    result = await response.json(loads=_json_loads)
                     order.order_id = result.get('orderUid', order.order_id)
                     logger.info(f"CoW order submitted: {order.order_id}")
                     return True
@@ -160,8 +281,10 @@ class CoWIntegration:
             'signingScheme': 'eip712'
         }
     
-    async def _monitor_auctions(self):
-        """Monitor CoW batch auctions"""
+    async def _monitor_loop(self):
+        """Monitor CoW batch auctions every tick, and active orders when their sweep is due"""
+        next_order_sweep = 0.0
+        
         while self.is_running:
             try:
                 # Get current auction info
@@ -170,20 +293,29 @@ class CoWIntegration:
                 if auction_info:
                     await self._process_auction(auction_info)
                 
-                await asyncio.sleep(5)  # Check every 5 seconds
+                if self._order_added or time.monotonic() >= next_order_sweep:
+                    self._order_added = False
+                    next_order_sweep = time.monotonic() + await self._sweep_orders()
+                
+                await asyncio.sleep(AUCTION_POLL_INTERVAL)
                 
             except Exception as e:
-                logger.error(f"Auction monitoring error: {e}")
+                logger.error(f"CoW monitoring error: {e}")
                 await asyncio.sleep(10)
     
-    async def _get_current_auction(self) -> Optional[Dict[str, Any]]:
+    async def _get_current_auction(self) -> Optional[AuctionMsg]:
         """Get current batch auction information"""
         try:
-            url = f"{self.api_url}/auction"
+            url = self._auction_url
             
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    # The auction lists every order in the batch; read it into one growing
+                    # buffer instead of read(), which joins a list of chunks at the end
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(READ_CHUNK):
+                        body += chunk
+                    return _decode_auction(body)
                 else:
                     return None
                     
@@ -191,18 +323,15 @@ class CoWIntegration:
             logger.error(f"Error getting auction info: {e}")
             return None
     
-    async def _process_auction(self, auction_info: Dict[str, Any]):
+    async def _process_auction(self, auction_info: AuctionMsg):
         """Process batch auction information"""
         try:
-            auction_id = auction_info.get('auctionId')
-            orders = auction_info.get('orders', [])
+            auction_id = auction_info.auctionId
             
             # Check if any of our orders are in this auction
-            our_orders = []
-            for order_data in orders:
-                order_uid = order_data.get('orderUid')
-                if order_uid in self.active_orders:
-                    our_orders.append(self.active_orders[order_uid])
+            active_orders = self.active_orders
+            auction_uids = {order.orderUid for order in auction_info.orders}
+            our_orders = [active_orders[uid] for uid in auction_uids & active_orders.keys()]
             
             if our_orders:
                 logger.info(f"Found {len(our_orders)} of our orders in auction {auction_id}")
@@ -211,7 +340,7 @@ class CoWIntegration:
                 batch = BatchAuction(
                     auction_id=auction_id,
                     orders=our_orders,
-                    settlement_block=auction_info.get('block', 0),
+                    settlement_block=auction_info.block,
                     total_surplus=0,  # Would be calculated from settlement
                     status='active'
                 )
@@ -221,41 +350,69 @@ class CoWIntegration:
         except Exception as e:
             logger.error(f"Auction processing error: {e}")
     
-    async def _monitor_orders(self):
-        """Monitor active CoW orders"""
-        while self.is_running:
-            try:
-                # Check status of active orders
-                for order_id, order in list(self.active_orders.items()):
-                    status = await self._check_order_status(order_id)
-                    
-                    if status and status != order.status:
-                        order.status = status
-                        logger.info(f"Order {order_id} status changed to {status}")
-                        
-                        if status in ['filled', 'cancelled', 'expired']:
-                            # Move to history
-                            self.order_history.append(order)
-                            del self.active_orders[order_id]
-                
-                # Clean up old order history
-                if len(self.order_history) > 1000:
-                    self.order_history = self.order_history[-1000:]
+    async def _sweep_orders(self) -> float:
+        """Check all active CoW orders once; returns seconds until the next sweep"""
+        # Check status of all active orders concurrently; the ids are
+        # snapshotted because orders can come and go during the await
+        active_orders = self.active_orders
+        order_ids = list(active_orders)
+        changed = False
+        finished = []
+        statuses = await asyncio.gather(
+            *[self._check_order_status(order_id) for order_id in order_ids],
+            return_exceptions=True
+        )
+        
+        for order_id, status in zip(order_ids, statuses):
+            if isinstance(status, Exception):
+                logger.error(f"Order {order_id} status check failed: {status}")
+                continue
+            
+            order = active_orders.get(order_id)
+            if order is None:
+                continue  # cancelled while the check was in flight
+            
+            if status and status != order.status:
+                order.status = status
+                changed = True
+                logger.info(f"Order {order_id} status changed to {status}")
                 
-                await asyncio.sleep(10)  # Check every 10 seconds
+                if status == 'filled':
+                    self._filled_count += 1
                 
-            except Exception as e:
-                logger.error(f"Order monitoring error: {e}")
-                await asyncio.sleep(10)
+                if status in TERMINAL_STATUSES:
+                    finished.append(order_id)
+        
+        # Move finished orders to history in one pass after the scan
+        for order_id in finished:
+            self.order_history.append(active_orders.pop(order_id))
+        
+        # 10s after any change, then 20s, 40s, 60s while nothing moves
+        if changed:
+            self._quiet_ticks = 0
+        delay = min(ORDER_POLL_MAX, ORDER_POLL_MIN * 2 ** self._quiet_ticks)
+        self._quiet_ticks = min(self._quiet_ticks + 1, 3)
+        return delay
     
     async def _check_order_status(self, order_id: str) -> Optional[str]:
-        """Check status of a specific order"""
+        """Check status of a specific order, sharing one in-flight request per order"""
+        task = self._status_inflight.get(order_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_order_status(order_id))
+            self._status_inflight[order_id] = task
+            task.add_done_callback(lambda _: self._status_inflight.pop(order_id, None))
+        
+        # Shielded so one caller being cancelled doesn't cancel the others' check
+        return await asyncio.shield(task)
+    
+    async def _fetch_order_status(self, order_id: str) -> Optional[str]:
+        """Fetch the status of a specific order from the API"""
         try:
-            url = f"{self.api_url}/orders/{order_id}"
+            url = self._orders_url / order_id
             
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=_json_loads)
                     return data.get('status', 'unknown')
                 elif response.status == 404:
                     return 'not_found'
@@ -273,7 +430,7 @@ class CoWIntegration:
                 logger.warning(f"Order {order_id} not found in active orders")
                 return False
             
-            url = f"{self.api_url}/orders/{order_id}"
+            url = self._orders_url / order_id
             
             async with self.session.delete(url) as response:
                 if response.status == 200:
@@ -294,8 +451,8 @@ class CoWIntegration:
     
     def get_cow_stats(self) -> Dict[str, Any]:
         """Get CoW Protocol statistics"""
-        total_orders = len(self.order_history) + len(self.active_orders)
-        filled_orders = len([o for o in self.order_history if o.status == 'filled'])
+        total_orders = self._total_orders
+        filled_orders = self._filled_count
         
         return {
             'active_orders': len(self.active_orders),
@@ -309,11 +466,11 @@ class CoWIntegration:
     async def get_order_book(self) -> Dict[str, Any]:
         """Get current CoW order book"""
         try:
-            url = f"{self.api_url}/orders"
+            url = self._orders_url
             
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await response.json(loads=_json_loads)
                 else:
                     return {}
                     
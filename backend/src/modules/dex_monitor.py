@@ -3,39 +3,94 @@ DEX Monitor - Real-time price monitoring across multiple DEXs
 """
 
 import asyncio
+import heapq
 import json
 import time
+import numpy as np
 import websockets
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
-from decimal import Decimal
 
 from core.logger import setup_logger
 from core.config_manager import ConfigManager
 
 logger = setup_logger(__name__)
 
-@dataclass
-class PriceData:
-    token_pair: str
-    dex: str
-    price: Decimal
-    liquidity: Decimal
-    timestamp: float
-    block_number: int
+# Pool events that mean reserves or the tick moved
+SYNC_TOPIC = '0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1'     # UniswapV2 Sync(uint112,uint112)
+V3_SWAP_TOPIC = '0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67'  # UniswapV3 Swap(...)
+
+STALE_AFTER = 30  # seconds before a cached price is evicted
+
+# PriceData carries price and liquidity as ints scaled by 1e18 (EVM-style fixed point);
+# the numpy arrays hold the unscaled float64 values for vector comparisons
+PRICE_SCALE = 10**18
+
+# Built on every price fetch: a frozen, non-GC-tracked msgspec Struct when available
+try:
+    import msgspec
+    
+    class PriceData(msgspec.Struct, frozen=True, gc=False):
+        token_pair: str
+        dex: str
+        price: int
+        liquidity: int
+        timestamp: float
+        block_number: int
+except ImportError:
+    @dataclass(frozen=True, slots=True)
+    class PriceData:
+        token_pair: str
+        dex: str
+        price: int
+        liquidity: int
+        timestamp: float
+        block_number: int
 
 class DEXMonitor:
+    # Per-DEX monitor loops; start() runs the ones named in enabled_dexes
+    _MONITORS = {
+        'uniswap_v2': '_monitor_uniswap_v2',
+        'uniswap_v3': '_monitor_uniswap_v3',
+        'sushiswap': '_monitor_sushiswap',
+        'curve': '_monitor_curve'
+    }
+    
     def __init__(self, config: ConfigManager):
         self.config = config
         self.is_running = False
         self.price_cache = {}
         self.websocket_connections = {}
-        self.last_update = {}
+        self.price_version = 0  # bumped whenever a cached price, liquidity or block changes
+        self._expiry_heap = []  # (expires_at, dex, pair), one per cache write
         
         # DEX configurations
         self.dex_configs = config.get_dex_config()
         self.enabled_dexes = [name for name, cfg in self.dex_configs.items() if cfg.get('enabled', False)]
         
+        # Struct-of-arrays price store: one row per enabled DEX, one column per pair name,
+        # so prices[:, col] compares a pair across DEXs in a single vector op
+        self._dex_rows = {dex: row for row, dex in enumerate(self.enabled_dexes)}
+        self._pair_cols: Dict[str, int] = {}
+        shape = (len(self.enabled_dexes), config.get('dex_monitor.max_pairs', 64))
+        self.prices = np.full(shape, np.nan)
+        self.liquidity = np.zeros(shape)
+        self.timestamps = np.zeros(shape)
+        self.block_numbers = np.zeros(shape, dtype=np.int64)
+        
+        # Log subscriptions push updates when a WSS endpoint is configured; polling is the fallback
+        self.wss_url = config.get('network.wss_url')
+        
+        # Synthetic per-fetch latency for local testing only
+        self._simulate = config.get('dex_monitor.simulate', False)
+        
+        # Bounds in-flight price RPCs; ArbitrageEngine swaps in its shared one
+        self.rpc_semaphore = asyncio.Semaphore(config.get('network.max_concurrent_rpc', 100))
+        
+        unknown = [name for name in self.enabled_dexes if name not in self._MONITORS]
+        if unknown:
+            logger.warning(f"No monitor for enabled DEXs: {unknown}")
+        
         logger.info(f"DEXMonitor initialized for: {self.enabled_dexes}")
     
     async def start(self):
@@ -46,22 +101,11 @@ class DEXMonitor:
         self.is_running = True
         logger.info("🔍 Starting DEX monitoring...")
         
-        # Start monitoring tasks for each DEX
-        tasks = []
-        
-        if 'uniswap_v2' in self.enabled_dexes:
-            tasks.append(asyncio.create_task(self._monitor_uniswap_v2()))
-        
-        if 'uniswap_v3' in self.enabled_dexes:
-            tasks.append(asyncio.create_task(self._monitor_uniswap_v3()))
-        
-        if 'sushiswap' in self.enabled_dexes:
-            tasks.append(asyncio.create_task(self._monitor_sushiswap()))
-        
-        if 'curve' in self.enabled_dexes:
-            tasks.append(asyncio.create_task(self._monitor_curve()))
-        
-        # Start price aggregation task
+        # Start monitoring tasks for each DEX, plus price aggregation
+        tasks = [
+            asyncio.create_task(getattr(self, monitor)())
+            for name, monitor in self._MONITORS.items() if name in self.enabled_dexes
+        ]
         tasks.append(asyncio.create_task(self._aggregate_prices()))
         
         # Wait for all tasks
@@ -91,10 +135,14 @@ class DEXMonitor:
                 # Get top token pairs
                 pairs = await self._get_uniswap_v2_pairs()
                 
-                for pair in pairs:
-                    price_data = await self._fetch_uniswap_v2_price(pair)
-                    if price_data:
-                        self._update_price_cache('uniswap_v2', pair, price_data)
+                # Event-driven while the subscription holds; returns to polling if it drops
+                await self._stream_prices('uniswap_v2', pairs, self._fetch_uniswap_v2_price, SYNC_TOPIC)
+                
+                results = await asyncio.gather(
+                    *[self._fetch_uniswap_v2_price(pair) for pair in pairs],
+                    return_exceptions=True
+                )
+                self._store_results('uniswap_v2', pairs, results)
                 
                 await asyncio.sleep(1)  # Update every second
                 
@@ -111,10 +159,14 @@ class DEXMonitor:
                 # Get top token pairs with different fee tiers
                 pairs = await self._get_uniswap_v3_pairs()
                 
-                for pair in pairs:
-                    price_data = await self._fetch_uniswap_v3_price(pair)
-                    if price_data:
-                        self._update_price_cache('uniswap_v3', pair, price_data)
+                # Event-driven while the subscription holds; returns to polling if it drops
+                await self._stream_prices('uniswap_v3', pairs, self._fetch_uniswap_v3_price, V3_SWAP_TOPIC)
+                
+                results = await asyncio.gather(
+                    *[self._fetch_uniswap_v3_price(pair) for pair in pairs],
+                    return_exceptions=True
+                )
+                self._store_results('uniswap_v3', pairs, results)
                 
                 await asyncio.sleep(1)
                 
@@ -130,10 +182,14 @@ class DEXMonitor:
             try:
                 pairs = await self._get_sushiswap_pairs()
                 
-                for pair in pairs:
-                    price_data = await self._fetch_sushiswap_price(pair)
-                    if price_data:
-                        self._update_price_cache('sushiswap', pair, price_data)
+                # Event-driven while the subscription holds; returns to polling if it drops
+                await self._stream_prices('sushiswap', pairs, self._fetch_sushiswap_price, SYNC_TOPIC)
+                
+                results = await asyncio.gather(
+                    *[self._fetch_sushiswap_price(pair) for pair in pairs],
+                    return_exceptions=True
+                )
+                self._store_results('sushiswap', pairs, results)
                 
                 await asyncio.sleep(1)
                 
@@ -149,10 +205,11 @@ class DEXMonitor:
             try:
                 pools = await self._get_curve_pools()
                 
-                for pool in pools:
-                    price_data = await self._fetch_curve_price(pool)
-                    if price_data:
-                        self._update_price_cache('curve', pool, price_data)
+                results = await asyncio.gather(
+                    *[self._fetch_curve_price(pool) for pool in pools],
+                    return_exceptions=True
+                )
+                self._store_results('curve', pools, results)
                 
                 await asyncio.sleep(2)  # Curve updates less frequently
                 
@@ -164,14 +221,18 @@ class DEXMonitor:
         """Aggregate and clean price data"""
         while self.is_running:
             try:
-                # Remove stale price data (older than 30 seconds)
+                # Remove stale price data (older than 30 seconds), oldest expiry first
                 current_time = time.time()
-                stale_threshold = 30
+                heap = self._expiry_heap
                 
-                for dex in list(self.price_cache.keys()):
-                    for pair in list(self.price_cache[dex].keys()):
-                        if current_time - self.price_cache[dex][pair].timestamp > stale_threshold:
-                            del self.price_cache[dex][pair]
+                while heap and heap[0][0] < current_time:
+                    _, dex, pair = heapq.heappop(heap)
+                    entry = self.price_cache.get(dex, {}).get(pair)
+                    # A later write leaves its own heap entry; only evict if this one is still current
+                    if entry and current_time - entry.timestamp > STALE_AFTER:
+                        del self.price_cache[dex][pair]
+                        self.prices[self._dex_rows[dex], self._pair_cols[pair]] = np.nan
+                        self.price_version += 1
                 
                 await asyncio.sleep(10)  # Clean every 10 seconds
                 
@@ -179,13 +240,103 @@ class DEXMonitor:
                 logger.error(f"Price aggregation error: {e}")
                 await asyncio.sleep(10)
     
+    async def _stream_prices(self, dex: str, pairs: List[str], fetch, topic: str):
+        """Refresh pairs as their pool logs arrive; returns when the subscription drops"""
+        addresses = self.config.get(f'dexes.{dex}.pair_addresses', {})
+        by_address = {addresses[pair].lower(): pair for pair in pairs if pair in addresses}
+        if not self.wss_url or not by_address or not self.is_running:
+            return
+        
+        try:
+            async with websockets.connect(self.wss_url) as ws:
+                self.websocket_connections[dex] = ws
+                await ws.send(json.dumps({
+                    'jsonrpc': '2.0',
+                    'id': 1,
+                    'method': 'eth_subscribe',
+                    'params': ['logs', {'address': list(by_address), 'topics': [topic]}]
+                }))
+                reply = json.loads(await ws.recv())
+                if 'error' in reply:
+                    logger.warning(f"{dex} log subscription rejected: {reply['error']}")
+                    return
+                
+                logger.info(f"📡 {dex} subscribed to logs for {len(by_address)} pairs")
+                
+                async for message in ws:
+                    if not self.is_running:
+                        break
+                    
+                    log = json.loads(message).get('params', {}).get('result', {})
+                    pair = by_address.get(log.get('address', '').lower())
+                    if pair:
+                        # Only the pool that emitted the event is refreshed
+                        price_data = await fetch(pair)
+                        if price_data:
+                            self._update_price_cache(dex, pair, price_data)
+                
+        except (OSError, websockets.WebSocketException) as e:
+            logger.warning(f"{dex} log subscription dropped, falling back to polling: {e}")
+        finally:
+            self.websocket_connections.pop(dex, None)
+    
+    def _store_results(self, dex: str, pairs: List[str], results: List[Any]):
+        """Cache the prices from one gathered fetch round; failed pairs are skipped"""
+        batch = {}
+        for pair, price_data in zip(pairs, results):
+            if isinstance(price_data, Exception):
+                logger.debug(f"{dex} fetch failed for {pair}: {price_data}")
+            elif price_data:
+                batch[pair] = price_data
+        
+        if batch:
+            self._update_price_cache_bulk(dex, batch)
+    
+    def _pair_col(self, pair: str) -> int:
+        """Column for a pair name, doubling the arrays when they fill up"""
+        col = self._pair_cols.get(pair)
+        if col is None:
+            col = len(self._pair_cols)
+            if col == self.prices.shape[1]:
+                pad = ((0, 0), (0, col))
+                self.prices = np.pad(self.prices, pad, constant_values=np.nan)
+                self.liquidity = np.pad(self.liquidity, pad)
+                self.timestamps = np.pad(self.timestamps, pad)
+                self.block_numbers = np.pad(self.block_numbers, pad)
+            self._pair_cols[pair] = col
+        return col
+    
     def _update_price_cache(self, dex: str, pair: str, price_data: PriceData):
         """Update price cache with new data"""
-        if dex not in self.price_cache:
-            self.price_cache[dex] = {}
+        self._update_price_cache_bulk(dex, {pair: price_data})
+    
+    def _update_price_cache_bulk(self, dex: str, batch: Dict[str, PriceData]):
+        """Write one tick of a DEX's prices: array slots per pair, then a single dict update"""
+        row = self._dex_rows[dex]
+        cols = [self._pair_col(pair) for pair in batch]  # may grow the arrays, so bind them after
+        prices, liquidity, timestamps, block_numbers = self.prices, self.liquidity, self.timestamps, self.block_numbers
+        expiry_heap = self._expiry_heap
+        changed = False
+        
+        for col, (pair, price_data) in zip(cols, batch.items()):
+            price = price_data.price / PRICE_SCALE
+            pair_liquidity = price_data.liquidity / PRICE_SCALE
+            
+            # A NaN slot (never written or evicted) always compares unequal
+            if (prices[row, col] != price or liquidity[row, col] != pair_liquidity
+                    or block_numbers[row, col] != price_data.block_number):
+                changed = True
+            
+            prices[row, col] = price
+            liquidity[row, col] = pair_liquidity
+            timestamps[row, col] = price_data.timestamp
+            block_numbers[row, col] = price_data.block_number
+            heapq.heappush(expiry_heap, (price_data.timestamp + STALE_AFTER, dex, pair))
         
-        self.price_cache[dex][pair] = price_data
-        self.last_update[f"{dex}_{pair}"] = time.time()
+        if changed:
+            self.price_version += 1
+        
+        self.price_cache.setdefault(dex, {}).update(batch)
     
     async def get_latest_prices(self) -> Dict[str, Dict[str, PriceData]]:
         """Get latest price data for all monitored pairs"""
@@ -193,8 +344,16 @@ class DEXMonitor:
     
     async def get_price(self, dex: str, token_pair: str) -> Optional[PriceData]:
         """Get price for specific DEX and token pair"""
+        # The cached record keeps the exact fixed-point ints the float64 arrays can't
         return self.price_cache.get(dex, {}).get(token_pair)
     
+    def get_cross_dex_prices(self, token_pair: str) -> Optional[np.ndarray]:
+        """Prices for one pair on every enabled DEX (ordered as enabled_dexes, NaN where missing)"""
+        col = self._pair_cols.get(token_pair)
+        if col is None:
+            return None
+        return self.prices[:, col].copy()
+    
     async def _get_uniswap_v2_pairs(self) -> List[str]:
         """Get top Uniswap V2 trading pairs"""
         # This would query the Uniswap V2 subgraph or use direct contract calls
@@ -211,13 +370,15 @@ class DEXMonitor:
         """Fetch price data from Uniswap V2"""
         # This would make actual contract calls to get reserves and calculate price
         # For now, return simulated data
-        await asyncio.sleep(0.01)  # Simulate network delay
+        if self._simulate:
+            async with self.rpc_semaphore:
+                await asyncio.sleep(0.01)  # Simulate network delay
         
         return PriceData(
             token_pair=pair,
             dex='uniswap_v2',
-            price=Decimal('2000.50'),  # Simulated price
-            liquidity=Decimal('1000000'),  # Simulated liquidity
+            price=2000_50 * PRICE_SCALE // 100,  # Simulated price (2000.50)
+            liquidity=1_000_000 * PRICE_SCALE,  # Simulated liquidity
             timestamp=time.time(),
             block_number=18500000  # Simulated block number
         )
@@ -234,13 +395,15 @@ class DEXMonitor:
     
     async def _fetch_uniswap_v3_price(self, pair: str) -> Optional[PriceData]:
         """Fetch price data from Uniswap V3"""
-        await asyncio.sleep(0.01)
+        if self._simulate:
+            async with self.rpc_semaphore:
+                await asyncio.sleep(0.01)
         
         return PriceData(
             token_pair=pair,
             dex='uniswap_v3',
-            price=Decimal('2000.75'),
-            liquidity=Decimal('2000000'),
+            price=2000_75 * PRICE_SCALE // 100,
+            liquidity=2_000_000 * PRICE_SCALE,
             timestamp=time.time(),
             block_number=18500000
         )
@@ -256,13 +419,15 @@ class DEXMonitor:
     
     async def _fetch_sushiswap_price(self, pair: str) -> Optional[PriceData]:
         """Fetch price data from Sushiswap"""
-        await asyncio.sleep(0.01)
+        if self._simulate:
+            async with self.rpc_semaphore:
+                await asyncio.sleep(0.01)
         
         return PriceData(
             token_pair=pair,
             dex='sushiswap',
-            price=Decimal('2001.25'),
-            liquidity=Decimal('800000'),
+            price=2001_25 * PRICE_SCALE // 100,
+            liquidity=800_000 * PRICE_SCALE,
             timestamp=time.time(),
             block_number=18500000
         )
@@ -278,13 +443,15 @@ class DEXMonitor:
     
     async def _fetch_curve_price(self, pool: str) -> Optional[PriceData]:
         """Fetch price data from Curve"""
-        await asyncio.sleep(0.01)
+        if self._simulate:
+            async with self.rpc_semaphore:
+                await asyncio.sleep(0.01)
         
         return PriceData(
             token_pair=pool,
             dex='curve',
-            price=Decimal('1.0001'),  # Curve pools often have prices close to 1
-            liquidity=Decimal('5000000'),
+            price=1_0001 * PRICE_SCALE // 10_000,  # Curve pools often have prices close to 1
+            liquidity=5_000_000 * PRICE_SCALE,
             timestamp=time.time(),
             block_number=18500000
         )
@@ -301,12 +468,9 @@ class DEXMonitor:
         health = {}
         current_time = time.time()
 
-        for dex in self.enabled_dexes:
-            last_update_time = max(
-                [self.last_update.get(f"{dex}_{pair}", 0)
-                 for pair in self.price_cache.get(dex, {}).keys()],
-                default=0
-            )
+        for dex, row in self._dex_rows.items():
+            # Newest write across the DEX's row; unused columns hold 0
+            last_update_time = float(self.timestamps[row].max()) if self.timestamps.size else 0
 
             health[dex] = {
                 'is_connected': current_time - last_update_time < 60,
@@ -3,23 +3,44 @@ MEV Protection - Flashbots integration and RBF strategies
 """
 
 import asyncio
+import collections
+import heapq
 import json
 import time
+import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from core.logger import setup_logger
 from core.config_manager import ConfigManager
 
 logger = setup_logger(__name__)
 
-@dataclass
+STATUS_BATCH_INTERVAL = 0.2  # seconds between batched bundle status polls
+BUNDLE_EXPIRY = 300  # seconds before an unresolved bundle is given up on
+SUBMIT_BATCH_WINDOW = 0.005  # seconds private submissions wait to share one request
+
+# Placeholder results for the simulated relay/RPC calls, built once
+_FAKE_HASH_A = '0x' + 'a' * 64
+_FAKE_HASH_B = '0x' + 'b' * 64
+_FAKE_HASH_C = '0x' + 'c' * 64
+_FAKE_TX = {
+    'to': '0x' + '0' * 40,  # Contract address
+    'data': '0x' + '0' * 128,  # Transaction data
+    'value': '0',
+    'gas': '300000',
+    'gasPrice': str(50 * 10**9),  # 50 gwei
+    'nonce': 1
+}
+
+@dataclass(slots=True)
 class FlashbotsBundle:
     transactions: List[Dict[str, Any]]
     target_block: int
     max_priority_fee: int
     bundle_hash: str
     status: str  # 'pending', 'included', 'failed'
+    created_at: float = field(default_factory=time.time)
 
 class MEVProtection:
     def __init__(self, config: ConfigManager):
@@ -34,9 +55,24 @@ class MEVProtection:
         self.rbf_enabled = self.mev_config.get('rbf_enabled', True)
         self.max_priority_fee_gwei = self.mev_config.get('max_priority_fee_gwei', 50)
         
-        # Bundle tracking
-        self.pending_bundles = {}
-        self.bundle_history = []
+        # Bundle tracking; everything runs on one event loop and no await happens while
+        # these are iterated, so plain containers need no locking
+        self.pending_bundles: Dict[str, FlashbotsBundle] = {}
+        self.bundle_history = collections.deque(maxlen=100)
+        self._expiry_heap: List[Tuple[float, str]] = []  # (expires_at, bundle_hash)
+        
+        # Bundle status checks queued for the next batched poll, and the block it saw
+        self._status_waiters: Dict[str, asyncio.Future] = {}
+        self._status_poller: Optional[asyncio.Task] = None
+        self._latest_block = 0
+        self._rng = np.random.default_rng()
+        
+        # Private transactions queued for the next batched submission
+        self._submit_queue: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._submit_flusher: Optional[asyncio.Task] = None
+        
+        # Bounds in-flight relay/RPC calls; ArbitrageEngine swaps in its shared one
+        self.rpc_semaphore = asyncio.Semaphore(config.get('network.max_concurrent_rpc', 100))
         
         logger.info(f"MEVProtection initialized (flashbots={self.flashbots_enabled})")
     
@@ -124,6 +160,7 @@ class MEVProtection:
             )
             
             self.pending_bundles[bundle.bundle_hash] = bundle
+            heapq.heappush(self._expiry_heap, (bundle.created_at + BUNDLE_EXPIRY, bundle.bundle_hash))
             return bundle
             
         except Exception as e:
@@ -135,7 +172,8 @@ class MEVProtection:
         try:
             # This would make actual API call to Flashbots
             # For now, simulate submission
-            await asyncio.sleep(0.1)
+            async with self.rpc_semaphore:
+                await asyncio.sleep(0.1)
             
             logger.info(f"Submitted bundle {bundle.bundle_hash} for block {bundle.target_block}")
             return True
@@ -153,35 +191,71 @@ class MEVProtection:
             included, tx_hash = await self._check_bundle_status(bundle)
             
             if included:
-                bundle.status = 'included'
+                self._finish_bundle(bundle, 'included')
                 logger.info(f"Bundle {bundle.bundle_hash} included in block")
                 return True, tx_hash
             
-            # Check if target block has passed
-            current_block = await self._get_current_block()
-            if current_block > bundle.target_block + 2:
-                bundle.status = 'failed'
+            # Check if target block has passed (block number comes back with the status batch)
+            if self._latest_block > bundle.target_block + 2:
+                self._finish_bundle(bundle, 'failed')
                 logger.warning(f"Bundle {bundle.bundle_hash} missed target block")
                 return False, ""
             
             await asyncio.sleep(1)
         
-        bundle.status = 'failed'
+        self._finish_bundle(bundle, 'failed')
         logger.warning(f"Bundle {bundle.bundle_hash} timed out")
         return False, ""
     
+    def _finish_bundle(self, bundle: FlashbotsBundle, status: str):
+        """Record a bundle's outcome and move it from pending to history"""
+        bundle.status = status
+        if self.pending_bundles.pop(bundle.bundle_hash, None) is not None:
+            self.bundle_history.append(bundle)
+    
     async def _check_bundle_status(self, bundle: FlashbotsBundle) -> Tuple[bool, str]:
-        """Check if bundle was included in a block"""
-        # This would check the blockchain for transaction inclusion
-        # For now, simulate with random success
-        await asyncio.sleep(0.1)
+        """Check if bundle was included in a block, via the next batched status poll"""
+        waiter = self._status_waiters.get(bundle.bundle_hash)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._status_waiters[bundle.bundle_hash] = waiter
         
-        # Simulate 80% success rate
-        import random
-        if random.random() < 0.8:
-            return True, f"0x{'a' * 64}"
+        if self._status_poller is None or self._status_poller.done():
+            self._status_poller = asyncio.create_task(self._poll_bundle_statuses())
         
-        return False, ""
+        return await asyncio.shield(waiter)
+    
+    async def _poll_bundle_statuses(self):
+        """Resolve every queued status check from one batched request per tick"""
+        while self._status_waiters:
+            await asyncio.sleep(STATUS_BATCH_INTERVAL)
+            
+            waiters, self._status_waiters = self._status_waiters, {}
+            try:
+                self._latest_block, statuses = await self._fetch_bundle_statuses(list(waiters))
+            except Exception as e:
+                for waiter in waiters.values():
+                    waiter.set_exception(e)
+                continue
+            
+            for bundle_hash, waiter in waiters.items():
+                waiter.set_result(statuses.get(bundle_hash, (False, "")))
+    
+    async def _fetch_bundle_statuses(self, bundle_hashes: List[str]) -> Tuple[int, Dict[str, Tuple[bool, str]]]:
+        """Current block plus inclusion status for each bundle, in one round trip"""
+        # This would POST a single JSON-RPC batch: eth_blockNumber followed by one
+        # eth_getTransactionReceipt per bundle. For now, simulate with random success
+        async with self.rpc_semaphore:
+            await asyncio.sleep(0.1)
+        
+        # Simulate 80% success rate, one draw for the whole batch
+        included = self._rng.random(len(bundle_hashes)) < 0.8
+        statuses = {
+            bundle_hash: (True, _FAKE_HASH_A)
+            for bundle_hash, hit in zip(bundle_hashes, included) if hit
+        }
+        
+        return await self._get_current_block(), statuses
     
     async def _execute_private_mempool_trade(self, opportunity) -> Tuple[bool, str]:
         """Execute trade using private mempool"""
@@ -232,30 +306,52 @@ class MEVProtection:
         try:
             # This would build the actual transaction data
             # For now, return simulated transaction
-            return {
-                'to': '0x' + '0' * 40,  # Contract address
-                'data': '0x' + '0' * 128,  # Transaction data
-                'value': '0',
-                'gas': '300000',
-                'gasPrice': str(50 * 10**9),  # 50 gwei
-                'nonce': 1
-            }
+            return _FAKE_TX.copy()
             
         except Exception as e:
             logger.error(f"Transaction building error: {e}")
             return None
     
     async def _submit_private_transaction(self, tx: Dict[str, Any]) -> Tuple[bool, str]:
-        """Submit transaction to private mempool"""
+        """Submit transaction to private mempool, sharing a request with any sent alongside it"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._submit_queue.append((tx, waiter))
+        
+        if self._submit_flusher is None or self._submit_flusher.done():
+            self._submit_flusher = asyncio.create_task(self._flush_private_submissions())
+        
+        return await asyncio.shield(waiter)
+    
+    async def _flush_private_submissions(self):
+        """Send everything queued during each batch window as one request"""
+        while self._submit_queue:
+            await asyncio.sleep(SUBMIT_BATCH_WINDOW)
+            
+            batch, self._submit_queue = self._submit_queue, []
+            try:
+                results = await self._send_private_batch([tx for tx, _ in batch])
+            except Exception as e:
+                for _, waiter in batch:
+                    waiter.set_exception(e)
+                continue
+            
+            for (_, waiter), result in zip(batch, results):
+                waiter.set_result(result)
+    
+    async def _send_private_batch(self, txs: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+        """Submit several transactions to the private mempool in one round trip"""
+        # This would POST a single JSON-RPC batch with one send call per transaction
         # Simulate private mempool submission
-        await asyncio.sleep(0.5)
-        return True, f"0x{'b' * 64}"
+        async with self.rpc_semaphore:
+            await asyncio.sleep(0.5)
+        return [(True, _FAKE_HASH_B)] * len(txs)
     
     async def _submit_rbf_transaction(self, tx: Dict[str, Any]) -> Tuple[bool, str]:
         """Submit RBF-enabled transaction"""
         # Simulate RBF transaction submission
-        await asyncio.sleep(0.3)
-        return True, f"0x{'c' * 64}"
+        async with self.rpc_semaphore:
+            await asyncio.sleep(0.3)
+        return True, _FAKE_HASH_C
     
     async def _monitor_rbf_transaction(self, tx_hash: str):
         """Monitor RBF transaction and replace if necessary"""
@@ -273,21 +369,16 @@ class MEVProtection:
         """Monitor pending Flashbots bundles"""
         while self.is_running:
             try:
-                # Clean up old bundles
+                # Clean up bundles that never resolved (5 minutes old), oldest first;
+                # bundles that already resolved are no longer pending and are skipped
                 current_time = time.time()
-                expired_bundles = []
-                
-                for bundle_hash, bundle in self.pending_bundles.items():
-                    if current_time - bundle.target_block > 300:  # 5 minutes old
-                        expired_bundles.append(bundle_hash)
-                
-                for bundle_hash in expired_bundles:
-                    bundle = self.pending_bundles.pop(bundle_hash)
-                    self.bundle_history.append(bundle)
+                expiry_heap = self._expiry_heap
                 
-                # Keep only last 100 bundles in history
-                if len(self.bundle_history) > 100:
-                    self.bundle_history = self.bundle_history[-100:]
+                while expiry_heap and expiry_heap[0][0] <= current_time:
+                    _, bundle_hash = heapq.heappop(expiry_heap)
+                    bundle = self.pending_bundles.get(bundle_hash)
+                    if bundle:
+                        self._finish_bundle(bundle, 'failed')
                 
                 await asyncio.sleep(10)
                 
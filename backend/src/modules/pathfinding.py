@@ -4,18 +4,101 @@ Pathfinding Engine - Optimal route discovery using 0x, 1inch, and Paraswap
 
 import asyncio
 import aiohttp
+import heapq
+import json
 import time
+from operator import attrgetter
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from decimal import Decimal
+from yarl import URL
 
 from core.logger import setup_logger
 from core.config_manager import ConfigManager
 from core.arbitrage_engine import ArbitrageOpportunity
 
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# aiodns lets aiohttp resolve aggregator hostnames on the event loop instead of
+# getaddrinfo in a thread pool
+try:
+    import aiodns  # noqa: F401
+    _async_resolver = True
+except ImportError:
+    _async_resolver = False
+
 logger = setup_logger(__name__)
 
-@dataclass
+GAS_PRICE_WEI = 50 * 10**9  # 50 gwei
+TOP_OPPORTUNITIES = 10  # opportunities returned per scan
+
+# Back-to-back scans re-quote the same pairs; reuse a quote for this long
+QUOTE_TTL = 0.5  # seconds
+QUOTE_CACHE_SIZE = 4096
+QUOTE_AMOUNT_BUCKET_BITS = 20  # amounts within ~1e6 wei share a cache entry
+
+# C-level sort key for picking the best quote
+_AMOUNT_OUT = attrgetter('amount_out')
+
+# Quote responses are scanned for just (amount_out, gas_estimate): msgspec decodes those
+# fields into typed structs in one pass (strict=False accepts the APIs' numeric strings),
+# with a plain JSON parse as the fallback
+try:
+    import msgspec
+    
+    class ZeroxQuote(msgspec.Struct):
+        buyAmount: int
+        gas: int = 150000
+    
+    class OneInchQuote(msgspec.Struct):
+        toTokenAmount: int
+        estimatedGas: int = 200000
+    
+    class ParaswapRoute(msgspec.Struct):
+        destAmount: int
+        gasCost: int = 180000
+    
+    class ParaswapPrices(msgspec.Struct):
+        priceRoute: Optional[ParaswapRoute] = None
+    
+    _0x_decoder = msgspec.json.Decoder(ZeroxQuote, strict=False)
+    _1inch_decoder = msgspec.json.Decoder(OneInchQuote, strict=False)
+    _paraswap_decoder = msgspec.json.Decoder(ParaswapPrices, strict=False)
+    
+    def _parse_0x_quote(body: bytes) -> Tuple[int, int]:
+        quote = _0x_decoder.decode(body)
+        return quote.buyAmount, quote.gas
+    
+    def _parse_1inch_quote(body: bytes) -> Tuple[int, int]:
+        quote = _1inch_decoder.decode(body)
+        return quote.toTokenAmount, quote.estimatedGas
+    
+    def _parse_paraswap_quote(body: bytes) -> Optional[Tuple[int, int]]:
+        route = _paraswap_decoder.decode(body).priceRoute
+        return (route.destAmount, route.gasCost) if route else None
+except ImportError:
+    def _parse_0x_quote(body: bytes) -> Tuple[int, int]:
+        data = _json_loads(body)
+        return int(data['buyAmount']), int(data.get('gas', 150000))
+    
+    def _parse_1inch_quote(body: bytes) -> Tuple[int, int]:
+        data = _json_loads(body)
+        return int(data['toTokenAmount']), int(data.get('estimatedGas', 200000))
+    
+    def _parse_paraswap_quote(body: bytes) -> Optional[Tuple[int, int]]:
+        route = _json_loads(body).get('priceRoute')
+        return (int(route['destAmount']), int(route.get('gasCost', 180000))) if route else None
+
+@dataclass(slots=True, frozen=True)
 class RouteQuote:
     aggregator: str
     token_in: str
@@ -23,8 +106,13 @@ class RouteQuote:
     amount_in: int
     amount_out: int
     gas_estimate: int
-    route_data: Dict[str, Any]
+    raw_response: bytes
     confidence_score: float
+    
+    @property
+    def route_data(self) -> Dict[str, Any]:
+        """Full aggregator response, parsed only for the quotes that win"""
+        return _json_loads(self.raw_response)
 
 class PathfindingEngine:
     def __init__(self, config: ConfigManager):
@@ -39,6 +127,29 @@ class PathfindingEngine:
         # Trading parameters
         self.min_profit_wei = int(config.get('trading.min_profit_wei'))
         self.slippage_tolerance = config.get('trading.slippage_tolerance', 0.005)
+        # Trade sizes, profit and gas are all in the base asset, so searches start from it
+        self.base_token = config.get('trading.base_token', 'WETH')
+        
+        # Pairs are quoted concurrently; this caps how many are in flight against aggregator rate limits
+        self._pair_semaphore = asyncio.Semaphore(config.get('pathfinding.max_concurrent_pairs', 32))
+        
+        # Pair name -> its (token_a, token_b) split; names are few and stable, prices churn
+        self._pair_tokens: Dict[str, Optional[Tuple[str, str]]] = {}
+        
+        # Quote fetchers for the enabled aggregators, resolved once instead of per call
+        quote_getters = {
+            '0x': self._get_0x_quote,
+            '1inch': self._get_1inch_quote,
+            'paraswap': self._get_paraswap_quote
+        }
+        self._quote_getters = tuple(
+            (name, fetch) for name, fetch in quote_getters.items() if name in self.enabled_aggregators
+        )
+        
+        # (aggregator, token_in, token_out, amount bucket) -> (expires_at, quote), oldest first,
+        # plus the fetches already running for a key
+        self._quote_cache: Dict[tuple, Tuple[float, Optional[RouteQuote]]] = {}
+        self._quotes_inflight: Dict[tuple, asyncio.Future] = {}
         
         logger.info(f"PathfindingEngine initialized with aggregators: {self.enabled_aggregators}")
     
@@ -48,7 +159,42 @@ class PathfindingEngine:
             return
         
         self.is_running = True
-        self.session = aiohttp.ClientSession()
+        
+        # Run new tasks eagerly up to their first await (Python 3.12+), so quotes that
+        # return without I/O skip a trip through the scheduler. Left alone if the app
+        # already installed a task factory
+        loop = asyncio.get_running_loop()
+        eager_task_factory = getattr(asyncio, 'eager_task_factory', None)
+        if eager_task_factory and loop.get_task_factory() is None:
+            loop.set_task_factory(eager_task_factory)
+        
+        # Pooled keep-alive connections to the aggregators; quotes older than 2s are useless
+        connector = aiohttp.TCPConnector(
+            resolver=aiohttp.AsyncResolver() if _async_resolver else None,
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=2.0),
+            json_serialize=_json_dumps
+        )
+        
+        # Quote endpoints and auth headers are fixed for the session's lifetime
+        self._0x_url = URL(self.aggregators['0x']['api_url']) / 'swap' / 'v1' / 'quote'
+        self._1inch_url = URL(self.aggregators['1inch']['api_url']) / 'quote'
+        self._paraswap_url = URL(self.aggregators['paraswap']['api_url']) / 'prices'
+        
+        self._0x_headers = {}
+        if self.aggregators['0x'].get('api_key'):
+            self._0x_headers['0x-api-key'] = self.aggregators['0x']['api_key']
+        
+        self._1inch_headers = {}
+        if self.aggregators['1inch'].get('api_key'):
+            self._1inch_headers['Authorization'] = f"Bearer {self.aggregators['1inch']['api_key']}"
         
         logger.info("🛣️ Starting pathfinding engine...")
     
@@ -66,25 +212,37 @@ class PathfindingEngine:
     async def find_opportunities(self, price_data: Dict[str, Dict[str, Any]], 
                                trade_amount_wei: int, min_profit_wei: int) -> List[ArbitrageOpportunity]:
         """Find arbitrage opportunities using multiple aggregators"""
-        opportunities = []
+        # Min-heap of the best TOP_OPPORTUNITIES so far; seq breaks profit ties
+        top: List[Tuple[int, int, ArbitrageOpportunity]] = []
         
         try:
             # Get common token pairs
             token_pairs = self._extract_token_pairs(price_data)
             
-            # Check each pair for arbitrage opportunities
-            for token_in, token_out in token_pairs:
-                opportunity = await self._find_pair_opportunity(
-                    token_in, token_out, trade_amount_wei, min_profit_wei
-                )
-                
-                if opportunity:
-                    opportunities.append(opportunity)
+            # Check every pair at once and rank results as they arrive
+            searches = [
+                self._find_pair_opportunity(token_in, token_out, trade_amount_wei, min_profit_wei)
+                for token_in, token_out in token_pairs
+            ]
             
-            # Sort by profit potential
-            opportunities.sort(key=lambda x: x.net_profit_wei, reverse=True)
+            for seq, search in enumerate(asyncio.as_completed(searches)):
+                try:
+                    opportunity = await search
+                except Exception as e:
+                    logger.warning(f"Pair search failed: {e}")
+                    continue
+                
+                if opportunity is None:
+                    continue
+                
+                entry = (opportunity.net_profit_wei, seq, opportunity)
+                if len(top) < TOP_OPPORTUNITIES:
+                    heapq.heappush(top, entry)
+                elif entry[0] > top[0][0]:
+                    heapq.heapreplace(top, entry)
             
-            return opportunities[:10]  # Return top 10 opportunities
+            # Most profitable first
+            return [opportunity for _, _, opportunity in sorted(top, reverse=True)]
             
         except Exception as e:
             logger.error(f"Error finding opportunities: {e}")
@@ -93,16 +251,21 @@ class PathfindingEngine:
     async def _find_pair_opportunity(self, token_in: str, token_out: str, 
                                    amount_in: int, min_profit_wei: int) -> Optional[ArbitrageOpportunity]:
         """Find arbitrage opportunity for a specific token pair"""
+        async with self._pair_semaphore:
+            return await self._search_pair(token_in, token_out, amount_in, min_profit_wei)
+    
+    async def _search_pair(self, token_in: str, token_out: str,
+                           amount_in: int, min_profit_wei: int) -> Optional[ArbitrageOpportunity]:
+        """Quote one pair both ways and price the round trip"""
         try:
             # Get quotes from all enabled aggregators
             buy_quotes = await self._get_aggregator_quotes(token_in, token_out, amount_in)
-            sell_quotes = await self._get_aggregator_quotes(token_out, token_in, None)  # Will be calculated based on buy amount
             
-            if not buy_quotes or not sell_quotes:
+            if not buy_quotes:
                 return None
             
             # Find best buy and sell routes
-            best_buy = max(buy_quotes, key=lambda x: x.amount_out)
+            best_buy = max(buy_quotes, key=_AMOUNT_OUT)
             
             # Calculate sell amount based on best buy output
             sell_amount = int(best_buy.amount_out * (1 - self.slippage_tolerance))
@@ -111,11 +274,14 @@ class PathfindingEngine:
             if not sell_quotes_adjusted:
                 return None
             
-            best_sell = max(sell_quotes_adjusted, key=lambda x: x.amount_out)
+            best_sell = max(sell_quotes_adjusted, key=_AMOUNT_OUT)
             
-            # Calculate profit
+            # Calculate profit; gas only ever lowers it, so skip that math for losing round trips
             profit_wei = best_sell.amount_out - amount_in
-            gas_cost_wei = (best_buy.gas_estimate + best_sell.gas_estimate) * 50 * 10**9  # 50 gwei gas price
+            if profit_wei < min_profit_wei:
+                return None
+            
+            gas_cost_wei = (best_buy.gas_estimate + best_sell.gas_estimate) * GAS_PRICE_WEI
             net_profit_wei = profit_wei - gas_cost_wei
             
             if net_profit_wei < min_profit_wei:
@@ -148,38 +314,53 @@ class PathfindingEngine:
     async def _get_aggregator_quotes(self, token_in: str, token_out: str, 
                                    amount_in: Optional[int]) -> List[RouteQuote]:
         """Get quotes from all enabled aggregators"""
-        quotes = []
-        tasks = []
+        # Every aggregator needs an amount to quote; don't schedule calls that can't return one
+        if not amount_in:
+            return []
+        
+        # The quote methods log and swallow their own errors, so one aggregator
+        # failing never cancels the others' requests in the group
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self._cached_quote(name, fetch, token_in, token_out, amount_in))
+                for name, fetch in self._quote_getters
+            ]
         
-        if '0x' in self.enabled_aggregators:
-            tasks.append(self._get_0x_quote(token_in, token_out, amount_in))
+        return [task.result() for task in tasks if task.result() is not None]
+    
+    async def _cached_quote(self, aggregator: str, fetch, token_in: str, token_out: str,
+                            amount_in: int) -> Optional[RouteQuote]:
+        """Quote from the short-lived cache, else share one in-flight fetch per key"""
+        key = (aggregator, token_in, token_out, amount_in >> QUOTE_AMOUNT_BUCKET_BITS)
         
-        if '1inch' in self.enabled_aggregators:
-            tasks.append(self._get_1inch_quote(token_in, token_out, amount_in))
+        entry = self._quote_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
         
-        if 'paraswap' in self.enabled_aggregators:
-            tasks.append(self._get_paraswap_quote(token_in, token_out, amount_in))
+        task = self._quotes_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch(token_in, token_out, amount_in))
+            self._quotes_inflight[key] = task
+            task.add_done_callback(lambda done: self._store_quote(key, done))
         
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, RouteQuote):
-                    quotes.append(result)
-                elif isinstance(result, Exception):
-                    logger.warning(f"Aggregator quote failed: {result}")
+        # Shielded so one scan being cancelled doesn't cancel a fetch others are awaiting
+        return await asyncio.shield(task)
+    
+    def _store_quote(self, key: tuple, task: asyncio.Future):
+        """Cache a finished fetch (a None quote too, so a failing aggregator isn't hammered)"""
+        self._quotes_inflight.pop(key, None)
+        if task.cancelled() or task.exception():
+            return
         
-        return quotes
+        cache = self._quote_cache
+        cache.pop(key, None)
+        cache[key] = (time.monotonic() + QUOTE_TTL, task.result())
+        if len(cache) > QUOTE_CACHE_SIZE:
+            del cache[next(iter(cache))]
     
     async def _get_0x_quote(self, token_in: str, token_out: str, amount_in: Optional[int]) -> Optional[RouteQuote]:
         """Get quote from 0x API"""
         try:
-            if not amount_in:
-                return None
-            
-            config = self.aggregators['0x']
-            url = f"{config['api_url']}/swap/v1/quote"
-            
             params = {
                 'sellToken': token_in,
                 'buyToken': token_out,
@@ -187,22 +368,19 @@ class PathfindingEngine:
                 'slippagePercentage': str(self.slippage_tolerance)
             }
             
-            headers = {}
-            if config.get('api_key'):
-                headers['0x-api-key'] = config['api_key']
-            
-            async with self.session.get(url, params=params, headers=headers) as response:
+            async with self.session.get(self._0x_url, params=params, headers=self._0x_headers) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    body = await response.read()
+                    amount_out, gas_estimate = _parse_0x_quote(body)
                     
                     return RouteQuote(
                         aggregator='0x',
                         token_in=token_in,
                         token_out=token_out,
                         amount_in=amount_in,
-                        amount_out=int(data['buyAmount']),
-                        gas_estimate=int(data.get('gas', 150000)),
-                        route_data=data,
+                        amount_out=amount_out,
+                        gas_estimate=gas_estimate,
+                        raw_response=body,
                         confidence_score=0.9
                     )
                 else:
@@ -216,34 +394,25 @@ class PathfindingEngine:
     async def _get_1inch_quote(self, token_in: str, token_out: str, amount_in: Optional[int]) -> Optional[RouteQuote]:
         """Get quote from 1inch API"""
         try:
-            if not amount_in:
-                return None
-            
-            config = self.aggregators['1inch']
-            url = f"{config['api_url']}/quote"
-            
             params = {
                 'fromTokenAddress': token_in,
                 'toTokenAddress': token_out,
                 'amount': str(amount_in)
             }
             
-            headers = {}
-            if config.get('api_key'):
-                headers['Authorization'] = f"Bearer {config['api_key']}"
-            
-            async with self.session.get(url, params=params, headers=headers) as response:
+            async with self.session.get(self._1inch_url, params=params, headers=self._1inch_headers) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    body = await response.read()
+                    amount_out, gas_estimate = _parse_1inch_quote(body)
                     
                     return RouteQuote(
                         aggregator='1inch',
                         token_in=token_in,
                         token_out=token_out,
                         amount_in=amount_in,
-                        amount_out=int(data['toTokenAmount']),
-                        gas_estimate=int(data.get('estimatedGas', 200000)),
-                        route_data=data,
+                        amount_out=amount_out,
+                        gas_estimate=gas_estimate,
+                        raw_response=body,
                         confidence_score=0.85
                     )
                 else:
@@ -257,12 +426,6 @@ class PathfindingEngine:
     async def _get_paraswap_quote(self, token_in: str, token_out: str, amount_in: Optional[int]) -> Optional[RouteQuote]:
         """Get quote from Paraswap API"""
         try:
-            if not amount_in:
-                return None
-            
-            config = self.aggregators['paraswap']
-            url = f"{config['api_url']}/prices"
-            
             params = {
                 'srcToken': token_in,
                 'destToken': token_out,
@@ -273,20 +436,21 @@ class PathfindingEngine:
                 'network': '1'
             }
             
-            async with self.session.get(url, params=params) as response:
+            async with self.session.get(self._paraswap_url, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    price_route = data.get('priceRoute')
+                    body = await response.read()
+                    price_route = _parse_paraswap_quote(body)
                     
                     if price_route:
+                        amount_out, gas_estimate = price_route
                         return RouteQuote(
                             aggregator='paraswap',
                             token_in=token_in,
                             token_out=token_out,
                             amount_in=amount_in,
-                            amount_out=int(price_route['destAmount']),
-                            gas_estimate=int(price_route.get('gasCost', 180000)),
-                            route_data=data,
+                            amount_out=amount_out,
+                            gas_estimate=gas_estimate,
+                            raw_response=body,
                             confidence_score=0.8
                         )
                 else:
@@ -299,14 +463,21 @@ class PathfindingEngine:
     
     def _extract_token_pairs(self, price_data: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
         """Extract token pairs from price data"""
-        pairs = set()
+        pair_tokens = self._pair_tokens
+        names = {pair_name for dex_data in price_data.values() for pair_name in dex_data}
+        
+        for pair_name in names - pair_tokens.keys():
+            tokens = pair_name.split('/')
+            # One direction per pair: the search already prices the a -> b -> a round trip,
+            # so quoting b -> a -> b as well would double the requests for the same spread.
+            # The base token goes first, since amounts, profit and gas are denominated in it
+            if len(tokens) < 2:
+                pair_tokens[pair_name] = None
+            elif tokens[1] == self.base_token:
+                pair_tokens[pair_name] = (tokens[1], tokens[0])
+            else:
+                pair_tokens[pair_name] = (tokens[0], tokens[1])
         
-        for dex_data in price_data.values():
-            for pair_name in dex_data.keys():
-                if '/' in pair_name:
-                    tokens = pair_name.split('/')
-                    if len(tokens) >= 2:
-                        pairs.add((tokens[0], tokens[1]))
-                        pairs.add((tokens[1], tokens[0]))  # Both directions
+        pairs = {pair_tokens[pair_name] for pair_name in names} - {None}
         
         return list(pairs)[:20]  # Limit to top 20 pairs
@@ -6,11 +6,108 @@ Analyzes and predicts slippage risk for arbitrage trades
 import json
 import logging
 import math
+from enum import IntEnum
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, is_dataclass
 from datetime import datetime
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+def _to_json(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib_json_dumps(obj: Any, pretty: bool = False) -> str:
+    if pretty:
+        return json.dumps(obj, indent=2, default=_to_json)
+    return json.dumps(obj, separators=(',', ':'), default=_to_json)
+
+# Input is parsed with the stdlib json module: orjson reads integers wider than
+# 64 bits (wei amounts) as floats
+try:
+    import orjson
+    
+    def _json_dumps(obj: Any, pretty: bool = False) -> str:
+        # Dataclasses and datetimes serialize natively
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+        except orjson.JSONEncodeError:
+            # orjson refuses integers wider than 64 bits; json keeps them exact
+            return _stdlib_json_dumps(obj, pretty)
+except ImportError:
+    _json_dumps = _stdlib_json_dumps
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the slippage kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def _slippage_kernel(trade_amount, total_liquidity, reported_liquidity, depth_2_percent,
+                     volatility_multiplier, dex_multiplier, worst_case_multiplier):
+    """Return (predicted slippage, max slippage, price impact, liquidity score) for one trade
+
+    total_liquidity falls back to a $1M pool when unknown; reported_liquidity is 0 when unknown
+    """
+    # Calculate trade size as percentage of liquidity
+    trade_size_ratio = trade_amount / total_liquidity
+    
+    # Base slippage calculation using square root model, 1% base for 100% of liquidity,
+    # adjusted for volatility and DEX type and capped at 5%
+    base_slippage = math.sqrt(trade_size_ratio) * 0.01
+    predicted_slippage = min(base_slippage * volatility_multiplier * dex_multiplier, 0.05)
+    
+    # Worst case is a multiple of predicted, capped at 15%
+    max_slippage = min(predicted_slippage * worst_case_multiplier, 0.15)
+    
+    # Simple linear model: 50% of trade ratio as price impact, capped at 10%
+    price_impact = min(trade_size_ratio * 0.5, 0.1)
+    
+    # Score based on total liquidity ($10M = perfect score), adjusted for depth
+    liquidity_score = min(reported_liquidity / 10000000, 1.0)
+    if depth_2_percent > 0:
+        depth_ratio = depth_2_percent / reported_liquidity
+        if depth_ratio > 0.1:  # Good depth
+            liquidity_score *= 1.1
+        elif depth_ratio < 0.05:  # Poor depth
+            liquidity_score *= 0.9
+    
+    return predicted_slippage, max_slippage, price_impact, min(liquidity_score, 1.0)
+
+# Compile (or load the cached build) at import rather than on the first request
+_slippage_kernel(1.0, 1.0, 1.0, 0.1, 1.0, 1.0, 2.5)
+
+class Volatility(IntEnum):
+    """Market volatility levels; indexes the per-level tables below"""
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    OTHER = 3  # Unrecognized label
+
+VOLATILITY_LEVELS = MappingProxyType({level.name.lower(): level for level in Volatility if level is not Volatility.OTHER})
+
+# Slippage multipliers and prediction confidence by volatility level
+VOLATILITY_MULTIPLIERS = (0.8, 1.0, 1.5, 1.0)
+VOLATILITY_CONFIDENCE = (0.9, 0.7, 0.5, 0.5)
+
+# Slippage multipliers by DEX type
+DEX_MULTIPLIERS = MappingProxyType({
+    'uniswap_v3': 0.8,  # Concentrated liquidity
+    'uniswap_v2': 1.0,  # Standard AMM
+    'sushiswap': 1.0,   # Standard AMM
+    'curve': 0.7,       # Stable swaps
+    'balancer': 0.9     # Weighted pools
+})
+
+@dataclass(slots=True, frozen=True)
 class SlippageAnalysisInput:
     """Input structure for slippage analysis"""
     trade_amount: float
@@ -20,7 +117,7 @@ class SlippageAnalysisInput:
     market_conditions: Dict[str, Any]
     historical_slippage: Optional[List[Dict[str, Any]]] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SlippageAnalysisOutput:
     """Output structure for slippage analysis"""
     predicted_slippage: float
@@ -39,9 +136,6 @@ class SlippageRiskAgent:
     Output: Slippage predictions and risk assessment
     """
     
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        
     def run(self, input_data: SlippageAnalysisInput) -> SlippageAnalysisOutput:
         """
         Main execution function - Claude-style interface
@@ -53,51 +147,45 @@ class SlippageRiskAgent:
             SlippageAnalysisOutput with slippage predictions
         """
         try:
-            # Calculate predicted slippage
-            predicted_slippage = self._calculate_predicted_slippage(
-                input_data.trade_amount,
-                input_data.liquidity_data,
-                input_data.market_conditions
-            )
+            # Unpack the input dicts once; helpers take plain values
+            liquidity_data = input_data.liquidity_data
+            volatility = VOLATILITY_LEVELS.get(input_data.market_conditions.get('volatility', 'normal'), Volatility.OTHER)
+            pool_liquidity = float(liquidity_data.get('total_liquidity', 1000000))
+            reported_liquidity = float(liquidity_data.get('total_liquidity', 0))
             
-            # Calculate maximum possible slippage
-            max_slippage = self._calculate_max_slippage(
-                input_data.trade_amount,
-                input_data.liquidity_data,
-                input_data.market_conditions
+            # Maximum slippage is typically 2-3x predicted, more under market stress
+            worst_case_multiplier = 2.5 * 1.5 if volatility == Volatility.HIGH else 2.5
+            
+            # Slippage, worst case, price impact and liquidity score in one kernel call
+            predicted_slippage, max_slippage, price_impact_estimate, liquidity_score = _slippage_kernel(
+                float(input_data.trade_amount),
+                pool_liquidity,
+                reported_liquidity,
+                float(liquidity_data.get('depth_2_percent', 0)),
+                VOLATILITY_MULTIPLIERS[volatility],
+                DEX_MULTIPLIERS.get(liquidity_data.get('dex_type', 'amm'), 1.0),
+                worst_case_multiplier
             )
             
             # Assess confidence level
             confidence_level = self._assess_confidence_level(
-                input_data.liquidity_data,
+                reported_liquidity,
                 input_data.historical_slippage,
-                input_data.market_conditions
+                volatility
             )
             
             # Determine risk level
             risk_level = self._determine_risk_level(predicted_slippage, max_slippage, confidence_level)
             
             # Calculate recommended max trade size
-            recommended_max_trade_size = self._calculate_recommended_trade_size(
-                input_data.liquidity_data,
-                input_data.market_conditions
-            )
-            
-            # Calculate liquidity score
-            liquidity_score = self._calculate_liquidity_score(input_data.liquidity_data)
-            
-            # Estimate price impact
-            price_impact_estimate = self._estimate_price_impact(
-                input_data.trade_amount,
-                input_data.liquidity_data
-            )
+            recommended_max_trade_size = self._calculate_recommended_trade_size(pool_liquidity, volatility)
             
             # Generate execution recommendations
             execution_recommendations = self._generate_execution_recommendations(
                 predicted_slippage,
                 max_slippage,
                 liquidity_score,
-                input_data.market_conditions
+                volatility
             )
             
             return SlippageAnalysisOutput(
@@ -112,83 +200,31 @@ class SlippageRiskAgent:
             )
             
         except Exception as e:
-            self.logger.error(f"Slippage analysis failed: {e}")
+            logger.error(f"Slippage analysis failed: {e}")
             raise
     
-    def _calculate_predicted_slippage(self, trade_amount: float, liquidity_data: Dict[str, Any], market_conditions: Dict[str, Any]) -> float:
-        """Calculate predicted slippage based on liquidity and market conditions"""
-        
-        # Get liquidity metrics
-        total_liquidity = liquidity_data.get('total_liquidity', 1000000)
-        depth_2_percent = liquidity_data.get('depth_2_percent', 100000)
-        
-        # Calculate trade size as percentage of liquidity
-        trade_size_ratio = trade_amount / total_liquidity
-        
-        # Base slippage calculation using square root model
-        base_slippage = math.sqrt(trade_size_ratio) * 0.01  # 1% base for 100% of liquidity
-        
-        # Adjust for market volatility
-        volatility_multiplier = self._get_volatility_multiplier(market_conditions.get('volatility', 'normal'))
-        
-        # Adjust for DEX type
-        dex_multiplier = self._get_dex_multiplier(liquidity_data.get('dex_type', 'amm'))
-        
-        # Calculate final predicted slippage
-        predicted_slippage = base_slippage * volatility_multiplier * dex_multiplier
-        
-        # Cap at reasonable maximum
-        return min(predicted_slippage, 0.05)  # Max 5% slippage
-    
-    def _calculate_max_slippage(self, trade_amount: float, liquidity_data: Dict[str, Any], market_conditions: Dict[str, Any]) -> float:
-        """Calculate maximum possible slippage in worst-case scenario"""
-        
-        predicted_slippage = self._calculate_predicted_slippage(trade_amount, liquidity_data, market_conditions)
-        
-        # Maximum slippage is typically 2-3x predicted in worst case
-        worst_case_multiplier = 2.5
-        
-        # Adjust for market stress conditions
-        if market_conditions.get('volatility') == 'high':
-            worst_case_multiplier *= 1.5
-        
-        max_slippage = predicted_slippage * worst_case_multiplier
-        
-        # Cap at reasonable maximum
-        return min(max_slippage, 0.15)  # Max 15% slippage
-    
-    def _assess_confidence_level(self, liquidity_data: Dict[str, Any], historical_slippage: Optional[List[Dict[str, Any]]], market_conditions: Dict[str, Any]) -> float:
+    def _assess_confidence_level(self, total_liquidity: float, historical_slippage: Optional[List[Dict[str, Any]]], volatility: Volatility) -> float:
         """Assess confidence level in slippage predictions (0-1)"""
         
-        confidence_factors = []
-        
         # Liquidity depth confidence
-        total_liquidity = liquidity_data.get('total_liquidity', 0)
         if total_liquidity > 1000000:  # $1M+
-            confidence_factors.append(0.9)
+            liquidity_confidence = 0.9
         elif total_liquidity > 100000:  # $100K+
-            confidence_factors.append(0.7)
+            liquidity_confidence = 0.7
         else:
-            confidence_factors.append(0.5)
+            liquidity_confidence = 0.5
         
         # Historical data confidence
-        if historical_slippage and len(historical_slippage) > 10:
-            confidence_factors.append(0.8)
-        elif historical_slippage and len(historical_slippage) > 5:
-            confidence_factors.append(0.6)
+        history = len(historical_slippage) if historical_slippage else 0
+        if history > 10:
+            history_confidence = 0.8
+        elif history > 5:
+            history_confidence = 0.6
         else:
-            confidence_factors.append(0.4)
+            history_confidence = 0.4
         
         # Market stability confidence
-        volatility = market_conditions.get('volatility', 'normal')
-        if volatility == 'low':
-            confidence_factors.append(0.9)
-        elif volatility == 'normal':
-            confidence_factors.append(0.7)
-        else:
-            confidence_factors.append(0.5)
-        
-        return sum(confidence_factors) / len(confidence_factors)
+        return (liquidity_confidence + history_confidence + VOLATILITY_CONFIDENCE[volatility]) / 3
     
     def _determine_risk_level(self, predicted_slippage: float, max_slippage: float, confidence_level: float) -> str:
         """Determine overall risk level"""
@@ -200,53 +236,21 @@ class SlippageRiskAgent:
         else:
             return 'HIGH'
     
-    def _calculate_recommended_trade_size(self, liquidity_data: Dict[str, Any], market_conditions: Dict[str, Any]) -> float:
+    def _calculate_recommended_trade_size(self, total_liquidity: float, volatility: Volatility) -> float:
         """Calculate recommended maximum trade size to minimize slippage"""
         
-        total_liquidity = liquidity_data.get('total_liquidity', 1000000)
-        
         # Conservative approach: use 1-5% of total liquidity
         base_percentage = 0.02  # 2%
         
         # Adjust based on market conditions
-        if market_conditions.get('volatility') == 'low':
+        if volatility == Volatility.LOW:
             base_percentage *= 1.5
-        elif market_conditions.get('volatility') == 'high':
+        elif volatility == Volatility.HIGH:
             base_percentage *= 0.5
         
         return total_liquidity * base_percentage
     
-    def _calculate_liquidity_score(self, liquidity_data: Dict[str, Any]) -> float:
-        """Calculate liquidity score (0-1)"""
-        
-        total_liquidity = liquidity_data.get('total_liquidity', 0)
-        depth_2_percent = liquidity_data.get('depth_2_percent', 0)
-        
-        # Score based on total liquidity
-        liquidity_score = min(total_liquidity / 10000000, 1.0)  # $10M = perfect score
-        
-        # Adjust based on depth
-        if depth_2_percent > 0:
-            depth_ratio = depth_2_percent / total_liquidity
-            if depth_ratio > 0.1:  # Good depth
-                liquidity_score *= 1.1
-            elif depth_ratio < 0.05:  # Poor depth
-                liquidity_score *= 0.9
-        
-        return min(liquidity_score, 1.0)
-    
-    def _estimate_price_impact(self, trade_amount: float, liquidity_data: Dict[str, Any]) -> float:
-        """Estimate price impact of the trade"""
-        
-        total_liquidity = liquidity_data.get('total_liquidity', 1000000)
-        
-        # Simple linear model for price impact
-        impact_ratio = trade_amount / total_liquidity
-        price_impact = impact_ratio * 0.5  # 50% of trade ratio as price impact
-        
-        return min(price_impact, 0.1)  # Cap at 10%
-    
-    def _generate_execution_recommendations(self, predicted_slippage: float, max_slippage: float, liquidity_score: float, market_conditions: Dict[str, Any]) -> List[str]:
+    def _generate_execution_recommendations(self, predicted_slippage: float, max_slippage: float, liquidity_score: float, volatility: Volatility) -> List[str]:
         """Generate execution recommendations based on analysis"""
         
         recommendations = []
@@ -260,7 +264,7 @@ class SlippageRiskAgent:
         if liquidity_score < 0.5:
             recommendations.append("Wait for better liquidity conditions")
         
-        if market_conditions.get('volatility') == 'high':
+        if volatility == Volatility.HIGH:
             recommendations.append("Consider delaying trade until volatility decreases")
         
         if predicted_slippage <= 0.005:
@@ -270,34 +274,18 @@ class SlippageRiskAgent:
             recommendations.append("Proceed with standard execution parameters")
         
         return recommendations
-    
-    def _get_volatility_multiplier(self, volatility: str) -> float:
-        """Get volatility multiplier for slippage calculation"""
-        multipliers = {
-            'low': 0.8,
-            'normal': 1.0,
-            'high': 1.5
-        }
-        return multipliers.get(volatility, 1.0)
-    
-    def _get_dex_multiplier(self, dex_type: str) -> float:
-        """Get DEX type multiplier for slippage calculation"""
-        multipliers = {
-            'uniswap_v3': 0.8,  # Concentrated liquidity
-            'uniswap_v2': 1.0,  # Standard AMM
-            'sushiswap': 1.0,   # Standard AMM
-            'curve': 0.7,       # Stable swaps
-            'balancer': 0.9     # Weighted pools
-        }
-        return multipliers.get(dex_type, 1.0)
+
+# Agents are stateless, so every call shares one instance
+_AGENT = SlippageRiskAgent()
 
 # Claude-style execution function
-def run(input_json: str) -> str:
+def run(input_json: str, pretty: bool = False) -> str:
     """
     Claude-style execution interface
     
     Args:
         input_json: JSON string with SlippageAnalysisInput data
+        pretty: Indent the output for reading; compact otherwise
         
     Returns:
         JSON string with SlippageAnalysisOutput data
@@ -308,22 +296,10 @@ def run(input_json: str) -> str:
         input_data = SlippageAnalysisInput(**input_data_dict)
         
         # Run analysis
-        agent = SlippageRiskAgent()
-        result = agent.run(input_data)
-        
-        # Convert result to dict for JSON serialization
-        result_dict = {
-            'predicted_slippage': result.predicted_slippage,
-            'max_slippage': result.max_slippage,
-            'confidence_level': result.confidence_level,
-            'risk_level': result.risk_level,
-            'recommended_max_trade_size': result.recommended_max_trade_size,
-            'liquidity_score': result.liquidity_score,
-            'price_impact_estimate': result.price_impact_estimate,
-            'execution_recommendations': result.execution_recommendations
-        }
+        result = _AGENT.run(input_data)
         
-        return json.dumps(result_dict, indent=2)
+        # Output dataclass serializes field by field
+        return _json_dumps(result, pretty)
         
     except Exception as e:
         error_result = {
@@ -337,7 +313,7 @@ def run(input_json: str) -> str:
             'price_impact_estimate': 0.0,
             'execution_recommendations': ['Error in analysis - do not execute']
         }
-        return json.dumps(error_result, indent=2)
+        return _json_dumps(error_result, pretty)
 
 if __name__ == "__main__":
     # Example usage
@@ -355,5 +331,5 @@ if __name__ == "__main__":
         }
     }
     
-    result = run(json.dumps(sample_input))
+    result = run(json.dumps(sample_input), pretty=True)
     print(result)
@@ -5,11 +5,134 @@ Analyzes arbitrage opportunities and provides trade recommendations
 
 import json
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, asdict, is_dataclass
 from datetime import datetime, timedelta
 
-@dataclass
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _to_json(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib_json_dumps(obj: Any, pretty: bool = False) -> str:
+    if pretty:
+        return json.dumps(obj, indent=2, default=_to_json)
+    return json.dumps(obj, separators=(',', ':'), default=_to_json)
+
+# Input is parsed with the stdlib json module: orjson reads integers wider than
+# 64 bits (wei amounts) as floats
+try:
+    import orjson
+    
+    def _json_dumps(obj: Any, pretty: bool = False) -> str:
+        # Dataclasses and datetimes serialize natively
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+        except orjson.JSONEncodeError:
+            # orjson refuses integers wider than 64 bits; json keeps them exact
+            return _stdlib_json_dumps(obj, pretty)
+except ImportError:
+    _json_dumps = _stdlib_json_dumps
+
+# Per-opportunity confidence: mean of price stability, liquidity, execution speed,
+# market volatility and historical success scores
+try:
+    from numba import guvectorize
+    
+    # Explicit signature, so this compiles (or loads from cache) at import
+    @guvectorize(['void(float64[:], float64[:], float64[:], boolean[:], boolean[:], float64, float64[:], float64[:])'],
+                 '(n),(n),(n),(n),(n),(),(n)->(n)', nopython=True, cache=True)
+    def _confidence_scores(price_a, price_b, volume, fast_a, fast_b, volatility_score, historical, out):
+        for i in range(price_a.shape[0]):
+            # Price stability: >5% difference might be unstable, >2% is borderline
+            price_diff_pct = abs(price_a[i] - price_b[i]) / max(price_a[i], price_b[i])
+            if price_diff_pct > 0.05:
+                stability = 0.6
+            elif price_diff_pct > 0.02:
+                stability = 0.8
+            else:
+                stability = 0.9
+            
+            # Liquidity: high, medium, low volume
+            if volume[i] > 100000:
+                liquidity = 0.9
+            elif volume[i] > 10000:
+                liquidity = 0.7
+            else:
+                liquidity = 0.5
+            
+            # Execution speed: both, one or neither leg on a fast DEX
+            if fast_a[i] and fast_b[i]:
+                speed = 0.9
+            elif fast_a[i] or fast_b[i]:
+                speed = 0.7
+            else:
+                speed = 0.6
+            
+            out[i] = (stability + liquidity + speed + volatility_score + historical[i]) / 5
+except ImportError:
+    # Without numba the same scores come from NumPy array expressions
+    def _confidence_scores(price_a: np.ndarray, price_b: np.ndarray, volume: np.ndarray, fast_a: np.ndarray,
+                           fast_b: np.ndarray, volatility_score: float, historical: np.ndarray) -> np.ndarray:
+        price_diff_pct = np.abs(price_a - price_b) / np.maximum(price_a, price_b)
+        stability = np.select([price_diff_pct > 0.05, price_diff_pct > 0.02], [0.6, 0.8], 0.9)
+        liquidity = np.select([volume > 100000, volume > 10000], [0.9, 0.7], 0.5)
+        speed = np.select([fast_a & fast_b, fast_a | fast_b], [0.9, 0.7], 0.6)
+        
+        return (stability + liquidity + speed + volatility_score + historical) / 5
+
+class DexId(IntEnum):
+    """Integer codes for known DEXs; indexes the per-DEX lookup arrays"""
+    UNISWAP_V3 = 0
+    UNISWAP_V2 = 1
+    SUSHISWAP = 2
+    CURVE = 3
+    BALANCER = 4
+    OTHER = 5
+
+DEX_IDS = MappingProxyType({dex.name.lower(): dex for dex in DexId if dex is not DexId.OTHER})
+
+# DEXs quick enough to land both legs of an arbitrage
+FAST_DEXES = (DexId.UNISWAP_V3, DexId.SUSHISWAP)
+_FAST_DEX = np.isin(np.arange(len(DexId)), FAST_DEXES)
+
+def _encode_dexes(names: List[str]) -> np.ndarray:
+    """DexId per name, lowercasing and looking up each distinct name once"""
+    ids: Dict[str, int] = {}
+    for name in names:
+        if name not in ids:
+            ids[name] = DEX_IDS.get(name.lower(), DexId.OTHER)
+    return np.array([ids[name] for name in names], dtype=np.intp)
+
+class Volatility(IntEnum):
+    """Market volatility levels; indexes VOLATILITY_SCORES"""
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    OTHER = 3  # Unrecognized label
+
+VOLATILITY_LEVELS = MappingProxyType({level.name.lower(): level for level in Volatility if level is not Volatility.OTHER})
+
+# Confidence from market volatility by level; unrecognized labels score as high
+VOLATILITY_SCORES = (0.9, 0.8, 0.6, 0.6)
+
+class RiskLevel(IntEnum):
+    """Per-trade risk levels"""
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+_RISK_NAMES = tuple(level.name for level in RiskLevel)
+
+@dataclass(slots=True, frozen=True)
 class TradeOpportunity:
     """Data structure for trade opportunities"""
     pair: str
@@ -24,7 +147,7 @@ class TradeOpportunity:
     timestamp: datetime
     risk_level: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradeAnalysisInput:
     """Input structure for trade analysis"""
     opportunities: List[Dict[str, Any]]
@@ -32,7 +155,7 @@ class TradeAnalysisInput:
     risk_parameters: Dict[str, Any]
     historical_data: Optional[List[Dict[str, Any]]] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradeAnalysisOutput:
     """Output structure for trade analysis"""
     recommended_trades: List[TradeOpportunity]
@@ -48,9 +171,6 @@ class TradeAnalysisAgent:
     Output: Analyzed and prioritized trade recommendations
     """
     
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        
     def run(self, input_data: TradeAnalysisInput) -> TradeAnalysisOutput:
         """
         Main execution function - Claude-style interface
@@ -62,34 +182,14 @@ class TradeAnalysisAgent:
             TradeAnalysisOutput with analyzed recommendations
         """
         try:
-            # Analyze each opportunity
-            analyzed_opportunities = []
-            rejected_opportunities = []
-            
-            for opp in input_data.opportunities:
-                analysis = self._analyze_opportunity(opp, input_data.market_conditions, input_data.risk_parameters)
-                
-                if analysis.confidence_score >= 0.7 and analysis.net_profit > 0:
-                    analyzed_opportunities.append(analysis)
-                else:
-                    rejected_opportunities.append({
-                        'opportunity': opp,
-                        'rejection_reason': self._get_rejection_reason(analysis),
-                        'confidence_score': analysis.confidence_score
-                    })
-            
-            # Sort by profit potential and confidence
-            analyzed_opportunities.sort(
-                key=lambda x: (x.net_profit * x.confidence_score), 
-                reverse=True
+            # Analyze the whole batch at once, best (profit x confidence) first, and assess overall risk
+            analyzed_opportunities, rejected_opportunities, risk_assessment = self._analyze_opportunities(
+                input_data.opportunities, input_data.market_conditions, input_data.risk_parameters
             )
             
             # Generate market analysis
             market_analysis = self._analyze_market_conditions(input_data.market_conditions)
             
-            # Assess overall risk
-            risk_assessment = self._assess_portfolio_risk(analyzed_opportunities, input_data.risk_parameters)
-            
             # Create execution priority list
             execution_priority = [opp.pair for opp in analyzed_opportunities[:5]]  # Top 5
             
@@ -102,47 +202,93 @@ class TradeAnalysisAgent:
             )
             
         except Exception as e:
-            self.logger.error(f"Trade analysis failed: {e}")
+            logger.error(f"Trade analysis failed: {e}")
             raise
     
-    def _analyze_opportunity(self, opp: Dict[str, Any], market_conditions: Dict[str, Any], risk_params: Dict[str, Any]) -> TradeOpportunity:
-        """Analyze a single arbitrage opportunity"""
+    def _analyze_opportunities(self, opportunities: List[Dict[str, Any]], market_conditions: Dict[str, Any],
+                               risk_params: Dict[str, Any]) -> Tuple[List[TradeOpportunity], List[Dict[str, Any]], Dict[str, Any]]:
+        """Score a batch of opportunities column-wise; returns (recommended, rejected, portfolio risk)"""
+        if not opportunities:
+            empty = np.empty(0, dtype=np.intp)
+            return [], [], self._assess_portfolio_risk(np.empty(0), empty, empty, risk_params)
+        
+        # One array per field instead of dict lookups per opportunity
+        price_a = np.array([opp['price_a'] for opp in opportunities], dtype=float)
+        price_b = np.array([opp['price_b'] for opp in opportunities], dtype=float)
+        volume = np.array([opp.get('volume', 1.0) for opp in opportunities], dtype=float)
         
         # Calculate profit metrics
-        price_diff = abs(opp['price_a'] - opp['price_b'])
-        profit_potential = price_diff * opp.get('volume', 1.0)
-        gas_cost = self._estimate_gas_cost(opp, market_conditions)
+        price_diff = np.abs(price_a - price_b)
+        profit_potential = price_diff * volume
+        gas_cost = self._estimate_gas_cost(market_conditions)
         net_profit = profit_potential - gas_cost
         
-        # Calculate confidence score based on multiple factors
-        confidence_factors = {
-            'price_stability': self._assess_price_stability(opp),
-            'liquidity': self._assess_liquidity(opp),
-            'execution_speed': self._assess_execution_speed(opp),
-            'market_volatility': self._assess_market_volatility(market_conditions),
-            'historical_success': self._get_historical_success_rate(opp.get('pair', ''))
-        }
+        # Execution speed depends on whether each leg trades on a fast DEX
+        fast_a = _FAST_DEX[_encode_dexes([opp.get('dex_a', '') for opp in opportunities])]
+        fast_b = _FAST_DEX[_encode_dexes([opp.get('dex_b', '') for opp in opportunities])]
         
-        confidence_score = sum(confidence_factors.values()) / len(confidence_factors)
+        # One success-rate lookup per distinct pair in the batch
+        pair_ids: Dict[str, int] = {}
+        pair_codes = np.array([pair_ids.setdefault(opp.get('pair', ''), len(pair_ids)) for opp in opportunities], dtype=np.intp)
+        success_rates = np.array([self._get_historical_success_rate(pair) for pair in pair_ids])
+        historical = success_rates[pair_codes]
         
-        # Determine risk level
-        risk_level = self._determine_risk_level(net_profit, confidence_score, market_conditions)
+        # Confidence score is the mean of the factor scores
+        confidence = _confidence_scores(
+            price_a, price_b, volume, fast_a, fast_b,
+            self._assess_market_volatility(
+                VOLATILITY_LEVELS.get(market_conditions.get('volatility', 'normal'), Volatility.OTHER)
+            ),
+            historical
+        )
         
-        return TradeOpportunity(
-            pair=opp.get('pair', 'UNKNOWN'),
-            dex_a=opp.get('dex_a', 'UNKNOWN'),
-            dex_b=opp.get('dex_b', 'UNKNOWN'),
-            price_a=opp.get('price_a', 0),
-            price_b=opp.get('price_b', 0),
-            profit_potential=profit_potential,
-            gas_cost_estimate=gas_cost,
-            net_profit=net_profit,
-            confidence_score=confidence_score,
-            timestamp=datetime.now(),
-            risk_level=risk_level
+        accepted = (confidence >= 0.7) & (net_profit > 0)
+        
+        # Sort accepted rows by profit potential and confidence; stable, so ties keep input order
+        accepted_rows = np.flatnonzero(accepted)
+        ranked_rows = accepted_rows[np.argsort(-(net_profit * confidence)[accepted_rows], kind='stable')]
+        risk_levels = self._determine_risk_levels(net_profit[ranked_rows], confidence[ranked_rows])
+        
+        # Assess overall risk over the recommended trades
+        risk_assessment = self._assess_portfolio_risk(
+            net_profit[ranked_rows], risk_levels, pair_codes[ranked_rows], risk_params
         )
+        
+        profit_potential = profit_potential.tolist()
+        net_profit = net_profit.tolist()
+        confidence = confidence.tolist()
+        timestamp = datetime.now()
+        
+        # Only materialize opportunities for the rows that passed
+        recommended = []
+        for row, risk_level in zip(ranked_rows.tolist(), risk_levels.tolist()):
+            opp = opportunities[row]
+            recommended.append(TradeOpportunity(
+                pair=opp.get('pair', 'UNKNOWN'),
+                dex_a=opp.get('dex_a', 'UNKNOWN'),
+                dex_b=opp.get('dex_b', 'UNKNOWN'),
+                price_a=opp.get('price_a', 0),
+                price_b=opp.get('price_b', 0),
+                profit_potential=profit_potential[row],
+                gas_cost_estimate=gas_cost,
+                net_profit=net_profit[row],
+                confidence_score=confidence[row],
+                timestamp=timestamp,
+                risk_level=_RISK_NAMES[risk_level]
+            ))
+        
+        rejected = [
+            {
+                'opportunity': opportunities[row],
+                'rejection_reason': self._get_rejection_reason(net_profit[row], confidence[row]),
+                'confidence_score': confidence[row]
+            }
+            for row in np.flatnonzero(~accepted).tolist()
+        ]
+        
+        return recommended, rejected, risk_assessment
     
-    def _estimate_gas_cost(self, opp: Dict[str, Any], market_conditions: Dict[str, Any]) -> float:
+    def _estimate_gas_cost(self, market_conditions: Dict[str, Any]) -> float:
         """Estimate gas cost for the trade"""
         base_gas = 150000  # Base gas for flash loan arbitrage
         gas_price = market_conditions.get('gas_price_gwei', 20)
@@ -153,73 +299,28 @@ class TradeAnalysisAgent:
         
         return gas_cost_usd
     
-    def _assess_price_stability(self, opp: Dict[str, Any]) -> float:
-        """Assess price stability (0-1 score)"""
-        # Simple heuristic - in real implementation, use historical price data
-        price_diff_pct = abs(opp.get('price_a', 0) - opp.get('price_b', 0)) / max(opp.get('price_a', 1), opp.get('price_b', 1))
-        
-        if price_diff_pct > 0.05:  # >5% difference might be unstable
-            return 0.6
-        elif price_diff_pct > 0.02:  # >2% difference
-            return 0.8
-        else:
-            return 0.9
-    
-    def _assess_liquidity(self, opp: Dict[str, Any]) -> float:
-        """Assess liquidity (0-1 score)"""
-        # Simple heuristic based on volume
-        volume = opp.get('volume', 0)
-        if volume > 100000:  # High liquidity
-            return 0.9
-        elif volume > 10000:  # Medium liquidity
-            return 0.7
-        else:  # Low liquidity
-            return 0.5
-    
-    def _assess_execution_speed(self, opp: Dict[str, Any]) -> float:
-        """Assess execution speed requirements (0-1 score)"""
-        # Simple heuristic - DEX type affects speed
-        fast_dexes = ['uniswap_v3', 'sushiswap']
-        dex_a = opp.get('dex_a', '').lower()
-        dex_b = opp.get('dex_b', '').lower()
-        
-        if dex_a in fast_dexes and dex_b in fast_dexes:
-            return 0.9
-        elif dex_a in fast_dexes or dex_b in fast_dexes:
-            return 0.7
-        else:
-            return 0.6
-    
-    def _assess_market_volatility(self, market_conditions: Dict[str, Any]) -> float:
+    def _assess_market_volatility(self, volatility: Volatility) -> float:
         """Assess market volatility impact (0-1 score)"""
-        volatility = market_conditions.get('volatility', 'normal')
-        
-        if volatility == 'low':
-            return 0.9
-        elif volatility == 'normal':
-            return 0.8
-        else:  # high volatility
-            return 0.6
+        return VOLATILITY_SCORES[volatility]
     
     def _get_historical_success_rate(self, pair: str) -> float:
         """Get historical success rate for this pair (0-1 score)"""
         # Placeholder - in real implementation, query historical data
         return 0.8
     
-    def _determine_risk_level(self, net_profit: float, confidence_score: float, market_conditions: Dict[str, Any]) -> str:
-        """Determine risk level for the trade"""
-        if confidence_score >= 0.8 and net_profit > 50:
-            return 'LOW'
-        elif confidence_score >= 0.6 and net_profit > 20:
-            return 'MEDIUM'
-        else:
-            return 'HIGH'
+    def _determine_risk_levels(self, net_profit: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+        """Determine the RiskLevel of each trade"""
+        return np.select(
+            [(confidence >= 0.8) & (net_profit > 50), (confidence >= 0.6) & (net_profit > 20)],
+            [RiskLevel.LOW, RiskLevel.MEDIUM],
+            RiskLevel.HIGH
+        )
     
-    def _get_rejection_reason(self, analysis: TradeOpportunity) -> str:
+    def _get_rejection_reason(self, net_profit: float, confidence_score: float) -> str:
         """Get reason for rejecting a trade"""
-        if analysis.net_profit <= 0:
+        if net_profit <= 0:
             return 'NEGATIVE_PROFIT'
-        elif analysis.confidence_score < 0.7:
+        elif confidence_score < 0.7:
             return 'LOW_CONFIDENCE'
         else:
             return 'UNKNOWN'
@@ -234,25 +335,29 @@ class TradeAnalysisAgent:
             'recommended_position_size': 'MEDIUM'
         }
     
-    def _assess_portfolio_risk(self, opportunities: List[TradeOpportunity], risk_params: Dict[str, Any]) -> Dict[str, Any]:
-        """Assess overall portfolio risk"""
-        total_exposure = sum(opp.net_profit for opp in opportunities)
-        high_risk_count = sum(1 for opp in opportunities if opp.risk_level == 'HIGH')
+    def _assess_portfolio_risk(self, net_profit: np.ndarray, risk_levels: np.ndarray, pair_codes: np.ndarray,
+                               risk_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Assess overall portfolio risk from the recommended trades' columns"""
+        high_risk_count = int(np.count_nonzero(risk_levels == RiskLevel.HIGH))
         
         return {
-            'total_exposure': total_exposure,
+            'total_exposure': float(net_profit.sum()),
             'high_risk_trades': high_risk_count,
-            'diversification_score': len(set(opp.pair for opp in opportunities)) / max(len(opportunities), 1),
+            'diversification_score': np.unique(pair_codes).size / max(net_profit.size, 1),
             'overall_risk_level': 'MEDIUM' if high_risk_count < 3 else 'HIGH'
         }
 
+# Agents are stateless, so every call shares one instance
+_AGENT = TradeAnalysisAgent()
+
 # Claude-style execution function
-def run(input_json: str) -> str:
+def run(input_json: str, pretty: bool = False) -> str:
     """
     Claude-style execution interface
     
     Args:
         input_json: JSON string with TradeAnalysisInput data
+        pretty: Indent the output for reading; compact otherwise
         
     Returns:
         JSON string with TradeAnalysisOutput data
@@ -263,34 +368,10 @@ def run(input_json: str) -> str:
         input_data = TradeAnalysisInput(**input_data_dict)
         
         # Run analysis
-        agent = TradeAnalysisAgent()
-        result = agent.run(input_data)
-        
-        # Convert result to dict for JSON serialization
-        result_dict = {
-            'recommended_trades': [
-                {
-                    'pair': trade.pair,
-                    'dex_a': trade.dex_a,
-                    'dex_b': trade.dex_b,
-                    'price_a': trade.price_a,
-                    'price_b': trade.price_b,
-                    'profit_potential': trade.profit_potential,
-                    'gas_cost_estimate': trade.gas_cost_estimate,
-                    'net_profit': trade.net_profit,
-                    'confidence_score': trade.confidence_score,
-                    'timestamp': trade.timestamp.isoformat(),
-                    'risk_level': trade.risk_level
-                }
-                for trade in result.recommended_trades
-            ],
-            'rejected_trades': result.rejected_trades,
-            'market_analysis': result.market_analysis,
-            'risk_assessment': result.risk_assessment,
-            'execution_priority': result.execution_priority
-        }
+        result = _AGENT.run(input_data)
         
-        return json.dumps(result_dict, indent=2)
+        # Output dataclasses serialize field by field, timestamps as ISO 8601
+        return _json_dumps(result, pretty)
         
     except Exception as e:
         error_result = {
@@ -301,7 +382,7 @@ def run(input_json: str) -> str:
             'risk_assessment': {},
             'execution_priority': []
         }
-        return json.dumps(error_result, indent=2)
+        return _json_dumps(error_result, pretty)
 
 if __name__ == "__main__":
     # Example usage
@@ -327,5 +408,5 @@ if __name__ == "__main__":
         }
     }
     
-    result = run(json.dumps(sample_input))
+    result = run(json.dumps(sample_input), pretty=True)
     print(result)